@@ -0,0 +1,543 @@
+#!/usr/bin/env python3
+"""AI Agent Master Guide - Agent Chain 부하 테스트 / 벤치마크
+
+validate_agent_chains.py의 모든 체인 클래스를 지정한 동시성·도착률로 구동하고
+처리량, 지연 백분위, 메모리 최고치, 재시도 수를 JSON으로 출력한다.
+메모리 최고치는 tracemalloc 오버헤드가 지연 측정에 섞이지 않도록 별도 실행에서 잰다.
+기준선(--baseline) JSON과 비교하여 허용 범위를 넘는 회귀가 있으면 종료 코드 1,
+부하 설정이 기준선과 다르면 비교하지 않고 종료 코드 2 (--allow-config-mismatch로 경고만).
+
+    python3 examples/benchmark_agent_chains.py --requests 200 --concurrency 32 \\
+        --latency heavy_tail --failure-rate 0.05 --output bench.json
+    python3 examples/benchmark_agent_chains.py --baseline bench.json
+    python3 examples/benchmark_agent_chains.py --self-test
+"""
+
+from typing import Any, Callable, Dict, List, Optional
+from collections import Counter
+from dataclasses import asdict, dataclass
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from validate_agent_chains import (
+    AgentStage,
+    BenchAgent,
+    CircuitBreakerRegistry,
+    ConditionalChain,
+    DAGChain,
+    ExponentialBackoff,
+    LATENCY_KINDS,
+    LatencyHistogram,
+    LatencyModel,
+    MetaPromptingChain,
+    ParallelAgentEnsemble,
+    PromptChain,
+    RetryBudget,
+    RobustAgentChain
+)
+
+
+# ============================================================
+# 1. 체인 구성
+# ============================================================
+
+class RetryCounter:
+    """RobustAgentChain의 sleep 대체 - 재시도 1회마다 정확히 1번 호출됨"""
+
+    def __init__(self):
+        self.retries = 0
+
+    async def __call__(self, delay: float):
+        self.retries += 1
+        await asyncio.sleep(delay)
+
+
+def _agents(prefix: str, count: int, latency: LatencyModel, failure_rate: float, seed: int) -> List[BenchAgent]:
+    return [BenchAgent(f"{prefix}{i}", latency, failure_rate, seed) for i in range(count)]
+
+
+def build_prompt_chain(latency, failure_rate, seed, retries):
+    return PromptChain(_agents("Prompt", 3, latency, failure_rate, seed)).execute_async
+
+
+def build_conditional_chain(latency, failure_rate, seed, retries):
+    rng = random.Random(seed)
+
+    def validator(output: Dict) -> Dict:
+        score = rng.random()
+        return {"score": score, "issues": [] if score >= 0.8 else ["품질 미달"]}
+
+    initial, high, low = _agents("Conditional", 3, latency, failure_rate, seed)
+    return ConditionalChain(initial, validator, high, low).execute_async
+
+
+def build_robust_chain(latency, failure_rate, seed, retries):
+    chain = RobustAgentChain(
+        _agents("Robust", 3, latency, failure_rate, seed),
+        backoff=ExponentialBackoff(base=latency.mean / 2, max_delay=latency.mean * 4, rng=random.Random(seed)),
+        retry_budget=RetryBudget(),
+        circuit_breakers=CircuitBreakerRegistry(),
+        sleep=retries
+    )
+    return chain.execute_async
+
+
+def build_meta_chain(latency, failure_rate, seed, retries):
+    designer, reviewer = _agents("Meta", 2, latency, failure_rate, seed)
+    return MetaPromptingChain(designer, reviewer).execute_async
+
+
+def build_dag_chain(latency, failure_rate, seed, retries):
+    planner, writer, critic, finalizer = _agents("DAG", 4, latency, failure_rate, seed)
+    stages = [
+        AgentStage(planner, inputs=["user_input"]),
+        AgentStage(writer, inputs=["DAG0_output"]),
+        AgentStage(critic, inputs=["DAG0_output"]),
+        AgentStage(finalizer, inputs=["DAG1_output", "DAG2_output"])
+    ]
+    return DAGChain(stages, retain_intermediate=False).execute_async
+
+
+def build_ensemble(latency, failure_rate, seed, retries):
+    agents = _agents("Ensemble", 3, latency, failure_rate, seed)
+    scores = {agent.name: 0.6 + 0.1 * i for i, agent in enumerate(agents)}
+    return ParallelAgentEnsemble(
+        agents, lambda output: scores[output["agent"]], mode="first_over_threshold", threshold=0.65
+    ).execute_async
+
+
+CHAIN_BUILDERS: Dict[str, Callable] = {
+    "prompt": build_prompt_chain,
+    "conditional": build_conditional_chain,
+    "robust": build_robust_chain,
+    "meta": build_meta_chain,
+    "dag": build_dag_chain,
+    "ensemble": build_ensemble
+}
+
+
+# ============================================================
+# 2. 부하 구동 / 측정
+# ============================================================
+
+@dataclass
+class LoadConfig:
+    """부하 설정
+
+    arrival_rate가 None이면 closed-loop (항상 concurrency개 요청 진행),
+    값이 있으면 Poisson 도착 open-loop이며 지연은 도착 시각부터 측정한다
+    (동시성 대기 시간 포함).
+    """
+    requests: int = 200
+    concurrency: int = 32
+    arrival_rate: Optional[float] = None
+    seed: int = 0
+
+
+async def _drive(run: Callable[[str], Any], config: LoadConfig) -> Dict[str, Any]:
+    slots = asyncio.Semaphore(config.concurrency)
+    histogram = LatencyHistogram(max_samples=max(10000, config.requests))
+    errors = Counter()
+    arrivals = random.Random(config.seed)
+
+    async def one(i: int):
+        arrived = time.perf_counter()
+        async with slots:
+            if not config.arrival_rate:
+                arrived = time.perf_counter()  # closed-loop: 슬롯 획득부터 측정
+            try:
+                await run(f"벤치마크 요청 {i}")
+            except Exception as exc:
+                errors[type(exc).__name__] += 1
+                return
+        histogram.record(time.perf_counter() - arrived)
+
+    start = time.perf_counter()
+    tasks = []
+    for i in range(config.requests):
+        if config.arrival_rate:
+            await asyncio.sleep(arrivals.expovariate(config.arrival_rate))
+        tasks.append(asyncio.create_task(one(i)))
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+
+    completed = histogram.count
+    return {
+        "elapsed": elapsed,
+        "completed": completed,
+        "failed": sum(errors.values()),
+        "errors": dict(errors),
+        "throughput": completed / elapsed if elapsed else 0.0,
+        "latency": {
+            "mean": histogram.total / completed if completed else 0.0,
+            "p50": histogram.percentile(0.50),
+            "p95": histogram.percentile(0.95),
+            "p99": histogram.percentile(0.99),
+            "max": max(histogram.samples, default=0.0)
+        }
+    }
+
+
+def run_benchmark(
+    chain: str,
+    latency: LatencyModel,
+    config: LoadConfig,
+    failure_rate: float = 0.0,
+    measure_memory: bool = True
+) -> Dict[str, Any]:
+    """체인 하나를 부하 설정대로 구동하고 결과 지표를 반환
+
+    처리량/지연/재시도는 추적 없이 잰 실행의 값이고, memory_peak_bytes는
+    같은 설정으로 새로 구성한 체인을 tracemalloc 아래에서 한 번 더 돌린 값이다.
+    """
+    retries = RetryCounter()
+    run = CHAIN_BUILDERS[chain](latency, failure_rate, config.seed, retries)
+    agents = _collect_agents(run)
+    result = asyncio.run(_drive(run, config))
+
+    result["memory_peak_bytes"] = _memory_peak(chain, latency, config, failure_rate) if measure_memory else None
+    result["retries"] = retries.retries
+    result["agent_calls"] = sum(agent.calls for agent in agents)
+    result["injected_failures"] = sum(agent.failures for agent in agents)
+    return result
+
+
+def _memory_peak(chain: str, latency: LatencyModel, config: LoadConfig, failure_rate: float) -> int:
+    run = CHAIN_BUILDERS[chain](latency, failure_rate, config.seed, RetryCounter())
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    try:
+        asyncio.run(_drive(run, config))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def _collect_agents(run: Callable) -> List[BenchAgent]:
+    chain = run.__self__
+    found = []
+    for value in vars(chain).values():
+        candidates = value if isinstance(value, list) else [value]
+        for candidate in candidates:
+            candidate = getattr(candidate, "agent", candidate)  # AgentStage
+            if isinstance(candidate, BenchAgent):
+                found.append(candidate)
+    return found
+
+
+# ============================================================
+# 3. 기준선 비교
+# ============================================================
+
+# (지표 경로, 높을수록 좋은지)
+REGRESSION_METRICS = (
+    (("throughput",), True),
+    (("latency", "p50"), False),
+    (("latency", "p95"), False),
+    (("latency", "p99"), False),
+    (("memory_peak_bytes",), False)
+)
+
+# 횟수 지표 - 기준선이 0이어도 비교 (0 → n 은 n배 악화로 계산)
+REGRESSION_COUNTS = ("failed", "retries")
+
+
+def config_mismatch(config: Dict[str, Any], baseline_config: Dict[str, Any]) -> List[str]:
+    """기준선과 값이 다른 설정 항목 경로 목록 (빈 목록이면 비교 가능)"""
+    mismatched = []
+    for key in sorted(set(config) | set(baseline_config)):
+        current, previous = config.get(key), baseline_config.get(key)
+        if isinstance(current, dict) and isinstance(previous, dict):
+            mismatched += [f"{key}.{sub}" for sub in config_mismatch(current, previous)]
+        elif current != previous:
+            mismatched.append(key)
+    return mismatched
+
+
+def compare_to_baseline(
+    results: Dict[str, Dict[str, Any]],
+    baseline: Dict[str, Dict[str, Any]],
+    tolerance: float = 0.2
+) -> List[Dict[str, Any]]:
+    """기준선 대비 tolerance(비율)를 넘게 나빠진 지표 목록
+
+    같은 부하 설정끼리만 의미가 있으므로 먼저 config_mismatch()로 확인한다.
+    """
+    metrics = list(REGRESSION_METRICS) + [((name,), False) for name in REGRESSION_COUNTS]
+    regressions = []
+    for chain, current in results.items():
+        previous = baseline.get(chain)
+        if previous is None:
+            continue
+        for path, higher_is_better in metrics:
+            before, after = previous, current
+            for key in path:
+                before, after = before.get(key), after.get(key)
+            if before is None or after is None:
+                continue
+            if path[0] in REGRESSION_COUNTS:
+                change = (after - before) / max(before, 1)
+            elif not before:
+                continue
+            else:
+                change = (after - before) / before
+            worse = -change if higher_is_better else change
+            if worse > tolerance:
+                regressions.append({
+                    "chain": chain,
+                    "metric": ".".join(path),
+                    "baseline": before,
+                    "current": after,
+                    "change": round(change, 4)
+                })
+    return regressions
+
+
+# ============================================================
+# 4. CLI
+# ============================================================
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Agent Chain 부하 테스트 / 벤치마크")
+    parser.add_argument("--chains", nargs="+", choices=sorted(CHAIN_BUILDERS), default=sorted(CHAIN_BUILDERS))
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--arrival-rate", type=float, default=None, help="초당 도착 요청 수 (미지정 시 closed-loop)")
+    parser.add_argument("--latency", choices=LATENCY_KINDS, default="lognormal")
+    parser.add_argument("--mean-latency", type=float, default=0.02)
+    parser.add_argument("--sigma", type=float, default=0.5)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="결과 JSON 저장 경로 (기본: stdout)")
+    parser.add_argument("--baseline", help="비교할 이전 결과 JSON")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="허용 악화 비율 (기본 0.2 = 20%%)")
+    parser.add_argument("--allow-config-mismatch", action="store_true", help="설정이 달라도 경고 후 비교")
+    parser.add_argument("--no-memory", action="store_true", help="메모리 측정 실행 생략")
+    parser.add_argument("--self-test", action="store_true", help="벤치마크 도구 자체 검증 실행")
+    args = parser.parse_args(argv)
+
+    if args.self_test:
+        return run_self_tests()
+
+    latency = LatencyModel(kind=args.latency, mean=args.mean_latency, sigma=args.sigma)
+    config = LoadConfig(args.requests, args.concurrency, args.arrival_rate, args.seed)
+    report_config = {
+        "load": asdict(config),
+        "latency": asdict(latency),
+        "failure_rate": args.failure_rate
+    }
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        mismatched = config_mismatch(report_config, baseline.get("config", {}))
+        if mismatched:
+            print(f"⚠️  기준선과 설정이 다름: {', '.join(mismatched)}", file=sys.stderr)
+            if not args.allow_config_mismatch:
+                return 2
+
+    results = {}
+    for chain in args.chains:
+        results[chain] = run_benchmark(chain, latency, config, args.failure_rate, not args.no_memory)
+        summary = results[chain]
+        print(
+            f"{chain:12s} {summary['throughput']:8.1f} req/s  "
+            f"p50 {summary['latency']['p50'] * 1000:7.1f}ms  p99 {summary['latency']['p99'] * 1000:7.1f}ms  "
+            f"retries {summary['retries']:4d}  failed {summary['failed']:4d}",
+            file=sys.stderr
+        )
+
+    report = {
+        "config": report_config,
+        "environment": {"python": platform.python_version(), "platform": platform.platform()},
+        "results": results
+    }
+
+    if baseline is not None:
+        report["baseline"] = args.baseline
+        report["regressions"] = compare_to_baseline(results, baseline.get("results", {}), args.tolerance)
+        for regression in report["regressions"]:
+            print(
+                f"⚠️  회귀: {regression['chain']} {regression['metric']} "
+                f"{regression['baseline']:.4g} → {regression['current']:.4g} ({regression['change']:+.1%})",
+                file=sys.stderr
+            )
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    return 1 if report.get("regressions") else 0
+
+
+# ============================================================
+# 5. 자체 검증 (--self-test)
+# ============================================================
+
+SMOKE_CONFIG = LoadConfig(requests=20, concurrency=8, seed=0)
+SMOKE_LATENCY = LatencyModel(kind="fixed", mean=0.002)
+
+
+def test_latency_model():
+    """✅ 지연 분포 평균 / 상한 테스트"""
+    print("\n=== 테스트 1: Latency Model ===")
+
+    rng = random.Random(0)
+    assert LatencyModel(kind="fixed", mean=0.01).sample(rng) == 0.01
+
+    lognormal = LatencyModel(kind="lognormal", mean=0.02, sigma=0.5)
+    heavy = LatencyModel(kind="heavy_tail", mean=0.02, sigma=0.5, tail_prob=0.05)
+    samples = sorted(lognormal.sample(rng) for _ in range(20000))
+    heavy_samples = sorted(heavy.sample(rng) for _ in range(20000))
+    mean = sum(samples) / len(samples)
+    print(f"✅ lognormal 평균 {mean * 1000:.2f}ms, p99 {samples[19800] * 1000:.1f}ms / "
+          f"heavy_tail p99 {heavy_samples[19800] * 1000:.1f}ms")
+    assert abs(mean - 0.02) / 0.02 < 0.05
+    assert heavy_samples[19800] > samples[19800]
+    assert heavy_samples[-1] <= heavy.mean * heavy.max_factor
+
+    try:
+        LatencyModel(kind="uniform")
+        return False
+    except ValueError:
+        pass
+
+    return True
+
+
+def test_run_benchmark():
+    """✅ 모든 체인 구동 / 재시도 집계 / 메모리 별도 측정 테스트"""
+    print("\n=== 테스트 2: Run Benchmark ===")
+
+    for chain in sorted(CHAIN_BUILDERS):
+        result = run_benchmark(chain, SMOKE_LATENCY, SMOKE_CONFIG)
+        print(f"✅ {chain:12s} {result['throughput']:7.1f} req/s, 메모리 최고 {result['memory_peak_bytes']:,}B")
+        assert result["completed"] == SMOKE_CONFIG.requests and result["failed"] == 0
+        assert result["memory_peak_bytes"] > 0
+
+    robust = run_benchmark("robust", SMOKE_LATENCY, SMOKE_CONFIG, failure_rate=0.2, measure_memory=False)
+    print(f"✅ robust 장애 20%: 주입 {robust['injected_failures']}, 재시도 {robust['retries']}, 실패 {robust['failed']}")
+    assert robust["injected_failures"] > 0 and robust["retries"] > 0
+    assert robust["memory_peak_bytes"] is None
+
+    # 지연 측정 실행은 tracemalloc 없이, 메모리는 별도 실행에서
+    tracing = []
+
+    class ProbeChain:
+        async def execute_async(self, user_input: str):
+            tracing.append(tracemalloc.is_tracing())
+
+    CHAIN_BUILDERS["probe"] = lambda latency, failure_rate, seed, retries: ProbeChain().execute_async
+    try:
+        run_benchmark("probe", SMOKE_LATENCY, SMOKE_CONFIG)
+    finally:
+        del CHAIN_BUILDERS["probe"]
+    n = SMOKE_CONFIG.requests
+    assert tracing == [False] * n + [True] * n
+    print(f"✅ 측정 실행 {n}회 추적 없음, 메모리 실행 {n}회 추적")
+
+    return True
+
+
+def test_compare_to_baseline():
+    """✅ 기준선 설정 확인 / 회귀 판정 테스트"""
+    print("\n=== 테스트 3: Baseline Comparison ===")
+
+    config = {"load": asdict(SMOKE_CONFIG), "latency": asdict(SMOKE_LATENCY), "failure_rate": 0.0}
+    other = json.loads(json.dumps(config))
+    other["load"]["concurrency"] = 64
+    other["failure_rate"] = 0.05
+    assert config_mismatch(config, json.loads(json.dumps(config))) == []
+    assert config_mismatch(config, other) == ["failure_rate", "load.concurrency"]
+    assert config_mismatch(config, {}) == ["failure_rate", "latency", "load"]
+
+    def result(throughput, p99, failed, retries):
+        return {
+            "throughput": throughput,
+            "latency": {"p50": 0.01, "p95": 0.02, "p99": p99},
+            "memory_peak_bytes": 1000,
+            "failed": failed,
+            "retries": retries
+        }
+
+    baseline = {"prompt": result(100.0, 0.05, 0, 10), "dag": result(50.0, 0.08, 2, 0)}
+    current = {"prompt": result(70.0, 0.04, 3, 11), "dag": result(49.0, 0.08, 2, 0), "new": result(1.0, 1.0, 9, 9)}
+    regressions = compare_to_baseline(current, baseline, tolerance=0.2)
+    flagged = sorted((r["chain"], r["metric"]) for r in regressions)
+    print(f"✅ 회귀: {flagged}")
+    assert flagged == [("prompt", "failed"), ("prompt", "throughput")]
+    assert next(r for r in regressions if r["metric"] == "failed")["change"] == 3.0
+
+    return True
+
+
+def test_cli_baseline():
+    """✅ CLI 기준선 비교 종료 코드 테스트"""
+    print("\n=== 테스트 4: CLI Baseline ===")
+
+    common = ["--chains", "prompt", "--requests", "20", "--concurrency", "8",
+              "--latency", "fixed", "--mean-latency", "0.002", "--no-memory"]
+    with tempfile.TemporaryDirectory() as tmp:
+        baseline_path = os.path.join(tmp, "bench.json")
+        assert main(common + ["--output", baseline_path]) == 0
+        with open(baseline_path, encoding="utf-8") as f:
+            assert json.load(f)["config"]["load"]["requests"] == 20
+
+        # 같은 설정 → 비교, 큰 허용 범위에서는 회귀 없음
+        assert main(common + ["--baseline", baseline_path, "--tolerance", "10",
+                              "--output", os.path.join(tmp, "again.json")]) == 0
+        # 설정이 다르면 비교 거부, 명시적으로 허용하면 경고 후 비교
+        changed = common + ["--baseline", baseline_path, "--seed", "1", "--output", os.path.join(tmp, "changed.json")]
+        assert main(changed) == 2
+        assert main(changed + ["--allow-config-mismatch", "--tolerance", "10"]) == 0
+    print("✅ 같은 설정 비교 0, 설정 불일치 2 (허용 시 비교)")
+
+    return True
+
+
+def run_self_tests() -> int:
+    print("=" * 60)
+    print("AI Agent Master Guide - 벤치마크 도구 검증")
+    print("=" * 60)
+
+    results = []
+    results.append(("Latency Model", test_latency_model()))
+    results.append(("Run Benchmark", test_run_benchmark()))
+    results.append(("Baseline Comparison", test_compare_to_baseline()))
+    results.append(("CLI Baseline", test_cli_baseline()))
+
+    print("\n" + "=" * 60)
+    print("테스트 결과 요약")
+    print("=" * 60)
+
+    passed = sum(1 for _, result in results if result)
+    total = len(results)
+
+    for name, result in results:
+        status = "✅ PASS" if result else "❌ FAIL"
+        print(f"{status} - {name}")
+
+    print(f"\n총 {passed}/{total} 테스트 통과 ({passed/total*100:.1f}%)")
+
+    if passed == total:
+        print("\n🎉 모든 벤치마크 도구 검증 성공!")
+        return 0
+    print("\n⚠️  일부 테스트 실패")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
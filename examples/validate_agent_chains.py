@@ -1,9 +1,35 @@
 #!/usr/bin/env python3
 """AI Agent Master Guide - Agent Chain 로직 검증"""
 
-from typing import Dict, List, Any
-from dataclasses import dataclass
+from typing import AsyncIterator, Dict, Iterable, List, Any, Callable, Mapping, Optional, Tuple
+from collections import Counter, OrderedDict, deque
+from types import MappingProxyType
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+import asyncio
+import concurrent.futures
+import contextvars
+import copy
+import dataclasses
+import functools
+import hashlib
+import heapq
+import inspect
+import json
+import math
+import os
+import pickle
+import random
+import signal
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
 import time
+import tracemalloc
+import weakref
 
 
 # ============================================================
@@ -22,14 +48,24 @@ class AgentResult:
 class MockAgent:
     """테스트용 Mock Agent"""
 
-    def __init__(self, name: str, delay: float = 0.1):
+    def __init__(self, name: str, delay: float = 0.1, context_keys: Optional[List[str]] = None):
         self.name = name
         self.delay = delay
+        self.context_keys = context_keys  # ContextBudget 사용 시 전달받을 키 선언
 
     def execute(self, context: Dict[str, Any]) -> AgentResult:
         """Agent 실행 (Mock)"""
+        start = time.perf_counter()
         time.sleep(self.delay)  # API 호출 시뮬레이션
+        return self._make_result(context, time.perf_counter() - start)
 
+    async def execute_async(self, context: Dict[str, Any]) -> AgentResult:
+        """Agent 비동기 실행 (Mock) - 이벤트 루프를 막지 않음"""
+        start = time.perf_counter()
+        await asyncio.sleep(self.delay)  # API 호출 시뮬레이션
+        return self._make_result(context, time.perf_counter() - start)
+
+    def _make_result(self, context: Dict[str, Any], elapsed: float) -> AgentResult:
         output = {
             "agent": self.name,
             "processed_input": context.get("user_input", ""),
@@ -39,11 +75,626 @@ class MockAgent:
         return AgentResult(
             agent_name=self.name,
             output=output,
-            execution_time=self.delay,
+            execution_time=elapsed,  # 설정값이 아닌 실측 wall time
             metadata={"success": True}
         )
 
 
+LATENCY_KINDS = ("fixed", "lognormal", "heavy_tail")
+
+
+@dataclass
+class LatencyModel:
+    """Agent 호출 지연 분포
+
+    - fixed: 항상 mean
+    - lognormal: 평균이 mean인 로그정규 분포 (sigma = 로그 표준편차)
+    - heavy_tail: lognormal 본체 + tail_prob 확률로 Pareto 배수 (max_factor 상한)
+    """
+    kind: str = "lognormal"
+    mean: float = 0.02
+    sigma: float = 0.5
+    tail_prob: float = 0.02
+    tail_alpha: float = 1.5
+    max_factor: float = 50.0
+
+    def __post_init__(self):
+        if self.kind not in LATENCY_KINDS:
+            raise ValueError(f"지원하지 않는 지연 분포: {self.kind} (가능: {LATENCY_KINDS})")
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == "fixed":
+            return self.mean
+        # 평균이 mean이 되도록 mu 보정
+        latency = rng.lognormvariate(math.log(self.mean) - self.sigma ** 2 / 2, self.sigma)
+        if self.kind == "heavy_tail" and rng.random() < self.tail_prob:
+            latency *= min(self.max_factor, 10 * rng.paretovariate(self.tail_alpha))
+        return min(latency, self.mean * self.max_factor)
+
+
+class BenchAgent(MockAgent):
+    """지연 분포와 장애 주입을 지원하는 Mock Agent
+
+    장애는 ValueError로 발생하므로 RobustAgentChain의 재시도 대상이 된다.
+    """
+
+    def __init__(self, name: str, latency: LatencyModel, failure_rate: float = 0.0, seed: int = 0):
+        super().__init__(name, delay=latency.mean)
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.rng = random.Random(f"{seed}:{name}")
+        self.calls = 0
+        self.failures = 0
+
+    def execute(self, context: Dict[str, Any]) -> AgentResult:
+        start = time.perf_counter()
+        time.sleep(self._next_delay())
+        self._maybe_fail()
+        return self._make_result(context, time.perf_counter() - start)
+
+    async def execute_async(self, context: Dict[str, Any]) -> AgentResult:
+        start = time.perf_counter()
+        await asyncio.sleep(self._next_delay())
+        self._maybe_fail()
+        return self._make_result(context, time.perf_counter() - start)
+
+    def _next_delay(self) -> float:
+        self.calls += 1
+        return self.latency.sample(self.rng)
+
+    def _maybe_fail(self):
+        if self.failure_rate and self.rng.random() < self.failure_rate:
+            self.failures += 1
+            raise ValueError(f"{self.name}: injected failure")
+
+
+class MockBatchAgent(MockAgent):
+    """배치 API를 흉내 내는 Mock Agent
+
+    요청 1회 지연 = request_latency + per_item_latency × 배치 크기.
+    API 동시 요청 수는 max_concurrent_requests로 제한된다 (실제 rate limit).
+    execute/execute_async는 크기 1의 배치로 처리한다.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        request_latency: float = 0.05,
+        per_item_latency: float = 0.002,
+        max_concurrent_requests: int = 4
+    ):
+        super().__init__(name, delay=request_latency)
+        self.request_latency = request_latency
+        self.per_item_latency = per_item_latency
+        self.max_concurrent_requests = max_concurrent_requests
+        self.requests = 0
+        self._thread_slots = threading.BoundedSemaphore(max_concurrent_requests)
+        self._loop_slots: "weakref.WeakKeyDictionary[Any, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+    def execute(self, context: Dict[str, Any]) -> AgentResult:
+        return self.execute_batch([context])[0]
+
+    async def execute_async(self, context: Dict[str, Any]) -> AgentResult:
+        return (await self.execute_batch_async([context]))[0]
+
+    def execute_batch(self, contexts: List[Dict[str, Any]]) -> List[AgentResult]:
+        """배치 실행 (Mock) - 결과는 입력 순서와 동일"""
+        with self._thread_slots:
+            start = time.perf_counter()
+            self.requests += 1
+            time.sleep(self._batch_latency(len(contexts)))
+            return self._make_batch_results(contexts, time.perf_counter() - start)
+
+    async def execute_batch_async(self, contexts: List[Dict[str, Any]]) -> List[AgentResult]:
+        """배치 비동기 실행 (Mock)"""
+        loop = asyncio.get_running_loop()
+        slots = self._loop_slots.get(loop)
+        if slots is None:
+            # asyncio.Semaphore는 이벤트 루프에 묶이므로 루프별로 생성
+            slots = self._loop_slots[loop] = asyncio.Semaphore(self.max_concurrent_requests)
+        async with slots:
+            start = time.perf_counter()
+            self.requests += 1
+            await asyncio.sleep(self._batch_latency(len(contexts)))
+            return self._make_batch_results(contexts, time.perf_counter() - start)
+
+    def _batch_latency(self, size: int) -> float:
+        return self.request_latency + self.per_item_latency * size
+
+    def _make_batch_results(self, contexts: List[Dict[str, Any]], elapsed: float) -> List[AgentResult]:
+        results = []
+        for context in contexts:
+            result = self._make_result(context, elapsed)
+            result.metadata["batch_size"] = len(contexts)
+            results.append(result)
+        return results
+
+
+class MockStreamingAgent(MockAgent):
+    """출력을 청크 단위로 스트리밍하는 Mock Agent
+
+    stream_async(context, upstream)는 청크를 하나씩 yield한다. streaming_input=True
+    이므로 StreamingPromptChain에서 이전 단계의 청크(upstream)를 도착하는 대로
+    하나씩 변환한다. upstream이 없으면 chunks개의 청크를 생성한다.
+    """
+
+    streaming_input = True
+
+    def __init__(self, name: str, chunks: int = 5, chunk_delay: float = 0.02):
+        super().__init__(name, delay=chunks * chunk_delay)
+        self.chunks = chunks
+        self.chunk_delay = chunk_delay
+
+    async def stream_async(
+        self, context: Mapping, upstream: Optional[AsyncIterator[Any]] = None
+    ) -> AsyncIterator[str]:
+        if upstream is None:
+            for i in range(self.chunks):
+                await asyncio.sleep(self.chunk_delay)  # 토큰 생성 시뮬레이션
+                yield f"{self.name}[{i}]"
+        else:
+            async for chunk in upstream:
+                await asyncio.sleep(self.chunk_delay)  # 청크별 처리
+                yield f"{self.name}({chunk})"
+
+    async def execute_async(self, context: Dict[str, Any]) -> AgentResult:
+        start = time.perf_counter()
+        chunks = [chunk async for chunk in self.stream_async(context)]
+        return self._make_result(context, time.perf_counter() - start, chunks)
+
+    def execute(self, context: Dict[str, Any]) -> AgentResult:
+        return asyncio.run(self.execute_async(context))
+
+    def _make_result(self, context: Dict[str, Any], elapsed: float, chunks: Optional[List[str]] = None) -> AgentResult:
+        result = super()._make_result(context, elapsed)
+        result.output["chunks"] = chunks or []
+        return result
+
+
+async def execute_agent_async(
+    agent: Any, context: Dict[str, Any], attempt: int = 0
+) -> AgentResult:
+    """Agent 비동기 실행
+
+    execute_async가 없는 동기 전용 Agent는 스레드 풀로 위임하여
+    이벤트 루프를 막지 않는다. 활성 Tracer가 있으면 호출 1회를
+    attempt span으로 기록하고 Agent별 지연 히스토그램에 반영한다.
+    set_rate_limits()로 한도가 설정되어 있으면 실행 전에 대기열에서 기다린다.
+    """
+    tracer = get_tracer()
+    rate_limits = _active_rate_limits
+    if not tracer.enabled and rate_limits is None:
+        return await _call_agent_async(agent, context)
+
+    with tracer.span(agent.name, kind="attempt", agent=agent.name, attempt=attempt) as span:
+        # 대기열 대기 시간은 실행 시간과 분리하여 기록
+        lease = await rate_limits.acquire(agent, context) if rate_limits is not None else None
+        start = time.perf_counter()
+        try:
+            result = await _call_agent_async(agent, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            if lease is not None:
+                lease.release(elapsed)
+                if span is not None:
+                    span.attributes["queue_wait"] = lease.queue_wait
+    tracer.record_latency(agent.name, elapsed)
+    return result
+
+
+def _consume_outcome(future: "asyncio.Future"):
+    """기다리는 쪽이 사라진 future의 예외를 회수 (never retrieved 경고 방지)"""
+    if not future.cancelled():
+        future.exception()
+
+
+async def _call_agent_async(agent: Any, context: Dict[str, Any]) -> AgentResult:
+    execute_async = getattr(agent, "execute_async", None)
+    if execute_async is not None:
+        return await execute_async(context)
+    return await asyncio.to_thread(agent.execute, context)
+
+
+# ============================================================
+# 계측: Span 트레이싱 / 지연 히스토그램
+# ============================================================
+
+# Prometheus 기본 버킷 (초)
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+@dataclass
+class Span:
+    """chain → stage → attempt 계층의 단일 구간 (monotonic 시계 기준)"""
+    name: str
+    kind: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    start_ns: int
+    end_ns: int = 0
+    status: str = "ok"
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def duration(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e9
+
+
+class LatencyHistogram:
+    """누적 버킷(Prometheus 내보내기용) + 저장소 샘플링(백분위 계산용)"""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_LATENCY_BUCKETS, max_samples: int = 10000):
+        self.buckets = buckets
+        self.bucket_counts = [0] * len(buckets)
+        self.count = 0
+        self.total = 0.0
+        self.max_samples = max_samples
+        self.samples: List[float] = []
+        self._rng = random.Random(0)
+
+    def record(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        for i, upper in enumerate(self.buckets):
+            if seconds <= upper:
+                self.bucket_counts[i] += 1
+                break
+        # reservoir sampling으로 메모리 상한 유지
+        if len(self.samples) < self.max_samples:
+            self.samples.append(seconds)
+        else:
+            slot = self._rng.randrange(self.count)
+            if slot < self.max_samples:
+                self.samples[slot] = seconds
+
+    def percentile(self, q: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        # nearest-rank: q * n 이상인 가장 작은 순위 (0.3 * 10 = 3.0000000000000004 같은 오차 제거)
+        rank = min(len(ordered) - 1, max(0, math.ceil(round(q * len(ordered), 9)) - 1))
+        return ordered[rank]
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "p50": self.percentile(0.50),
+            "p95": self.percentile(0.95),
+            "p99": self.percentile(0.99)
+        }
+
+
+class _SpanScope:
+    __slots__ = ("tracer", "span", "token")
+
+    def __init__(self, tracer: "Tracer", span: Span):
+        self.tracer = tracer
+        self.span = span
+        self.token = None
+
+    def __enter__(self) -> Span:
+        self.token = _CURRENT_SPAN.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        self.span.end_ns = self.tracer.clock_ns()
+        if exc_type is not None:
+            self.span.status = "cancelled" if issubclass(exc_type, asyncio.CancelledError) else "error"
+            self.span.attributes["error"] = str(exc)
+        _CURRENT_SPAN.reset(self.token)
+        self.tracer.spans.append(self.span)
+        return False
+
+
+class _NullScope:
+    __slots__ = ()
+
+    def __enter__(self):
+        return None
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+class Tracer:
+    """체인 실행 계측
+
+    set_tracer(Tracer())로 활성화하면 모든 체인 클래스가 span을 기록하고
+    Agent별 지연 히스토그램(p50/p95/p99)을 유지한다. 비활성(기본) 상태에서는
+    NULL_TRACER의 no-op span만 사용되므로 오버헤드가 거의 없다.
+    """
+
+    enabled = True
+
+    def __init__(
+        self,
+        max_spans: int = 100000,
+        buckets: Tuple[float, ...] = DEFAULT_LATENCY_BUCKETS,
+        clock_ns: Callable[[], int] = time.perf_counter_ns
+    ):
+        self.spans = deque(maxlen=max_spans)
+        self.buckets = buckets
+        self.clock_ns = clock_ns
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        # monotonic 시각 → Unix 시각 변환 기준점 (내보내기용)
+        self._wall_anchor_ns = time.time_ns() - clock_ns()
+
+    def span(self, name: str, kind: str = "internal", **attributes) -> _SpanScope:
+        parent = _CURRENT_SPAN.get()
+        span = Span(
+            name=name,
+            kind=kind,
+            trace_id=parent.trace_id if parent else f"{random.getrandbits(128):032x}",
+            span_id=f"{random.getrandbits(64):016x}",
+            parent_id=parent.span_id if parent else None,
+            start_ns=self.clock_ns(),
+            attributes=attributes
+        )
+        return _SpanScope(self, span)
+
+    def record_latency(self, agent_name: str, seconds: float):
+        histogram = self.histograms.get(agent_name)
+        if histogram is None:
+            histogram = self.histograms[agent_name] = LatencyHistogram(self.buckets)
+        histogram.record(seconds)
+
+    def latency_summary(self) -> Dict[str, Dict[str, float]]:
+        return {name: h.summary() for name, h in sorted(self.histograms.items())}
+
+    def export_prometheus(self, path: str):
+        """Prometheus text exposition format으로 저장"""
+        lines = [
+            "# HELP agent_call_duration_seconds Agent 호출 wall time",
+            "# TYPE agent_call_duration_seconds histogram"
+        ]
+        for name, h in sorted(self.histograms.items()):
+            label = _prometheus_label(name)
+            cumulative = 0
+            for upper, count in zip(h.buckets, h.bucket_counts):
+                cumulative += count
+                lines.append(f'agent_call_duration_seconds_bucket{{agent="{label}",le="{upper}"}} {cumulative}')
+            lines.append(f'agent_call_duration_seconds_bucket{{agent="{label}",le="+Inf"}} {h.count}')
+            lines.append(f'agent_call_duration_seconds_sum{{agent="{label}"}} {h.total}')
+            lines.append(f'agent_call_duration_seconds_count{{agent="{label}"}} {h.count}')
+
+        lines += [
+            "# HELP agent_call_latency_seconds Agent 호출 지연 백분위",
+            "# TYPE agent_call_latency_seconds summary"
+        ]
+        for name, h in sorted(self.histograms.items()):
+            label = _prometheus_label(name)
+            for q in (0.5, 0.95, 0.99):
+                lines.append(f'agent_call_latency_seconds{{agent="{label}",quantile="{q}"}} {h.percentile(q)}')
+            lines.append(f'agent_call_latency_seconds_sum{{agent="{label}"}} {h.total}')
+            lines.append(f'agent_call_latency_seconds_count{{agent="{label}"}} {h.count}')
+
+        Path(path).write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+    def export_spans(self, path: str):
+        """OpenTelemetry(OTLP JSON) 호환 span을 JSON Lines로 저장
+
+        모든 span은 프로세스 내부 구간이므로 kind는 SPAN_KIND_INTERNAL이고,
+        chain/stage/attempt 구분은 "chain.span_role" 속성으로 내보낸다.
+        """
+        with open(path, "w", encoding="utf-8") as f:
+            for span in self.spans:
+                record = {
+                    "traceId": span.trace_id,
+                    "spanId": span.span_id,
+                    "parentSpanId": span.parent_id or "",
+                    "name": span.name,
+                    "kind": "SPAN_KIND_INTERNAL",
+                    "startTimeUnixNano": self._wall_anchor_ns + span.start_ns,
+                    "endTimeUnixNano": self._wall_anchor_ns + span.end_ns,
+                    "status": {"code": "STATUS_CODE_ERROR" if span.status != "ok" else "STATUS_CODE_OK"},
+                    "attributes": [
+                        {"key": key, "value": {"stringValue": str(value)}}
+                        for key, value in {"chain.span_role": span.kind, **span.attributes}.items()
+                    ]
+                }
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def _prometheus_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class _NullTracer:
+    enabled = False
+    _scope = _NullScope()
+
+    def span(self, name: str, kind: str = "internal", **attributes) -> _NullScope:
+        return self._scope
+
+    def record_latency(self, agent_name: str, seconds: float):
+        pass
+
+
+NULL_TRACER = _NullTracer()
+_CURRENT_SPAN: "contextvars.ContextVar[Optional[Span]]" = contextvars.ContextVar("current_span", default=None)
+_active_tracer: Any = NULL_TRACER
+
+
+def set_tracer(tracer: Optional[Tracer]) -> Any:
+    """프로세스 전역 Tracer 설정 (None이면 비활성). 이전 Tracer를 반환"""
+    global _active_tracer
+    previous = _active_tracer
+    _active_tracer = tracer if tracer is not None else NULL_TRACER
+    return previous
+
+
+def get_tracer() -> Any:
+    return _active_tracer
+
+
+def traced_chain(execute_async: Callable) -> Callable:
+    """체인 execute_async를 chain span으로 감싸는 데코레이터"""
+    @functools.wraps(execute_async)
+    async def wrapper(self, *args, **kwargs):
+        tracer = _active_tracer
+        if not tracer.enabled:
+            return await execute_async(self, *args, **kwargs)
+        with tracer.span(type(self).__name__, kind="chain"):
+            return await execute_async(self, *args, **kwargs)
+    return wrapper
+
+
+# ============================================================
+# 컨텍스트: 불변 계층 컨텍스트 (LayeredContext)
+# ============================================================
+
+class LayeredContext(Mapping):
+    """단계별 frame을 쌓는 불변 chain-map 컨텍스트
+
+    with_frame()은 기존 frame을 공유하는 새 컨텍스트를 만들기 때문에
+    재시도/분기용 스냅샷에 복사가 필요 없다. 조회는 최신 frame부터 찾되,
+    깊이가 CHECKPOINT_EVERY의 배수인 frame은 그때까지의 병합 결과를 처음 조회될 때
+    한 번 만들어 두므로 조회/포함 검사는 최대 CHECKPOINT_EVERY개 frame만 거친다.
+    병합 결과는 CHECKPOINT_EVERY단계마다 하나뿐이라 스냅샷 메모리는 frame 공유 수준을 유지한다.
+
+    drop()은 더 이상 읽히지 않는 키를 뺀 컨텍스트를 만든다. 해당 키가 있는 frame만
+    항목을 다시 만들고, 그 뒤 frame은 노드만 새로 만들어 항목 dict를 그대로 공유한다.
+    이전 스냅샷을 아무도 참조하지 않으면 제거된 값의 메모리가 해제된다.
+
+    Mapping이므로 기존 Agent의 context.get(...) 사용은 그대로 동작한다.
+    """
+
+    CHECKPOINT_EVERY = 32
+
+    __slots__ = ("_name", "_entries", "_parent", "_depth", "_len", "_flat")
+
+    def __init__(
+        self,
+        entries: Optional[Dict[str, Any]] = None,
+        name: str = "root",
+        parent: Optional["LayeredContext"] = None
+    ):
+        self._init(name, dict(entries or {}), parent)
+
+    def _init(self, name: str, entries: Dict[str, Any], parent: Optional["LayeredContext"]):
+        self._name = name
+        self._entries = entries
+        self._parent = parent
+        self._depth = parent._depth + 1 if parent is not None else 0
+        self._len: Optional[int] = None
+        # 체크포인트 frame의 병합 결과 (root는 자기 항목 그대로)
+        self._flat: Optional[Dict[str, Any]] = entries if parent is None else None
+
+    @classmethod
+    def _node(cls, name: str, entries: Dict[str, Any], parent: Optional["LayeredContext"]) -> "LayeredContext":
+        """항목 dict를 복사하지 않고 공유하는 frame (내부용, entries는 이후 변경 금지)"""
+        node = cls.__new__(cls)
+        node._init(name, entries, parent)
+        return node
+
+    def with_frame(self, name: str, entries: Dict[str, Any]) -> "LayeredContext":
+        return LayeredContext(entries, name=name, parent=self)
+
+    def _checkpoint(self) -> Tuple[List["LayeredContext"], Dict[str, Any]]:
+        """(가장 가까운 체크포인트 이후 frame들 - 최신순, 체크포인트 병합 결과)"""
+        recent = []
+        layer = self
+        while layer._depth % self.CHECKPOINT_EVERY:
+            recent.append(layer)
+            layer = layer._parent
+        if layer._flat is None:
+            layer._build_flat()
+        return recent, layer._flat
+
+    def _build_flat(self):
+        # 아직 만들지 않은 이전 체크포인트까지 거슬러 올라간 뒤 오래된 것부터 병합 (재귀 없이)
+        pending = []
+        layer = self
+        while layer._flat is None:
+            pending.append(layer)
+            for _ in range(self.CHECKPOINT_EVERY):
+                layer = layer._parent
+        flat = layer._flat
+        for checkpoint in reversed(pending):
+            frames = []
+            layer = checkpoint
+            for _ in range(self.CHECKPOINT_EVERY):
+                frames.append(layer._entries)
+                layer = layer._parent
+            merged = dict(flat)
+            for entries in reversed(frames):
+                merged.update(entries)
+            checkpoint._flat = flat = merged
+
+    def __getitem__(self, key: str) -> Any:
+        recent, flat = self._checkpoint()
+        for layer in recent:
+            if key in layer._entries:
+                return layer._entries[key]
+        return flat[key]
+
+    def __contains__(self, key: object) -> bool:
+        recent, flat = self._checkpoint()
+        return key in flat or any(key in layer._entries for layer in recent)
+
+    def __iter__(self):
+        # 삽입 순서(오래된 frame 우선) 유지, 덮어쓴 키는 한 번만
+        recent, flat = self._checkpoint()
+        yield from flat
+        seen = set()
+        for layer in reversed(recent):
+            for key in layer._entries:
+                if key not in flat and key not in seen:
+                    seen.add(key)
+                    yield key
+
+    def __len__(self) -> int:
+        if self._len is None:  # 불변이므로 한 번만 계산
+            self._len = sum(1 for _ in self)
+        return self._len
+
+    def __repr__(self) -> str:
+        return f"LayeredContext(frames={self._depth + 1}, keys={list(self)})"
+
+    @property
+    def depth(self) -> int:
+        return self._depth
+
+    def frames(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """(frame 이름, 읽기 전용 항목) 목록, 오래된 frame부터"""
+        layers = []
+        layer = self
+        while layer is not None:
+            layers.append((layer._name, MappingProxyType(layer._entries)))
+            layer = layer._parent
+        return layers[::-1]
+
+    def to_dict(self) -> Dict[str, Any]:
+        recent, flat = self._checkpoint()
+        merged = dict(flat)
+        for layer in reversed(recent):
+            merged.update(layer._entries)
+        return merged
+
+    def drop(self, keys: Iterable[str]) -> "LayeredContext":
+        """keys를 제거한 컨텍스트 (해당 키가 있는 frame만 항목을 다시 만들고 나머지는 공유)"""
+        keys = set(keys)
+        layers = []
+        layer = self
+        while layer is not None:
+            layers.append(layer)
+            layer = layer._parent
+
+        rebuilt = None
+        changed = False
+        for layer in reversed(layers):
+            if not changed and not keys.intersection(layer._entries):
+                rebuilt = layer  # 변경 지점 이전 frame은 그대로 공유
+                continue
+            changed = True
+            entries = layer._entries
+            if keys.intersection(entries):
+                entries = {k: v for k, v in entries.items() if k not in keys}
+            rebuilt = LayeredContext._node(layer._name, entries, rebuilt)
+        return rebuilt
+
+
 # ============================================================
 # 1. Prompt Chaining (가이드 Section 5.1)
 # ============================================================
@@ -51,21 +702,51 @@ class MockAgent:
 class PromptChain:
     """순차 Agent 체인"""
 
-    def __init__(self, agents: List[MockAgent]):
+    def __init__(
+        self,
+        agents: List[MockAgent],
+        context_budget: Optional["ContextBudget"] = None,
+        checkpoint: Optional["ChainCheckpointStore"] = None
+    ):
         self.agents = agents
+        self.context_budget = context_budget
+        self.checkpoint = checkpoint
 
-    def execute(self, initial_prompt: str) -> Dict[str, Any]:
-        context = {"user_input": initial_prompt}
+    def execute(self, initial_prompt: str, run_id: Optional[str] = None) -> Dict[str, Any]:
+        return asyncio.run(self.execute_async(initial_prompt, run_id))
+
+    @traced_chain
+    async def execute_async(self, initial_prompt: str, run_id: Optional[str] = None) -> Dict[str, Any]:
+        """run_id와 checkpoint가 주어지면 완료된 단계는 저장된 출력으로 건너뜀"""
+        context = LayeredContext({"user_input": initial_prompt})
+        budget_run = self.context_budget.new_run() if self.context_budget else None
+        run = self.checkpoint.open_run(run_id, initial_prompt) if self.checkpoint and run_id else None
         results = []
 
-        for agent in self.agents:
-            # 이전 출력을 다음 입력으로
-            result = agent.execute(context)
-            context[f"{agent.name}_output"] = result.output
-            results.append(result)
+        try:
+            for index, agent in enumerate(self.agents):
+                if run is not None and run.is_done(index, agent.name):
+                    result = run.resumed_result(index)
+                else:
+                    # 이전 출력을 다음 입력으로 (단계마다 frame 추가, 복사 없음)
+                    agent_context = budget_run.prepare(agent, context) if budget_run else context
+                    with get_tracer().span(agent.name, kind="stage"):
+                        result = await execute_agent_async(agent, agent_context)
+                    if run is not None:
+                        run.record(index, agent.name, result.output)
+                context = context.with_frame(agent.name, {f"{agent.name}_output": result.output})
+                results.append(result)
+        finally:
+            if run is not None:
+                run.close()
 
-        context["chain_results"] = results
-        return context
+        final = context.to_dict()
+        final["chain_results"] = results
+        if budget_run:
+            final["context_budget"] = budget_run.report()
+        if run is not None:
+            final["resumed_stages"] = run.resumed
+        return final
 
 
 # ============================================================
@@ -73,82 +754,414 @@ class PromptChain:
 # ============================================================
 
 class ConditionalChain:
-    """조건부 분기 체인"""
+    """조건부 분기 체인
+
+    speculative 모드 (기본 "off"):
+      - "always": 검증과 동시에 고품질 분기를 미리 실행
+      - "auto": 분기 선택 이력(EWMA)으로 고품질 확률이 speculation_threshold
+        이상일 때만 미리 실행
+    저품질 분기는 검증 결과(issues)를 입력으로 받으므로 미리 실행할 수 없다.
+    추측이 빗나가면 미리 실행한 호출을 취소하고 낭비 호출로 집계한다.
+    """
+
+    SPECULATIVE_MODES = ("off", "auto", "always")
 
     def __init__(
         self,
         initial_agent: MockAgent,
         validator: callable,
         high_quality_agent: MockAgent,
-        low_quality_agent: MockAgent
+        low_quality_agent: MockAgent,
+        speculative: str = "off",
+        speculation_threshold: float = 0.6,
+        learning_rate: float = 0.3
     ):
+        if speculative not in self.SPECULATIVE_MODES:
+            raise ValueError(f"지원하지 않는 모드: {speculative} (가능: {self.SPECULATIVE_MODES})")
         self.initial_agent = initial_agent
         self.validator = validator
         self.high_quality_agent = high_quality_agent
         self.low_quality_agent = low_quality_agent
+        self.speculative = speculative
+        self.speculation_threshold = speculation_threshold
+        self.learning_rate = learning_rate
+        self.high_probability = 0.5  # 사전 확률
+        self.speculation = Counter()
+        self.latency_saved = 0.0
 
     def execute(self, task: str) -> Dict[str, Any]:
+        return asyncio.run(self.execute_async(task))
+
+    @traced_chain
+    async def execute_async(self, task: str) -> Dict[str, Any]:
+        tracer = get_tracer()
+        base = LayeredContext({"user_input": task})
+
         # 1단계: 초안 생성
-        draft = self.initial_agent.execute({"user_input": task})
+        with tracer.span("draft", kind="stage"):
+            draft = await execute_agent_async(self.initial_agent, base)
 
-        # 2단계: 검증
-        validation = self.validator(draft.output)
+        high_context = base.with_frame("high_quality", {"user_input": draft.output})
+        speculate = self._should_speculate()
+        speculative_task = None
+        if speculate:
+            speculative_task = asyncio.create_task(self._run_high_quality(high_context, speculative=True))
 
-        # 3단계: 조건부 분기
-        if validation["score"] >= 0.8:
+        speculation = {"speculated": speculate, "hit": False, "latency_saved": 0.0}
+        try:
+            # 2단계: 검증 (async validator 허용, 추측 실행 중이면 sync validator는 스레드로)
+            with tracer.span("validation", kind="stage"):
+                if speculate and not inspect.iscoroutinefunction(self.validator):
+                    validation = await asyncio.to_thread(self.validator, draft.output)
+                else:
+                    validation = self.validator(draft.output)
+                if inspect.isawaitable(validation):
+                    validation = await validation
+            validated_at = time.perf_counter()
+
+            # 3단계: 조건부 분기
+            high_quality = validation["score"] >= 0.8
+            self._learn(high_quality)
+
+            if high_quality and speculative_task is not None:
+                hit_task, speculative_task = speculative_task, None  # 적중 - 결과/예외를 그대로 사용
+                final, started_at, finished_at = await hit_task
+                # 검증과 겹친 구간만큼 절감
+                saved = max(0.0, min(validated_at, finished_at) - started_at)
+                speculation.update(hit=True, latency_saved=saved)
+                self.speculation["hits"] += 1
+                self.latency_saved += saved
+        finally:
+            # 빗나갔거나 검증이 실패한 추측은 취소하고, 그 결과/예외는 낭비 호출로만 집계
+            if speculative_task is not None:
+                speculative_task.cancel()
+                await asyncio.gather(speculative_task, return_exceptions=True)
+                self.speculation["wasted_calls"] += 1
+
+        if high_quality:
             # 고품질 → 바로 개선
-            final = self.high_quality_agent.execute({"user_input": draft.output})
+            if not speculation["hit"]:
+                final, _, _ = await self._run_high_quality(high_context)
             branch_taken = "high_quality"
         else:
-            # 저품질 → 피드백 포함 재생성
-            context = {
-                "user_input": task,
-                "feedback": validation["issues"]
-            }
-            final = self.low_quality_agent.execute(context)
+            # 저품질 → 피드백 포함 재생성 (초안 컨텍스트를 공유하는 분기 frame)
+            context = base.with_frame("low_quality_retry", {"feedback": validation["issues"]})
+            with tracer.span("low_quality_retry", kind="stage"):
+                final = await execute_agent_async(self.low_quality_agent, context)
             branch_taken = "low_quality_retry"
 
         return {
             "draft": draft,
             "validation": validation,
             "final": final,
-            "branch_taken": branch_taken
+            "branch_taken": branch_taken,
+            "speculation": speculation
         }
 
+    def speculation_stats(self) -> Dict[str, Any]:
+        return {
+            "runs": self.speculation["runs"],
+            "speculated": self.speculation["speculated"],
+            "hits": self.speculation["hits"],
+            "wasted_calls": self.speculation["wasted_calls"],
+            "latency_saved": self.latency_saved,
+            "high_probability": self.high_probability
+        }
+
+    async def _run_high_quality(
+        self, context: LayeredContext, speculative: bool = False
+    ) -> Tuple[AgentResult, float, float]:
+        started_at = time.perf_counter()
+        with get_tracer().span("high_quality", kind="stage", speculative=speculative):
+            result = await execute_agent_async(self.high_quality_agent, context)
+        return result, started_at, time.perf_counter()
+
+    def _should_speculate(self) -> bool:
+        self.speculation["runs"] += 1
+        if self.speculative == "always" or (
+            self.speculative == "auto" and self.high_probability >= self.speculation_threshold
+        ):
+            self.speculation["speculated"] += 1
+            return True
+        return False
+
+    def _learn(self, high_quality: bool):
+        self.high_probability += self.learning_rate * (float(high_quality) - self.high_probability)
+
 
 # ============================================================
 # 3. Robust Agent Chain with Error Recovery (가이드 Section 8.1)
 # ============================================================
 
+class ExponentialBackoff:
+    """지수 백오프: base * factor^attempt (max_delay 상한)
+
+    jitter=True면 [0, 지연] 구간에서 균등 추출 (full jitter)하여
+    여러 체인이 동시에 재시도하는 동기화 현상을 막는다.
+    """
+
+    def __init__(
+        self,
+        base: float = 0.1,
+        factor: float = 2.0,
+        max_delay: float = 10.0,
+        jitter: bool = True,
+        rng: Optional[random.Random] = None
+    ):
+        self.base = base
+        self.factor = factor
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.rng = rng or random.Random()
+
+    def next_delay(self, attempt: int, previous_delay: float) -> float:
+        delay = min(self.max_delay, self.base * self.factor ** attempt)
+        return self.rng.uniform(0, delay) if self.jitter else delay
+
+
+class DecorrelatedJitterBackoff:
+    """Decorrelated jitter 백오프: min(max_delay, uniform(base, 이전 지연 * 3))"""
+
+    def __init__(
+        self,
+        base: float = 0.1,
+        max_delay: float = 10.0,
+        rng: Optional[random.Random] = None
+    ):
+        self.base = base
+        self.max_delay = max_delay
+        self.rng = rng or random.Random()
+
+    def next_delay(self, attempt: int, previous_delay: float) -> float:
+        upper = max(self.base, (previous_delay or self.base) * 3)
+        return min(self.max_delay, self.rng.uniform(self.base, upper))
+
+
+class RetryBudget:
+    """프로세스 단위 재시도 예산
+
+    요청마다 ratio만큼 토큰이 적립되고(최대 capacity), 재시도마다 1개를 소비한다.
+    토큰이 없으면 재시도 대신 즉시 실패하여 장애 시 재시도 폭주를 막는다.
+    """
+
+    def __init__(self, capacity: float = 100.0, ratio: float = 0.2):
+        self.capacity = capacity
+        self.ratio = ratio
+        self.tokens = capacity
+        self.exhausted = 0
+        self._lock = threading.Lock()
+
+    def record_request(self):
+        with self._lock:
+            self.tokens = min(self.capacity, self.tokens + self.ratio)
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            self.exhausted += 1
+            return False
+
+
+class CircuitOpenError(RuntimeError):
+    """회로 차단 상태의 Agent 호출 (fail fast)"""
+
+
+class RetryBudgetExhaustedError(RuntimeError):
+    """공유 재시도 예산 소진으로 재시도 없이 실패 (원인 예외는 __cause__)"""
+
+
+class CircuitBreaker:
+    """Agent별 회로 차단기 (closed → open → half_open → closed)
+
+    half_open에서는 시험 호출 1건만 통과시키고, 그 결과가 기록될 때까지 나머지
+    호출은 거부한다. 시험 호출이 결과 없이 사라진 경우(취소 등)에 대비해
+    reset_timeout이 지나면 새 시험 호출을 허용한다.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_started_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            now = self.clock()
+            if self.state == "open":
+                if now - self.opened_at < self.reset_timeout:
+                    return False
+                self.state = "half_open"
+            elif self.probe_started_at is not None and now - self.probe_started_at < self.reset_timeout:
+                return False  # 시험 호출 진행 중
+            # 회복 확인용 시험 호출 1회 허용
+            self.probe_started_at = now
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self.probe_started_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                self.state = "open"
+                self.opened_at = self.clock()
+            self.probe_started_at = None
+
+
+class CircuitBreakerRegistry:
+    """Agent 이름별 CircuitBreaker 저장소 (체인 간 공유)"""
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, agent_name: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(agent_name)
+            if breaker is None:
+                breaker = CircuitBreaker(self.failure_threshold, self.reset_timeout, self.clock)
+                self._breakers[agent_name] = breaker
+            return breaker
+
+
+# 프로세스 내 모든 RobustAgentChain이 기본으로 공유
+GLOBAL_RETRY_BUDGET = RetryBudget()
+GLOBAL_CIRCUIT_BREAKERS = CircuitBreakerRegistry()
+
+
 class RobustAgentChain:
-    """에러 복구 기능이 있는 체인"""
+    """에러 복구 기능이 있는 체인
+
+    재시도 사이에는 backoff 정책만큼 대기하고, 재시도는 공유 RetryBudget에서
+    차감된다. Agent별 CircuitBreaker가 열려 있으면 호출 없이 즉시 실패한다.
+    clock/sleep은 테스트에서 가짜 시계로 교체할 수 있다.
+    """
 
-    def __init__(self, agents: List[MockAgent], max_retries: int = 3):
+    def __init__(
+        self,
+        agents: List[MockAgent],
+        max_retries: int = 3,
+        backoff: Optional[Any] = None,
+        retry_budget: Optional[RetryBudget] = None,
+        circuit_breakers: Optional[CircuitBreakerRegistry] = None,
+        retry_on: Tuple[type, ...] = (ValueError,),
+        sleep: Callable[[float], Any] = asyncio.sleep,
+        context_budget: Optional["ContextBudget"] = None,
+        checkpoint: Optional["ChainCheckpointStore"] = None
+    ):
+        if max_retries < 1:
+            raise ValueError("max_retries는 1 이상이어야 함")
         self.agents = agents
         self.max_retries = max_retries
+        self.backoff = backoff or ExponentialBackoff()
+        self.retry_budget = retry_budget if retry_budget is not None else GLOBAL_RETRY_BUDGET
+        self.circuit_breakers = (
+            circuit_breakers if circuit_breakers is not None else GLOBAL_CIRCUIT_BREAKERS
+        )
+        self.retry_on = retry_on
+        self.sleep = sleep
+        self.context_budget = context_budget
+        self.checkpoint = checkpoint
 
-    def execute(self, task: str) -> Dict[str, Any]:
-        context = {"task": task}
+    def execute(self, task: str, run_id: Optional[str] = None) -> Dict[str, Any]:
+        return asyncio.run(self.execute_async(task, run_id))
+
+    @traced_chain
+    async def execute_async(self, task: str, run_id: Optional[str] = None) -> Dict[str, Any]:
+        context = LayeredContext({"task": task})
+        budget_run = self.context_budget.new_run() if self.context_budget else None
+        run = self.checkpoint.open_run(run_id, task) if self.checkpoint and run_id else None
         errors = []
 
-        for agent in self.agents:
-            for attempt in range(self.max_retries):
-                try:
-                    result = agent.execute(context)
+        try:
+            for index, agent in enumerate(self.agents):
+                if run is not None and run.is_done(index, agent.name):
+                    output = run.resumed_result(index).output
+                    context = context.with_frame(agent.name, {f"{agent.name}_output": output})
+                    continue
+                with get_tracer().span(agent.name, kind="stage"):
+                    context = await self._execute_stage(agent, context, errors, budget_run)
+                if run is not None:
+                    run.record(index, agent.name, context[f"{agent.name}_output"])
+        finally:
+            if run is not None:
+                run.close()
+
+        final = context.to_dict()
+        final["errors_encountered"] = errors
+        if budget_run:
+            final["context_budget"] = budget_run.report()
+        if run is not None:
+            final["resumed_stages"] = run.resumed
+        return final
 
-                    # 간단한 검증 (실제로는 Pydantic)
-                    self._validate(result)
+    async def _execute_stage(
+        self,
+        agent: Any,
+        context: LayeredContext,
+        errors: List[Dict[str, Any]],
+        budget_run: Optional["ContextBudgetRun"] = None
+    ) -> LayeredContext:
+        """한 Agent 단계 실행. 재시도는 단계 시작 스냅샷 위에 피드백 frame만 얹는다"""
+        breaker = self.circuit_breakers.get(agent.name)
+        self.retry_budget.record_request()
+        delay = 0.0
+
+        for attempt in range(self.max_retries):
+            if not breaker.allow_request():
+                raise CircuitOpenError(f"{agent.name} 회로 차단 중 - 호출 생략")
 
-                    context[f"{agent.name}_output"] = result.output
-                    break
-                except ValueError as e:
-                    if attempt == self.max_retries - 1:
-                        raise
-                    context["retry_feedback"] = str(e)
-                    errors.append({"agent": agent.name, "attempt": attempt, "error": str(e)})
+            try:
+                agent_context = budget_run.prepare(agent, context) if budget_run else context
+                result = await execute_agent_async(agent, agent_context, attempt=attempt)
 
-        context["errors_encountered"] = errors
-        return context
+                # 간단한 검증 (실제로는 Pydantic)
+                self._validate(result)
+            except self.retry_on as e:
+                breaker.record_failure()
+                if attempt == self.max_retries - 1:
+                    raise
+                if not self.retry_budget.try_acquire():
+                    errors.append({"agent": agent.name, "attempt": attempt, "error": "retry budget exhausted"})
+                    raise RetryBudgetExhaustedError(
+                        f"{agent.name} 재시도 예산 소진 (attempt {attempt}): {e}"
+                    ) from e
+                delay = self.backoff.next_delay(attempt, delay)
+                context = context.with_frame(f"{agent.name}_retry", {"retry_feedback": str(e)})
+                errors.append({"agent": agent.name, "attempt": attempt, "error": str(e), "backoff": delay})
+                await self.sleep(delay)
+                continue
+            except Exception:
+                breaker.record_failure()
+                raise
+
+            breaker.record_success()
+            return context.with_frame(agent.name, {f"{agent.name}_output": result.output})
 
     def _validate(self, result: AgentResult):
         """검증 (Mock)"""
@@ -168,11 +1181,17 @@ class MetaPromptingChain:
         self.reviewer = reviewer_agent
 
     def execute(self, task: str) -> Dict[str, Any]:
+        return asyncio.run(self.execute_async(task))
+
+    @traced_chain
+    async def execute_async(self, task: str) -> Dict[str, Any]:
         # 1단계: Designer가 작업 수행
-        design = self.designer.execute({"user_input": task})
+        base = LayeredContext({"user_input": task})
+        with get_tracer().span("design", kind="stage"):
+            design = await execute_agent_async(self.designer, base)
 
-        # 2단계: Reviewer가 메타 검증 수행
-        meta_context = {
+        # 2단계: Reviewer가 메타 검증 수행 (설계 출력은 참조로만 얹음)
+        meta_context = base.with_frame("review", {
             "user_input": design.output,
             "original_task": task,
             "meta_questions": [
@@ -180,9 +1199,10 @@ class MetaPromptingChain:
                 "설계 의도가 명확히 전달되는가?",
                 "개선 과정에서 핵심 의도가 손상되지 않았는가?"
             ]
-        }
+        })
 
-        review = self.reviewer.execute(meta_context)
+        with get_tracer().span("review", kind="stage"):
+            review = await execute_agent_async(self.reviewer, meta_context)
 
         # 3단계: 메타 검증 결과 확인
         meta_validation_passed = self._check_meta_validation(review.output)
@@ -202,156 +1222,3208 @@ class MetaPromptingChain:
 
 
 # ============================================================
-# 테스트 케이스
+# 5. DAG Chain - 독립 Agent 병렬 실행 (가이드 Section 5.3)
 # ============================================================
 
-def test_prompt_chain():
-    """✅ 순차 체인 테스트"""
-    print("\n=== 테스트 1: Prompt Chain ===")
+@dataclass
+class AgentStage:
+    """DAG 체인의 단계 선언 (읽는 컨텍스트 키 / 쓰는 컨텍스트 키)"""
+    agent: Any
+    inputs: List[str] = field(default_factory=list)
+    output_key: Optional[str] = None
 
-    agents = [
-        MockAgent("GameDesigner", delay=0.05),
-        MockAgent("Validator", delay=0.02),
-        MockAgent("UXDesigner", delay=0.05)
-    ]
+    def __post_init__(self):
+        if self.output_key is None:
+            self.output_key = f"{self.agent.name}_output"
 
-    chain = PromptChain(agents)
-    result = chain.execute("중세 왕국 배신 이벤트")
 
-    print(f"✅ 체인 실행 성공")
-    print(f"   실행된 Agent 수: {len(result['chain_results'])}")
-    print(f"   최종 컨텍스트 키: {list(result.keys())}")
+class DAGChain:
+    """의존성 그래프 기반 체인
 
-    # 검증: 각 Agent 출력이 컨텍스트에 포함되어야 함
-    for agent in agents:
-        assert f"{agent.name}_output" in result, f"{agent.name} 출력 누락"
+    각 단계가 선언한 inputs/output_key로 그래프를 만들고, 서로 의존하지 않는
+    단계는 동시에 실행한다. 동시 실행 수는 max_concurrency로 제한된다.
+    전체 지연은 모든 Agent 지연의 합이 아니라 임계 경로(critical path) 시간이 된다.
+    """
 
-    return True
+    INITIAL_KEYS = ("user_input",)
 
+    def __init__(
+        self,
+        stages: List[AgentStage],
+        max_concurrency: int = 4,
+        retain_intermediate: bool = True
+    ):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency는 1 이상이어야 함")
+        self.stages = stages
+        self.max_concurrency = max_concurrency
+        # False면 모든 소비 단계가 끝난 중간 출력을 컨텍스트에서 제거 (메모리 해제)
+        self.retain_intermediate = retain_intermediate
+        self.dependencies = self._build_graph(stages)
 
-def test_conditional_chain():
-    """✅ 조건부 분기 테스트"""
-    print("\n=== 테스트 2: Conditional Chain ===")
+    @classmethod
+    def _build_graph(cls, stages: List[AgentStage]) -> Dict[str, List[str]]:
+        producers = {}
+        for stage in stages:
+            if stage.output_key in producers or stage.output_key in cls.INITIAL_KEYS:
+                raise ValueError(f"출력 키 중복: {stage.output_key}")
+            producers[stage.output_key] = stage
 
-    def mock_validator(output: Dict) -> Dict:
-        """Mock 검증 함수"""
-        # 짝수 초에는 고품질, 홀수 초에는 저품질
-        score = 0.9 if int(time.time()) % 2 == 0 else 0.5
-        return {
-            "score": score,
-            "issues": [] if score >= 0.8 else ["품질 미달"]
-        }
+        dependencies = {}
+        for stage in stages:
+            missing = [
+                key for key in stage.inputs
+                if key not in producers and key not in cls.INITIAL_KEYS
+            ]
+            if missing:
+                raise ValueError(f"{stage.agent.name}: 생성되지 않는 입력 키 {missing}")
+            dependencies[stage.output_key] = [key for key in stage.inputs if key in producers]
 
-    chain = ConditionalChain(
+        # 순환 의존성 검사 (Kahn 알고리즘)
+        remaining = {key: set(deps) for key, deps in dependencies.items()}
+        while remaining:
+            ready = [key for key, deps in remaining.items() if not deps]
+            if not ready:
+                raise ValueError(f"순환 의존성 발견: {sorted(remaining)}")
+            for key in ready:
+                del remaining[key]
+            for deps in remaining.values():
+                deps.difference_update(ready)
+
+        return dependencies
+
+    def execute(self, initial_prompt: str) -> Dict[str, Any]:
+        return asyncio.run(self.execute_async(initial_prompt))
+
+    @traced_chain
+    async def execute_async(self, initial_prompt: str) -> Dict[str, Any]:
+        context = LayeredContext({"user_input": initial_prompt})
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        tasks = {}
+        readers = {stage.output_key: 0 for stage in self.stages}
+        for stage in self.stages:
+            for key in self.dependencies[stage.output_key]:
+                readers[key] += 1
+
+        async def run_stage(stage: AgentStage) -> AgentResult:
+            nonlocal context
+
+            # 선행 단계 완료 대기
+            upstream = [tasks[key] for key in self.dependencies[stage.output_key]]
+            if upstream:
+                await asyncio.gather(*upstream)
+
+            # 선언한 키만 전달하여 단계 간 독립성 보장 (값은 참조만)
+            stage_context = LayeredContext(
+                {key: context[key] for key in self.INITIAL_KEYS + tuple(stage.inputs)},
+                name=stage.agent.name
+            )
+
+            async with semaphore:
+                with get_tracer().span(stage.agent.name, kind="stage"):
+                    result = await execute_agent_async(stage.agent, stage_context)
+            context = context.with_frame(stage.agent.name, {stage.output_key: result.output})
+
+            if not self.retain_intermediate:
+                consumed = []
+                for key in self.dependencies[stage.output_key]:
+                    readers[key] -= 1
+                    if readers[key] == 0:
+                        consumed.append(key)
+                if consumed:
+                    context = context.drop(consumed)
+            return result
+
+        # 의존 대상 task가 먼저 존재하도록 선언 순서가 아닌 위상 순서로 생성
+        pending = list(self.stages)
+        while pending:
+            for stage in list(pending):
+                if all(key in tasks for key in self.dependencies[stage.output_key]):
+                    tasks[stage.output_key] = asyncio.create_task(run_stage(stage))
+                    pending.remove(stage)
+
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            # 남은 단계 취소 후 종료까지 대기 (대기 중 task / 회수되지 않은 예외 방지)
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+
+        final = context.to_dict()
+        final["chain_results"] = [tasks[stage.output_key].result() for stage in self.stages]
+        return final
+
+
+# ============================================================
+# 6. Parallel Agent Ensemble (가이드 Section 5.3)
+# ============================================================
+
+class ParallelAgentEnsemble:
+    """병렬 Agent 앙상블
+
+    동일 입력을 여러 Agent에 동시에 보내고 scorer(output) -> float로 채점한다.
+    scorer는 QualityMetrics.overall_score 등을 감싼 함수를 주입한다.
+
+    - "best_of_all": 모든 결과를 기다린 뒤 최고 점수 선택
+    - "first_over_threshold": threshold 이상인 첫 결과를 채택하고
+      나머지 진행 중인 Agent 호출은 취소 (꼬리 지연/API 비용 절감)
+    """
+
+    MODES = ("best_of_all", "first_over_threshold")
+
+    def __init__(
+        self,
+        agents: List[Any],
+        scorer: Callable[[Any], float],
+        mode: str = "best_of_all",
+        threshold: float = 0.7
+    ):
+        if mode not in self.MODES:
+            raise ValueError(f"지원하지 않는 모드: {mode} (가능: {self.MODES})")
+        if not agents:
+            raise ValueError("앙상블에는 Agent가 1개 이상 필요함")
+        self.agents = agents
+        self.scorer = scorer
+        self.mode = mode
+        self.threshold = threshold
+
+    def execute(self, prompt: str) -> Dict[str, Any]:
+        return asyncio.run(self.execute_async(prompt))
+
+    @traced_chain
+    async def execute_async(self, prompt: str) -> Dict[str, Any]:
+        context = {"user_input": prompt}
+        pending = {
+            asyncio.create_task(execute_agent_async(agent, dict(context))): agent
+            for agent in self.agents
+        }
+        scored = []
+        errors = []
+        selected = None
+
+        try:
+            while pending and selected is None:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    agent = pending.pop(task)
+                    try:
+                        result = task.result()
+                        score = self.scorer(result.output)
+                        if inspect.isawaitable(score):
+                            score = await score
+                    except Exception as e:
+                        errors.append({"agent": agent.name, "error": str(e)})
+                        continue
+
+                    scored.append((result, score))
+                    if self.mode == "first_over_threshold" and score >= self.threshold:
+                        selected = (result, score)
+                        break
+        finally:
+            # 채택 완료 또는 예외 시 남은 호출 취소
+            # (같은 wait에서 이미 끝난 호출은 취소되지 않으므로 task 상태로 분류)
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+            cancelled = [agent.name for task, agent in pending.items() if task.cancelled()]
+
+        if not scored:
+            raise RuntimeError(f"앙상블의 모든 Agent 실패: {errors}")
+
+        if selected is not None:
+            reason = f"first score over threshold {self.threshold}"
+        else:
+            selected = max(scored, key=lambda item: item[1])
+            reason = "highest quality score"
+
+        return {
+            "selected": selected[0],
+            "score": selected[1],
+            "alternatives": scored,
+            "selection_reason": reason,
+            "cancelled": cancelled,
+            "errors": errors
+        }
+
+
+# ============================================================
+# 7. Agent 결과 캐싱 (가이드 Section 8.4 - Skill Caching / IS_CHANGED)
+# ============================================================
+
+def _canonical_default(value: Any) -> Any:
+    """JSON 직렬화 불가 타입의 정규화
+
+    프로세스와 무관하게 같은 값이 나와야 하므로 repr(메모리 주소 포함 가능)로
+    대체하지 않는다. 그 밖의 타입은 __cache_key__(값 또는 메서드)를 정의해야 한다.
+    """
+    if isinstance(value, Mapping):
+        return dict(value)
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return dataclasses.asdict(value)
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=lambda item: json.dumps(item, sort_keys=True, default=_canonical_default))
+    cache_key = getattr(value, "__cache_key__", None)
+    if cache_key is not None:
+        return cache_key() if callable(cache_key) else cache_key
+    raise TypeError(f"{type(value).__name__}: 캐시 키로 정규화할 수 없음 (__cache_key__ 정의 필요)")
+
+
+def _lenient_default(value: Any) -> Any:
+    """크기 추정용 - 정규화할 수 없는 값은 repr로 대체"""
+    try:
+        return _canonical_default(value)
+    except TypeError:
+        return repr(value)
+
+
+def context_fingerprint(agent_name: str, version: str, context: Dict[str, Any]) -> str:
+    """컨텍스트 내용 기반 캐시 키 (IS_CHANGED와 동일 개념)
+
+    키 순서와 무관하게 같은 내용이면 같은 해시가 나오도록 정규화한다.
+    """
+    if isinstance(context, LayeredContext):
+        context = context.to_dict()  # 체크포인트 병합 결과 + 최근 frame만 병합
+    elif not isinstance(context, dict):
+        context = dict(context)
+    canonical = json.dumps(
+        context, sort_keys=True, ensure_ascii=False,
+        separators=(",", ":"), default=_canonical_default
+    )
+    payload = f"{agent_name}\0{version}\0{canonical}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CachedAgent:
+    """임의의 Agent를 감싸는 내용 주소 기반 결과 캐시
+
+    메모리 LRU + TTL로 동작하며, cache_dir를 지정하면 디스크에도 저장하여
+    프로세스 재시작 후에도 재사용한다. Agent 버전이 바뀌면 키가 달라지므로
+    이전 결과는 자연스럽게 무효화된다.
+
+    디스크 파일의 mtime은 저장 시각으로 맞추며, 생성 시와 저장
+    prune_every회마다 prune_disk()가 만료 파일을 지우고 max_disk_entries를 넘는
+    오래된 파일을 정리한다. 통계의 expirations는 TTL 만료, evictions는
+    메모리 LRU 용량 초과로 밀려난 항목 수다.
+    """
+
+    def __init__(
+        self,
+        agent: Any,
+        max_entries: int = 1024,
+        ttl: Optional[float] = 3600.0,
+        version: Optional[str] = None,
+        cache_dir: Optional[str] = None,
+        clock: Callable[[], float] = time.time,
+        max_disk_entries: int = 4096,
+        prune_every: int = 256
+    ):
+        self.agent = agent
+        self.name = agent.name
+        self.version = version if version is not None else str(getattr(agent, "version", "0"))
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.clock = clock
+        self.max_disk_entries = max_disk_entries
+        self.prune_every = prune_every
+        self._entries: "OrderedDict[str, Tuple[float, AgentResult]]" = OrderedDict()
+        self._stores_since_prune = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.disk_hits = 0
+        self.disk_pruned = 0
+
+        if self.cache_dir is not None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            self.prune_disk()
+
+    def execute(self, context: Dict[str, Any]) -> AgentResult:
+        key = context_fingerprint(self.name, self.version, context)
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+        result = self.agent.execute(context)
+        self._store(key, result)
+        return result
+
+    async def execute_async(self, context: Dict[str, Any]) -> AgentResult:
+        key = context_fingerprint(self.name, self.version, context)
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+        result = await _call_agent_async(self.agent, context)
+        self._store(key, result)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "disk_hits": self.disk_hits,
+            "disk_pruned": self.disk_pruned,
+            "entries": len(self._entries),
+            "hit_rate": self.hits / total if total else 0.0
+        }
+
+    def clear(self):
+        self._entries.clear()
+
+    def _lookup(self, key: str) -> Optional[AgentResult]:
+        entry = self._entries.get(key)
+        from_disk = False
+        if entry is None and self.cache_dir is not None:
+            entry = self._load_from_disk(key)
+            from_disk = entry is not None
+
+        if entry is not None and self._expired(entry):
+            # TTL 만료 - 메모리/디스크 모두 제거 (LRU에 다시 올리지 않음)
+            self._entries.pop(key, None)
+            self._unlink(key)
+            self.expirations += 1
+            entry = None
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        if from_disk:
+            self.disk_hits += 1
+            self._remember(key, entry)
+        self._entries.move_to_end(key)
+        self.hits += 1
+        result = entry[1]
+        # 캐시된 출력은 공유하지 않음 (호출자가 수정해도 캐시는 그대로)
+        return dataclasses.replace(
+            result, output=copy.deepcopy(result.output), metadata={**result.metadata, "cache_hit": True}
+        )
+
+    def _expired(self, entry: Tuple[float, AgentResult]) -> bool:
+        return self.ttl is not None and self.clock() - entry[0] > self.ttl
+
+    def _store(self, key: str, result: AgentResult):
+        entry = (self.clock(), dataclasses.replace(
+            result, output=copy.deepcopy(result.output), metadata=dict(result.metadata)
+        ))
+        self._remember(key, entry)
+        if self.cache_dir is not None:
+            # 기록자마다 고유한 임시 파일에 쓴 뒤 교체 (부분 기록 / 동시 기록 경합 방지)
+            path = self.cache_dir / f"{key}.pkl"
+            with tempfile.NamedTemporaryFile(dir=self.cache_dir, suffix=".tmp", delete=False) as f:
+                tmp_path = f.name
+                try:
+                    pickle.dump(entry, f)
+                except BaseException:
+                    f.close()
+                    os.unlink(tmp_path)
+                    raise
+            os.utime(tmp_path, (entry[0], entry[0]))  # prune_disk()가 읽지 않고 만료 판정
+            os.replace(tmp_path, path)
+            self._stores_since_prune += 1
+            if self._stores_since_prune >= self.prune_every:
+                self.prune_disk()
+
+    def prune_disk(self) -> int:
+        """만료 파일 삭제 + max_disk_entries 초과분을 오래된 순으로 삭제. 삭제 수 반환"""
+        self._stores_since_prune = 0
+        if self.cache_dir is None:
+            return 0
+        files = []
+        with os.scandir(self.cache_dir) as entries:
+            for entry in entries:
+                if entry.name.endswith(".pkl"):
+                    try:
+                        files.append((entry.stat().st_mtime, entry.path))
+                    except FileNotFoundError:
+                        pass
+        files.sort()
+        now = self.clock()
+        expired = [path for stored_at, path in files if self.ttl is not None and now - stored_at > self.ttl]
+        kept = len(files) - len(expired)
+        excess = [path for _, path in files[len(expired):]][:max(0, kept - self.max_disk_entries)]
+        removed = 0
+        for path in expired + excess:
+            try:
+                os.unlink(path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+        self.disk_pruned += removed
+        return removed
+
+    def _remember(self, key: str, entry: Tuple[float, AgentResult]):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _load_from_disk(self, key: str) -> Optional[Tuple[float, AgentResult]]:
+        # 로컬 캐시 디렉토리는 신뢰할 수 있는 위치로 가정 (pickle)
+        path = self.cache_dir / f"{key}.pkl"
+        try:
+            with open(path, "rb") as f:
+                return pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            return None
+
+    def _unlink(self, key: str):
+        if self.cache_dir is not None:
+            try:
+                (self.cache_dir / f"{key}.pkl").unlink()
+            except FileNotFoundError:
+                pass
+
+
+# ============================================================
+# 8. Token Budget - 점진적 컨텍스트 로딩 (가이드 Section 2.3 / 8.4)
+# ============================================================
+
+def estimate_tokens(value: Any) -> int:
+    """토큰 수 추정 (ASCII 4자당 1토큰, 비ASCII(한글 등) 1자당 1토큰)"""
+    text = value if isinstance(value, str) else json.dumps(
+        value, ensure_ascii=False, default=_lenient_default
+    )
+    ascii_chars = len(text.encode("ascii", "ignore"))
+    return (ascii_chars + 3) // 4 + (len(text) - ascii_chars)
+
+
+_SUMMARY_SUFFIX = " …(요약)"
+
+
+def truncate_summary(key: str, value: Any, max_tokens: int) -> Optional[str]:
+    """기본 요약기: 문자열 표현을 토큰 예산에 맞게 자름 (접미사 포함 max_tokens 이하)"""
+    if max_tokens < 8:
+        return None
+    text = value if isinstance(value, str) else json.dumps(value, ensure_ascii=False, default=str)
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    summary = text
+    while summary and estimate_tokens(summary + _SUMMARY_SUFFIX) > max_tokens:
+        summary = summary[:len(summary) * 3 // 4]
+    return summary + _SUMMARY_SUFFIX if summary else None
+
+
+class ContextBudget:
+    """Agent별 컨텍스트 토큰 예산 관리자
+
+    - Agent가 context_keys를 선언하면 그 키만 전달 (미선언 시 전체 키)
+    - register_resource()로 등록한 리소스는 Agent가 선언했을 때만 지연 로드
+    - 예산(max_tokens) 초과 시 우선순위가 낮은 항목부터 요약(summarizer) 또는 제외
+    - required 키는 예산과 무관하게 항상 포함
+
+    현재 PromptChain과 RobustAgentChain의 단계별 컨텍스트에만 적용된다.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int,
+        priorities: Optional[Dict[str, int]] = None,
+        default_priority: int = 0,
+        required: Tuple[str, ...] = ("user_input", "task"),
+        summarizer: Optional[Callable[[str, Any, int], Any]] = None
+    ):
+        self.max_tokens = max_tokens
+        self.priorities = dict(priorities or {})
+        self.default_priority = default_priority
+        self.required = required
+        self.summarizer = summarizer
+        self._resources: Dict[str, Tuple[Callable[[], Any], Optional[int]]] = {}
+        self._loaded: Dict[str, Any] = {}
+        self.resource_loads = Counter()
+
+    def register_resource(
+        self,
+        key: str,
+        loader: Callable[[], Any],
+        priority: Optional[int] = None,
+        tokens: Optional[int] = None
+    ):
+        """지연 로드 리소스 등록 (tokens를 알면 로드 전에 예산 판단)"""
+        self._resources[key] = (loader, tokens)
+        if priority is not None:
+            self.priorities[key] = priority
+
+    def new_run(self) -> "ContextBudgetRun":
+        return ContextBudgetRun(self)
+
+    def has_resource(self, key: str) -> bool:
+        return key in self._resources
+
+    def resource_hint(self, key: str) -> Optional[int]:
+        """등록 시 알려준 토큰 수 (모르면 None)"""
+        return self._resources[key][1]
+
+    def load_resource(self, key: str) -> Any:
+        """리소스 로드 (budget 인스턴스당 한 번만 loader 호출)"""
+        if key not in self._loaded:
+            self._loaded[key] = self._resources[key][0]()
+            self.resource_loads[key] += 1
+        return self._loaded[key]
+
+
+class ContextBudgetRun:
+    """체인 1회 실행 단위의 예산 적용 및 토큰 절감 집계"""
+
+    def __init__(self, budget: ContextBudget):
+        self.budget = budget
+        self._sizes: Dict[Tuple[str, int], int] = {}
+        self.stages: List[Dict[str, Any]] = []
+
+    def _size(self, key: str, value: Any) -> int:
+        # 같은 값은 실행 중 한 번만 추정
+        cache_key = (key, id(value))
+        size = self._sizes.get(cache_key)
+        if size is None:
+            size = self._sizes[cache_key] = estimate_tokens(value)
+        return size
+
+    def prepare(self, agent: Any, context: Mapping) -> LayeredContext:
+        budget = self.budget
+        declared = getattr(agent, "context_keys", None)
+        keys = list(declared) if declared is not None else list(context)
+        # 기준선: 전체 컨텍스트 + 선언된 리소스를 모두 로드해 전달하는 경우
+        full_tokens = sum(self._size(key, context[key]) for key in context)
+
+        def rank(key: str) -> Tuple[int, int]:
+            required = key in budget.required
+            return (0 if required else 1, -budget.priorities.get(key, budget.default_priority))
+
+        selected: Dict[str, Any] = {}
+        used = 0
+        evicted, summarized, loaded, missing = [], [], [], []
+        for key in sorted(keys, key=rank):
+            if key in context:
+                value = context[key]
+                size = self._size(key, value)
+            elif budget.has_resource(key):
+                hint = budget.resource_hint(key)
+                if hint is not None and used + hint > budget.max_tokens and key not in budget.required:
+                    full_tokens += hint
+                    evicted.append(key)  # 로드하지 않고 제외
+                    continue
+                value = budget.load_resource(key)
+                size = self._size(key, value)
+                full_tokens += size
+                loaded.append(key)
+            else:
+                missing.append(key)  # 선언했지만 컨텍스트에도 리소스에도 없음
+                continue
+
+            if used + size <= budget.max_tokens or key in budget.required:
+                selected[key] = value
+                used += size
+                continue
+
+            summary = None
+            if budget.summarizer is not None:
+                summary = budget.summarizer(key, value, budget.max_tokens - used)
+            if summary is not None and used + estimate_tokens(summary) <= budget.max_tokens:
+                selected[key] = summary
+                used += estimate_tokens(summary)
+                summarized.append(key)
+            else:
+                evicted.append(key)
+
+        # 원래 선언 순서 유지
+        ordered = {key: selected[key] for key in keys if key in selected}
+        self.stages.append({
+            "agent": agent.name,
+            "tokens_full": full_tokens,
+            "tokens_sent": used,
+            "evicted": evicted,
+            "summarized": summarized,
+            "loaded": loaded,
+            "missing": missing
+        })
+        return LayeredContext(ordered, name=f"{agent.name}_budget")
+
+    def report(self) -> Dict[str, Any]:
+        full = sum(stage["tokens_full"] for stage in self.stages)
+        sent = sum(stage["tokens_sent"] for stage in self.stages)
+        return {
+            "tokens_full": full,
+            "tokens_sent": sent,
+            "tokens_saved": max(0, full - sent),
+            "stages": self.stages
+        }
+
+
+# ============================================================
+# 9. Single-flight - 동일 요청 병합
+# ============================================================
+
+class SingleFlightAgent:
+    """진행 중인 동일 호출을 하나의 실행으로 병합하는 Agent 래퍼
+
+    같은 (Agent, 버전, 컨텍스트) 호출이 이미 실행 중이면 새로 실행하지 않고
+    그 결과(또는 예외)를 공유한다. 스레드(execute)와 asyncio(execute_async)
+    양쪽에서 동시에 호출해도 하나의 concurrent.futures.Future로 합쳐진다.
+    완료된 결과는 보관하지 않으므로 캐시가 필요하면 CachedAgent와 조합한다.
+
+    asyncio 대표 호출은 결과를 소유하는 별도 task로 실행되고, 모든 호출자는
+    asyncio.shield로 기다린다. 따라서 어느 호출자(대표 포함)가 취소되어도
+    공유 실행과 다른 호출자는 영향을 받지 않는다.
+    """
+
+    def __init__(self, agent: Any, version: Optional[str] = None):
+        self.agent = agent
+        self.name = agent.name
+        self.version = version if version is not None else str(getattr(agent, "version", "0"))
+        self._lock = threading.Lock()
+        self._in_flight: Dict[str, concurrent.futures.Future] = {}
+        self._tasks: set = set()  # 실행 중인 공유 task 참조 유지 (GC 방지)
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+
+    def execute(self, context: Dict[str, Any]) -> AgentResult:
+        key, future, leader = self._join(context)
+        if not leader:
+            return self._shared(future.result())
+        try:
+            result = self.agent.execute(context)
+        except BaseException as exc:
+            self._finish(key, future, error=exc)
+            raise
+        self._finish(key, future, result=result)
+        return result
+
+    async def execute_async(self, context: Dict[str, Any]) -> AgentResult:
+        key, future, leader = self._join(context)
+        if leader:
+            task = asyncio.ensure_future(self._run_shared(key, future, context))
+            self._tasks.add(task)
+            task.add_done_callback(self._task_done)
+            return await asyncio.shield(task)
+        waiter = asyncio.wrap_future(future)
+        waiter.add_done_callback(_consume_outcome)  # 취소된 호출자의 미회수 예외 경고 방지
+        return self._shared(await asyncio.shield(waiter))
+
+    async def _run_shared(
+        self,
+        key: str,
+        future: concurrent.futures.Future,
+        context: Dict[str, Any]
+    ) -> AgentResult:
+        try:
+            result = await _call_agent_async(self.agent, context)
+        except asyncio.CancelledError:
+            # 공유 실행 자체가 취소된 경우(루프 종료 등)만 대기 중인 호출도 취소
+            self._finish(key, future, cancelled=True)
+            raise
+        except BaseException as exc:
+            self._finish(key, future, error=exc)
+            raise
+        self._finish(key, future, result=result)
+        return result
+
+    def _task_done(self, task: asyncio.Task):
+        self._tasks.discard(task)
+        _consume_outcome(task)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "executions": self.executions,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._in_flight)
+            }
+
+    def _join(self, context: Dict[str, Any]) -> Tuple[str, concurrent.futures.Future, bool]:
+        key = context_fingerprint(self.name, self.version, context)
+        with self._lock:
+            self.calls += 1
+            future = self._in_flight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return key, future, False
+            future = self._in_flight[key] = concurrent.futures.Future()
+            self.executions += 1
+            return key, future, True
+
+    def _finish(
+        self,
+        key: str,
+        future: concurrent.futures.Future,
+        result: Optional[AgentResult] = None,
+        error: Optional[BaseException] = None,
+        cancelled: bool = False
+    ):
+        # 완료 전에 제거해야 이후 호출이 새로 실행된다
+        with self._lock:
+            self._in_flight.pop(key, None)
+        if future.done():
+            return
+        if cancelled:
+            future.cancel()
+        elif error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    @staticmethod
+    def _shared(result: AgentResult) -> AgentResult:
+        # 호출자마다 별도 객체 (metadata 변경이 서로 영향 주지 않도록)
+        return dataclasses.replace(
+            result, metadata={**result.metadata, "coalesced": True}
+        )
+
+
+# ============================================================
+# 10. Micro-batching - 개별 호출을 배치 요청으로 묶기
+# ============================================================
+
+class _BatchQueue:
+    """이벤트 루프 하나에 속한 MicroBatcher 대기열 (timer/future는 그 루프 전용)"""
+
+    __slots__ = ("pending", "timer", "in_flight")
+
+    def __init__(self):
+        self.pending: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+        self.timer: Optional[asyncio.TimerHandle] = None
+        self.in_flight: set = set()
+
+
+class MicroBatcher:
+    """동시 체인들의 개별 Agent 호출을 모아 execute_batch로 전달하는 스케줄러
+
+    배치 Agent 인터페이스: execute_batch(contexts) -> List[AgentResult]
+    (선택적으로 execute_batch_async). 대기 중인 호출이 max_batch_size에
+    도달하거나 첫 호출 후 max_wait초가 지나면 배치를 전송하고, 결과를
+    입력 순서대로 각 호출자에게 돌려준다. 배치 실패 시 모든 호출자에게
+    같은 예외가 전달된다. 체인에는 일반 Agent처럼 끼워 넣을 수 있다.
+
+    대기열은 이벤트 루프별로 따로 두므로(asyncio.run을 여러 번 쓰는 동기 체인 등)
+    timer와 future가 다른 루프에 섞이지 않는다. 전송 전에 취소된 호출은 배치에서
+    빠지고, 배치 전송 자체가 취소되면 남은 호출자도 취소된다.
+    """
+
+    def __init__(self, agent: Any, max_batch_size: int = 16, max_wait: float = 0.01):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be >= 1")
+        self.agent = agent
+        self.name = agent.name
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._queues: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _BatchQueue]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self.batches = 0
+        self.items = 0
+        self.dropped = 0
+        self.batch_sizes = Counter()
+        self.flush_reasons = Counter()
+
+    def execute(self, context: Dict[str, Any]) -> AgentResult:
+        # 동기 호출은 모을 대상이 없으므로 크기 1 배치로 즉시 처리
+        self._record(1, "sync")
+        return self.agent.execute_batch([context])[0]
+
+    async def execute_async(self, context: Dict[str, Any]) -> AgentResult:
+        loop = asyncio.get_running_loop()
+        queue = self._queue(loop)
+        future = loop.create_future()
+        queue.pending.append((context, future))
+
+        if len(queue.pending) >= self.max_batch_size:
+            self._flush(queue, "size")
+        elif queue.timer is None:
+            queue.timer = loop.call_later(self.max_wait, self._flush, queue, "wait")
+        return await future
+
+    async def drain(self):
+        """현재 루프의 대기 중인 호출을 즉시 전송하고 진행 중인 배치 완료까지 대기"""
+        queue = self._queue(asyncio.get_running_loop())
+        while queue.pending:
+            self._flush(queue, "drain")
+        if queue.in_flight:
+            await asyncio.gather(*queue.in_flight, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": self.items / self.batches if self.batches else 0.0,
+            "batch_sizes": dict(sorted(self.batch_sizes.items())),
+            "flush_reasons": dict(self.flush_reasons),
+            "dropped": self.dropped,
+            "pending": sum(len(queue.pending) for queue in list(self._queues.values()))
+        }
+
+    def _queue(self, loop: asyncio.AbstractEventLoop) -> _BatchQueue:
+        queue = self._queues.get(loop)
+        if queue is None:
+            # 닫힌 루프의 대기열(남은 timer/취소된 호출자)은 버림
+            for closed in [other for other in list(self._queues) if other.is_closed()]:
+                del self._queues[closed]
+            queue = self._queues[loop] = _BatchQueue()
+        return queue
+
+    def _flush(self, queue: _BatchQueue, reason: str):
+        if queue.timer is not None:
+            queue.timer.cancel()
+            queue.timer = None
+        # 기다리다 취소된 호출자는 전송하지 않음
+        live = [item for item in queue.pending if not item[1].cancelled()]
+        self.dropped += len(queue.pending) - len(live)
+        batch, queue.pending = live[:self.max_batch_size], live[self.max_batch_size:]
+        if not batch:
+            return
+        self._record(len(batch), reason)
+        loop = asyncio.get_running_loop()
+        task = loop.create_task(self._send(batch))
+        queue.in_flight.add(task)
+        task.add_done_callback(queue.in_flight.discard)
+
+        if queue.pending:
+            # 크기 초과분은 새 대기 주기로
+            queue.timer = loop.call_later(self.max_wait, self._flush, queue, "wait")
+
+    async def _send(self, batch: List[Tuple[Dict[str, Any], asyncio.Future]]):
+        contexts = [context for context, _ in batch]
+        try:
+            execute_batch_async = getattr(self.agent, "execute_batch_async", None)
+            if execute_batch_async is not None:
+                results = await execute_batch_async(contexts)
+            else:
+                results = await asyncio.to_thread(self.agent.execute_batch, contexts)
+            if len(results) != len(contexts):
+                raise ValueError(
+                    f"{self.name}: batch returned {len(results)} results for {len(contexts)} inputs"
+                )
+            for (_, future), result in zip(batch, results):
+                if not future.done():  # 호출자가 취소한 경우 무시
+                    future.set_result(result)
+        except Exception as exc:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+        finally:
+            # 배치 전송이 취소된 경우에도 호출자가 영원히 기다리지 않도록
+            for _, future in batch:
+                if not future.done():
+                    future.cancel()
+
+    def _record(self, size: int, reason: str):
+        self.batches += 1
+        self.items += size
+        self.batch_sizes[size] += 1
+        self.flush_reasons[reason] += 1
+
+
+# ============================================================
+# 11. Rate Limiting - Agent/Provider별 요청·토큰 한도와 동시성 제어
+# ============================================================
+
+class TokenBucket:
+    """초당 rate만큼 채워지는 토큰 버킷 (용량 = 최대 burst)
+
+    한 번에 capacity보다 큰 양을 요청하면 버킷이 가득 찼을 때 허용하고
+    잔량을 음수로 만들어 이후 요청이 그만큼 더 기다리게 한다.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        if rate <= 0:
+            raise ValueError("rate must be > 0")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self.clock = clock
+        self.level = self.capacity
+        self._updated = clock()
+
+    def wait_time(self, amount: float) -> float:
+        """amount를 가져가기 위해 기다려야 하는 시간 (0이면 즉시 가능)"""
+        self._refill()
+        needed = min(amount, self.capacity)
+        if self.level >= needed:
+            return 0.0
+        return (needed - self.level) / self.rate
+
+    def take(self, amount: float):
+        self._refill()
+        self.level -= amount
+
+    def _refill(self):
+        now = self.clock()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+
+class RateLimiter:
+    """키(Agent 이름 또는 provider) 하나의 한도
+
+    요청 수/토큰 수 버킷과 동시 실행 수 제한을 함께 적용한다. 대기열은
+    우선순위(높을수록 먼저) → 도착 순(FIFO)으로 정렬되며, 맨 앞 요청이
+    통과하기 전에는 뒤 요청이 앞지르지 않는다.
+
+    레지스트리는 프로세스 전역이므로 여러 이벤트 루프(asyncio.run 반복,
+    루프별 스레드)가 같은 한도를 공유할 수 있다. 대기 timer는 닫혔거나 다른
+    루프에 걸려 있으면 현재 루프에 다시 걸고, 다른 루프의 대기자는 그 루프의
+    call_soon_threadsafe로 깨운다.
+    """
+
+    def __init__(
+        self,
+        key: str,
+        requests_per_second: Optional[float] = None,
+        tokens_per_second: Optional[float] = None,
+        max_concurrency: Optional[int] = None,
+        burst: Optional[float] = None,
+        token_burst: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.key = key
+        self.clock = clock
+        self.request_bucket = TokenBucket(requests_per_second, burst, clock) if requests_per_second else None
+        self.token_bucket = TokenBucket(tokens_per_second, token_burst, clock) if tokens_per_second else None
+        self.max_concurrency = max_concurrency
+        self.active = 0
+        self._waiters: List[Tuple[int, int, float, asyncio.Future]] = []
+        self._seq = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._timer_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.RLock()
+        self.queue_wait = LatencyHistogram()
+        self.execution = LatencyHistogram()
+        self.throttled = 0
+
+    @property
+    def counts_tokens(self) -> bool:
+        return self.token_bucket is not None
+
+    async def acquire(self, tokens: float = 0, priority: int = 0) -> float:
+        """슬롯을 얻을 때까지 대기하고 대기 시간(초)을 반환"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        start = self.clock()
+        with self._lock:
+            heapq.heappush(self._waiters, (-priority, self._seq, tokens, future))
+            self._seq += 1
+            self._dispatch()
+            if not future.done():
+                self.throttled += 1
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release()  # 슬롯을 받은 직후 취소됨
+            else:
+                self._dispatch()  # 맨 앞 대기자였다면 다음 대기자가 timer를 이어받음
+            raise
+        waited = self.clock() - start
+        with self._lock:
+            self.queue_wait.record(waited)
+        return waited
+
+    def release(self, execution_time: Optional[float] = None):
+        with self._lock:
+            self.active -= 1
+            if execution_time is not None:
+                self.execution.record(execution_time)
+            self._dispatch()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "active": self.active,
+                "waiting": sum(1 for *_, future in self._waiters if not future.done()),
+                "throttled": self.throttled,
+                "queue_wait": self.queue_wait.summary(),
+                "execution": self.execution.summary()
+            }
+
+    def _dispatch(self):
+        with self._lock:
+            loop = asyncio.get_running_loop()
+            while self._waiters:
+                _, _, tokens, future = self._waiters[0]
+                waiter_loop = future.get_loop()
+                if future.done() or waiter_loop.is_closed():  # 취소되었거나 버려진 대기자
+                    heapq.heappop(self._waiters)
+                    continue
+                if self.max_concurrency is not None and self.active >= self.max_concurrency:
+                    return  # release()가 다시 호출
+                delay = max(
+                    self.request_bucket.wait_time(1) if self.request_bucket else 0.0,
+                    self.token_bucket.wait_time(tokens) if self.token_bucket else 0.0
+                )
+                if delay > 0:
+                    if self._timer is None or self._timer.cancelled() or self._timer_loop is not loop:
+                        self._timer = loop.call_later(delay, self._on_timer)
+                        self._timer_loop = loop
+                    return
+                heapq.heappop(self._waiters)
+                if self.request_bucket:
+                    self.request_bucket.take(1)
+                if self.token_bucket:
+                    self.token_bucket.take(tokens)
+                self.active += 1
+                if waiter_loop is loop:
+                    future.set_result(None)
+                    continue
+                try:
+                    waiter_loop.call_soon_threadsafe(self._grant, future)
+                except RuntimeError:  # is_closed() 확인 직후 그 루프가 닫힘
+                    self.active -= 1
+
+    def _grant(self, future: asyncio.Future):
+        """다른 루프의 대기자에게 슬롯 전달 (그 사이 취소되었으면 반납)"""
+        if future.done():
+            self.release()
+        else:
+            future.set_result(None)
+
+    def _on_timer(self):
+        with self._lock:
+            self._timer = None
+            self._timer_loop = None
+            self._dispatch()
+
+
+class _RateLimitLease:
+    __slots__ = ("limiters", "queue_wait")
+
+    def __init__(self, limiters: List[RateLimiter], queue_wait: float):
+        self.limiters = limiters
+        self.queue_wait = queue_wait
+
+    def release(self, execution_time: float):
+        for limiter in reversed(self.limiters):
+            limiter.release(execution_time)
+
+
+class RateLimitRegistry:
+    """Agent 이름 / provider 키별 RateLimiter 모음
+
+    Agent 호출 시 agent.name 키와 agent.provider 키(있는 경우)의 한도를
+    이 순서대로 모두 획득한다. 우선순위는 request_priority()로 지정한다.
+    """
+
+    def __init__(self):
+        self._limiters: Dict[str, RateLimiter] = {}
+
+    def configure(self, key: str, **limits) -> RateLimiter:
+        limiter = self._limiters[key] = RateLimiter(key, **limits)
+        return limiter
+
+    def limiters_for(self, agent: Any) -> List[RateLimiter]:
+        keys = [agent.name, getattr(agent, "provider", None)]
+        return [self._limiters[key] for key in keys if key in self._limiters]
+
+    async def acquire(self, agent: Any, context: Mapping) -> _RateLimitLease:
+        limiters = self.limiters_for(agent)
+        priority = _REQUEST_PRIORITY.get()
+        tokens = None
+        acquired: List[RateLimiter] = []
+        waited = 0.0
+        try:
+            for limiter in limiters:
+                if limiter.counts_tokens and tokens is None:
+                    tokens = estimate_tokens(dict(context))
+                waited += await limiter.acquire(tokens or 0, priority)
+                acquired.append(limiter)
+        except BaseException:
+            for limiter in reversed(acquired):
+                limiter.release()
+            raise
+        return _RateLimitLease(acquired, waited)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {key: limiter.stats() for key, limiter in sorted(self._limiters.items())}
+
+
+_REQUEST_PRIORITY: "contextvars.ContextVar[int]" = contextvars.ContextVar("request_priority", default=0)
+_active_rate_limits: Optional[RateLimitRegistry] = None
+
+
+def set_rate_limits(registry: Optional[RateLimitRegistry]) -> Optional[RateLimitRegistry]:
+    """프로세스 전역 한도 설정 (None이면 비활성). 이전 설정을 반환"""
+    global _active_rate_limits
+    previous = _active_rate_limits
+    _active_rate_limits = registry
+    return previous
+
+
+@contextmanager
+def request_priority(level: int):
+    """이 블록에서 시작한 Agent 호출의 대기열 우선순위 (높을수록 먼저)"""
+    token = _REQUEST_PRIORITY.set(level)
+    try:
+        yield
+    finally:
+        _REQUEST_PRIORITY.reset(token)
+
+
+# ============================================================
+# 12. Checkpoint - 단계 출력 영속화 / 재개
+# ============================================================
+
+FSYNC_POLICIES = ("always", "batch", "never")
+
+
+class ChainCheckpointStore:
+    """체인 단계 출력을 run_id별로 저장하는 append-only SQLite 저장소
+
+    fsync 정책:
+      - always: 단계마다 즉시 커밋 + 동기화 (synchronous=FULL, 기본)
+      - batch:  flush_every개 또는 flush_interval초마다 한 트랜잭션으로 커밋,
+                WAL + synchronous=NORMAL
+      - never:  batch와 같이 모아 커밋, OS에 동기화 위임 (synchronous=OFF)
+    run 종료(성공/실패) 시에는 항상 flush하지만, batch/never에서 프로세스가
+    강제 종료되면 버퍼에 남은 단계(최대 flush_every개)는 잃고 재개 시 다시 실행된다.
+    출력은 JSON으로 저장하며 JSON으로 그대로 되돌릴 수 없는 값은 record()에서 거부한다.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        fsync: str = "always",
+        flush_every: int = 16,
+        flush_interval: float = 1.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"지원하지 않는 fsync 정책: {fsync} (가능: {FSYNC_POLICIES})")
+        self.path = path
+        self.fsync = fsync
+        self.flush_every = 1 if fsync == "always" else flush_every
+        self.flush_interval = flush_interval
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._pending: List[Tuple[str, int, str, str, str]] = []
+        self._last_flush = clock()
+        self.flushes = 0
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "PRAGMA synchronous=" + {"always": "FULL", "batch": "NORMAL", "never": "OFF"}[fsync]
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS checkpoints ("
+            " run_id TEXT NOT NULL, stage INTEGER NOT NULL, agent TEXT NOT NULL,"
+            " input_hash TEXT NOT NULL, output TEXT NOT NULL,"
+            " PRIMARY KEY (run_id, stage))"
+        )
+        self._conn.commit()
+
+    def open_run(self, run_id: str, initial_input: Any) -> "CheckpointRun":
+        input_hash = context_fingerprint("", "", {"input": initial_input})
+        return CheckpointRun(self, run_id, input_hash, self.load(run_id))
+
+    def load(self, run_id: str) -> Dict[int, Tuple[str, str, Any]]:
+        """stage → (agent, input_hash, output). 아직 쓰지 않은 버퍼도 포함"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT stage, agent, input_hash, output FROM checkpoints WHERE run_id = ?", (run_id,)
+            ).fetchall()
+            rows += [row[1:] for row in self._pending if row[0] == run_id]
+        return {stage: (agent, input_hash, json.loads(output)) for stage, agent, input_hash, output in rows}
+
+    def record(self, run_id: str, stage: int, agent: str, input_hash: str, output: Any):
+        try:
+            payload = json.dumps(output, ensure_ascii=False, allow_nan=False)
+            exact = json.loads(payload) == output  # tuple, int 키 등은 다른 값으로 복원됨
+        except (TypeError, ValueError) as e:
+            raise TypeError(f"checkpoint output for run {run_id!r} stage {stage} is not JSON: {e}") from e
+        if not exact:
+            raise TypeError(
+                f"checkpoint output for run {run_id!r} stage {stage} does not round-trip through JSON"
+            )
+        with self._lock:
+            self._pending.append((run_id, stage, agent, input_hash, payload))
+            due = (
+                len(self._pending) >= self.flush_every
+                or self.clock() - self._last_flush >= self.flush_interval
+            )
+            if due:
+                self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def delete_run(self, run_id: str):
+        """완료된 run의 체크포인트 정리"""
+        with self._lock:
+            self._flush_locked()
+            self._conn.execute("DELETE FROM checkpoints WHERE run_id = ?", (run_id,))
+            self._conn.commit()
+
+    def close(self):
+        self.flush()
+        self._conn.close()
+
+    def __enter__(self) -> "ChainCheckpointStore":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def _flush_locked(self):
+        self._last_flush = self.clock()
+        if not self._pending:
+            return
+        with self._conn:
+            # 이미 완료된 단계는 덮어쓰지 않음 (append-only)
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO checkpoints (run_id, stage, agent, input_hash, output)"
+                " VALUES (?, ?, ?, ?, ?)",
+                self._pending
+            )
+        self._pending.clear()
+        self.flushes += 1
+
+
+class CheckpointRun:
+    """체인 1회 실행의 체크포인트 뷰 (완료 단계 조회 / 새 단계 기록)"""
+
+    def __init__(
+        self,
+        store: ChainCheckpointStore,
+        run_id: str,
+        input_hash: str,
+        completed: Dict[int, Tuple[str, str, Any]]
+    ):
+        self.store = store
+        self.run_id = run_id
+        self.input_hash = input_hash
+        self.completed = completed
+        self.resumed = 0
+
+    def is_done(self, stage: int, agent_name: str) -> bool:
+        entry = self.completed.get(stage)
+        if entry is None:
+            return False
+        stored_agent, stored_hash, _ = entry
+        if stored_agent != agent_name or stored_hash != self.input_hash:
+            raise ValueError(
+                f"checkpoint mismatch for run {self.run_id!r} stage {stage}: "
+                f"stored {stored_agent!r}, chain has {agent_name!r} (or input changed)"
+            )
+        return True
+
+    def resumed_result(self, stage: int) -> AgentResult:
+        agent_name, _, output = self.completed[stage]
+        self.resumed += 1
+        return AgentResult(
+            agent_name=agent_name,
+            output=output,
+            execution_time=0.0,
+            metadata={"success": True, "resumed": True}
+        )
+
+    def record(self, stage: int, agent_name: str, output: Any):
+        self.store.record(self.run_id, stage, agent_name, self.input_hash, output)
+
+    def close(self):
+        self.store.flush()
+
+
+# ============================================================
+# 13. Hedged Requests - 느린 호출의 꼬리 지연 단축
+# ============================================================
+
+class HedgedAgent:
+    """관측된 p95 지연을 넘긴 호출에 복제 요청을 보내는 Agent 래퍼
+
+    min_samples개 이상 관측한 뒤부터, 호출이 hedge_percentile 지연 안에
+    끝나지 않으면 같은 컨텍스트로 두 번째 호출을 보내고 먼저 성공한 응답을
+    채택하며 나머지는 취소한다. 전체 호출 대비 복제 비율은 max_hedge_rate로
+    제한된다. 복제는 비동기 경로(execute_async)에서만 수행한다.
+
+    원 호출과 복제 호출은 같은 경로(_call_agent_async)로 실행한다. 체인이
+    execute_agent_async로 이 래퍼를 부르면 rate limit lease와 attempt span은
+    바깥에서 한 번만 잡히므로, 복제가 같은 키를 다시 획득하며 바깥 lease 뒤에
+    줄 서지 않는다. 복제 호출은 kind="hedge" span으로만 남는다.
+
+    대기 기준 백분위는 복제로 단축된 종단 지연이 아니라 호출 각각의 지연으로
+    계산한다 (종단 지연을 쓰면 복제할수록 p95가 내려감). 복제에 져서 취소된
+    원 호출은 그때까지의 경과 시간(대기 기준 이상)을 하한으로 기록하고, 취소된
+    복제 호출은 기록하지 않는다. 백분위는 refresh_every개 관측마다 다시 계산한다.
+    """
+
+    def __init__(
+        self,
+        agent: Any,
+        hedge_percentile: float = 0.95,
+        max_hedge_rate: float = 0.1,
+        min_samples: int = 20,
+        max_samples: int = 1000,
+        refresh_every: int = 32
+    ):
+        self.agent = agent
+        self.name = agent.name
+        self.hedge_percentile = hedge_percentile
+        self.max_hedge_rate = max_hedge_rate
+        self.min_samples = min_samples
+        self.refresh_every = refresh_every
+        self.latency = LatencyHistogram(max_samples=max_samples)
+        self._delay: Optional[float] = None
+        self._delay_count = 0
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.rate_limited = 0
+
+    def execute(self, context: Dict[str, Any]) -> AgentResult:
+        start = time.perf_counter()
+        result = self.agent.execute(context)
+        self.latency.record(time.perf_counter() - start)
+        self.calls += 1
+        return result
+
+    async def execute_async(self, context: Dict[str, Any]) -> AgentResult:
+        self.calls += 1
+        tasks: List[asyncio.Future] = []
+        primary = self._start(_call_agent_async(self.agent, context), tasks)
+        try:
+            delay = self.hedge_delay()
+            if delay is not None:
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                if not done:
+                    if self.hedges + 1 <= self.max_hedge_rate * self.calls:
+                        self.hedges += 1
+                        self._start(self._hedge_call(context), tasks)
+                    else:
+                        self.rate_limited += 1
+            result, winner = await self._first_success(tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        if winner is not primary:
+            self.hedge_wins += 1
+        if len(tasks) > 1:
+            result = dataclasses.replace(
+                result, metadata={**result.metadata, "hedged": True, "hedge_won": winner is not primary}
+            )
+        return result
+
+    def _start(self, call, tasks: List[asyncio.Future]) -> asyncio.Future:
+        """호출 1회 시작. 완료 시 그 호출 자체의 지연을 기록"""
+        start = time.perf_counter()
+        task = asyncio.ensure_future(call)
+        is_primary = not tasks
+        tasks.append(task)
+
+        def record(done: asyncio.Future):
+            if not done.cancelled() or (is_primary and len(tasks) > 1):
+                self.latency.record(time.perf_counter() - start)
+
+        task.add_done_callback(record)
+        return task
+
+    async def _hedge_call(self, context: Dict[str, Any]) -> AgentResult:
+        with get_tracer().span(self.name, kind="hedge", agent=self.name):
+            return await _call_agent_async(self.agent, context)
+
+    def hedge_delay(self) -> Optional[float]:
+        """복제 요청까지 대기 시간 (관측 부족 시 None = 복제 안 함)"""
+        count = self.latency.count
+        if count < self.min_samples:
+            return None
+        if self._delay is None or count - self._delay_count >= self.refresh_every:
+            self._delay = self.latency.percentile(self.hedge_percentile)
+            self._delay_count = count
+        return self._delay
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "hedge_rate": self.hedges / self.calls if self.calls else 0.0,
+            "rate_limited": self.rate_limited,
+            "hedge_delay": self.hedge_delay(),
+            "latency": self.latency.summary()
+        }
+
+    @staticmethod
+    async def _first_success(tasks: List[asyncio.Future]) -> Tuple[AgentResult, asyncio.Future]:
+        """먼저 성공한 결과. 모두 실패하면 먼저 실패한 예외"""
+        pending = set(tasks)
+        first_error: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in sorted(done, key=tasks.index):
+                if task.exception() is None:
+                    return task.result(), task
+                if first_error is None:
+                    first_error = task.exception()
+        raise first_error
+
+
+# ============================================================
+# 14. Streaming - 단계 간 부분 출력 스트리밍
+# ============================================================
+
+_STREAM_END = object()
+
+
+class _StreamFailure:
+    __slots__ = ("error",)
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+async def _iter_queue(queue: asyncio.Queue) -> AsyncIterator[Any]:
+    while True:
+        item = await queue.get()
+        if item is _STREAM_END:
+            return
+        if isinstance(item, _StreamFailure):
+            raise item.error
+        yield item
+
+
+class StreamingPromptChain(PromptChain):
+    """청크 단위 generator 파이프라인으로 실행하는 PromptChain
+
+    stream_async가 있는 Agent는 출력을 청크로 내보내고, streaming_input=True인
+    다음 Agent는 이전 단계가 끝나기 전부터 청크를 소비한다. 그렇지 않은
+    Agent 앞에서는 이전 출력이 완성될 때까지 기다린다 (barrier).
+    단계 사이 큐는 buffer_size로 제한되어 느린 소비자가 생산자를 멈춘다 (backpressure).
+    스트리밍 Agent의 출력은 {"agent", "chunks", "result"} 형태로 컨텍스트에 남는다.
+    """
+
+    def __init__(self, agents: List[Any], buffer_size: int = 4):
+        super().__init__(agents)
+        if buffer_size < 1:
+            raise ValueError("buffer_size는 1 이상이어야 함")
+        self.buffer_size = buffer_size
+
+    async def stream_async(self, initial_prompt: str) -> AsyncIterator[Any]:
+        """마지막 단계의 청크를 도착하는 대로 yield"""
+        stream = self._stream(initial_prompt, [])
+        try:
+            async for chunk in stream:
+                yield chunk
+        finally:
+            await stream.aclose()  # GC를 기다리지 않고 단계 task 정리
+
+    def execute_streaming(self, initial_prompt: str) -> Dict[str, Any]:
+        return asyncio.run(self.execute_streaming_async(initial_prompt))
+
+    @traced_chain
+    async def execute_streaming_async(self, initial_prompt: str) -> Dict[str, Any]:
+        """스트리밍 실행 후 최종 컨텍스트 + 첫 결과까지 시간(time_to_first_chunk)"""
+        start = time.perf_counter()
+        first_chunk_at = None
+        chunks = []
+        final: List[LayeredContext] = []
+        stream = self._stream(initial_prompt, final)
+        try:
+            async for chunk in stream:
+                if first_chunk_at is None:
+                    first_chunk_at = time.perf_counter() - start
+                chunks.append(chunk)
+        finally:
+            await stream.aclose()
+
+        result = final[0].to_dict()
+        result["final_chunks"] = chunks
+        result["time_to_first_chunk"] = first_chunk_at
+        result["total_time"] = time.perf_counter() - start
+        return result
+
+    async def _stream(self, initial_prompt: str, final: List[LayeredContext]) -> AsyncIterator[Any]:
+        context = LayeredContext({"user_input": initial_prompt})
+        upstream: Optional[AsyncIterator[Any]] = None
+        previous: Optional[asyncio.Future] = None
+        stages: List[asyncio.Future] = []
+        try:
+            for agent in self.agents:
+                if upstream is not None and not getattr(agent, "streaming_input", False):
+                    # 스트림 입력 미지원: 이전 출력 완성까지 대기
+                    async for _ in upstream:
+                        pass
+                    context = await previous
+                    upstream, previous = None, None
+                queue: asyncio.Queue = asyncio.Queue(maxsize=self.buffer_size)
+                stage = asyncio.ensure_future(self._run_stage(agent, context, upstream, queue, previous))
+                stages.append(stage)
+                upstream, previous = _iter_queue(queue), stage
+
+            async for chunk in upstream:
+                yield chunk
+            final.append(await previous)
+        finally:
+            # 소비자가 중간에 멈춰도 단계 task가 남지 않도록 취소 완료까지 대기
+            for stage in stages:
+                stage.cancel()
+            await asyncio.gather(*stages, return_exceptions=True)
+
+    async def _run_stage(
+        self,
+        agent: Any,
+        context: LayeredContext,
+        upstream: Optional[AsyncIterator[Any]],
+        queue: asyncio.Queue,
+        previous: Optional[asyncio.Future]
+    ) -> LayeredContext:
+        """한 단계를 실행하며 청크를 큐로 전달. 완료 시 이전 단계 출력까지 포함한 컨텍스트 반환"""
+        try:
+            with get_tracer().span(agent.name, kind="stage", streaming=True):
+                stream_async = getattr(agent, "stream_async", None)
+                if stream_async is not None:
+                    chunks = []
+                    stream = stream_async(context, upstream) if upstream is not None else stream_async(context)
+                    async for chunk in stream:
+                        chunks.append(chunk)
+                        await queue.put(chunk)  # 큐가 차 있으면 대기 (backpressure)
+                    output = {"agent": agent.name, "chunks": chunks, "result": "".join(map(str, chunks))}
+                else:
+                    output = (await execute_agent_async(agent, context)).output
+                    await queue.put(output)
+        except Exception as e:
+            await queue.put(_StreamFailure(e))
+            raise
+        await queue.put(_STREAM_END)
+
+        base = await previous if previous is not None else context
+        return base.with_frame(agent.name, {f"{agent.name}_output": output})
+
+
+# ============================================================
+# 테스트 케이스
+# ============================================================
+
+def test_prompt_chain():
+    """✅ 순차 체인 테스트"""
+    print("\n=== 테스트 1: Prompt Chain ===")
+
+    agents = [
+        MockAgent("GameDesigner", delay=0.05),
+        MockAgent("Validator", delay=0.02),
+        MockAgent("UXDesigner", delay=0.05)
+    ]
+
+    chain = PromptChain(agents)
+    result = chain.execute("중세 왕국 배신 이벤트")
+
+    print(f"✅ 체인 실행 성공")
+    print(f"   실행된 Agent 수: {len(result['chain_results'])}")
+    print(f"   최종 컨텍스트 키: {list(result.keys())}")
+
+    # 검증: 각 Agent 출력이 컨텍스트에 포함되어야 함
+    for agent in agents:
+        assert f"{agent.name}_output" in result, f"{agent.name} 출력 누락"
+
+    return True
+
+
+def test_conditional_chain():
+    """✅ 조건부 분기 테스트"""
+    print("\n=== 테스트 2: Conditional Chain ===")
+
+    def mock_validator(output: Dict) -> Dict:
+        """Mock 검증 함수"""
+        # 짝수 초에는 고품질, 홀수 초에는 저품질
+        score = 0.9 if int(time.time()) % 2 == 0 else 0.5
+        return {
+            "score": score,
+            "issues": [] if score >= 0.8 else ["품질 미달"]
+        }
+
+    chain = ConditionalChain(
         initial_agent=MockAgent("InitialDesigner"),
         validator=mock_validator,
         high_quality_agent=MockAgent("UXImprover"),
         low_quality_agent=MockAgent("Redesigner")
     )
 
-    result = chain.execute("이벤트 생성")
+    result = chain.execute("이벤트 생성")
+
+    print(f"✅ 조건부 체인 실행 성공")
+    print(f"   초안 품질: {result['validation']['score']:.2f}")
+    print(f"   선택된 분기: {result['branch_taken']}")
+
+    assert "branch_taken" in result
+    assert result["branch_taken"] in ["high_quality", "low_quality_retry"]
+
+    return True
+
+
+def test_robust_chain():
+    """✅ 에러 복구 체인 테스트"""
+    print("\n=== 테스트 3: Robust Chain with Error Recovery ===")
+
+    agents = [
+        MockAgent("Agent1"),
+        MockAgent("Agent2"),
+        MockAgent("Agent3")
+    ]
+
+    chain = RobustAgentChain(agents, max_retries=3)
+
+    try:
+        result = chain.execute("테스트 작업")
+        print(f"✅ 에러 복구 체인 실행 성공")
+        print(f"   발생한 에러 수: {len(result['errors_encountered'])}")
+
+        assert "errors_encountered" in result
+
+        # 시도 횟수 0 이하는 스테이지를 건너뛰므로 생성 시점에 거부
+        for bad in (0, -1):
+            try:
+                RobustAgentChain(agents, max_retries=bad)
+            except ValueError:
+                pass
+            else:
+                raise AssertionError(f"max_retries={bad}가 허용됨")
+        print(f"✅ max_retries < 1 거부 확인")
+        return True
+    except Exception as e:
+        print(f"❌ 에러 복구 실패: {e}")
+        return False
+
+
+def test_meta_prompting():
+    """✅ 메타 프롬프팅 테스트"""
+    print("\n=== 테스트 4: Meta-Prompting Chain ===")
+
+    chain = MetaPromptingChain(
+        designer_agent=MockAgent("Designer"),
+        reviewer_agent=MockAgent("Reviewer")
+    )
+
+    try:
+        result = chain.execute("복잡한 이벤트 설계")
+        print(f"✅ 메타 프롬프팅 실행 성공")
+        print(f"   메타 검증 통과: {result['meta_validation_passed']}")
+
+        assert result["meta_validation_passed"] == True
+        return True
+    except Exception as e:
+        print(f"❌ 메타 프롬프팅 실패: {e}")
+        return False
+
+
+def test_chaining_performance():
+    """⏱️ 체인 성능 테스트"""
+    print("\n=== 테스트 5: Chaining Performance ===")
+
+    agents = [MockAgent(f"Agent{i}", delay=0.05) for i in range(5)]
+    chain = PromptChain(agents)
+
+    start = time.time()
+    result = chain.execute("성능 테스트")
+    elapsed = time.time() - start
+
+    total_agent_time = sum(r.execution_time for r in result["chain_results"])
+
+    print(f"✅ 성능 측정 완료")
+    print(f"   전체 실행 시간: {elapsed:.3f}초")
+    print(f"   Agent 실행 시간 합: {total_agent_time:.3f}초")
+    print(f"   오버헤드: {(elapsed - total_agent_time):.3f}초")
+
+    # 오버헤드가 10% 미만이어야 함
+    overhead_ratio = (elapsed - total_agent_time) / total_agent_time
+    assert overhead_ratio < 0.1, f"오버헤드 과다: {overhead_ratio:.1%}"
+
+    # DAG 체인: Agent0 → (Agent1, Agent2, Agent3) → Agent4
+    dag = DAGChain([
+        AgentStage(agents[0], inputs=["user_input"]),
+        AgentStage(agents[1], inputs=["Agent0_output"]),
+        AgentStage(agents[2], inputs=["Agent0_output"]),
+        AgentStage(agents[3], inputs=["Agent0_output"]),
+        AgentStage(agents[4], inputs=["Agent1_output", "Agent2_output", "Agent3_output"]),
+    ])
+
+    start = time.time()
+    dag_result = dag.execute("성능 테스트")
+    dag_elapsed = time.time() - start
+
+    # 임계 경로: Agent0 → 가장 느린 중간 Agent → Agent4 (실측 실행 시간 기준)
+    dag_times = {r.agent_name: r.execution_time for r in dag_result["chain_results"]}
+    critical_path_time = (
+        dag_times["Agent0"]
+        + max(dag_times[f"Agent{i}"] for i in (1, 2, 3))
+        + dag_times["Agent4"]
+    )
+
+    print(f"   DAG 실행 시간: {dag_elapsed:.3f}초 (임계 경로: {critical_path_time:.3f}초)")
+
+    assert len(dag_result["chain_results"]) == len(agents)
+    assert dag_elapsed < total_agent_time, "DAG 실행이 순차 실행보다 느림"
+    dag_overhead = (dag_elapsed - critical_path_time) / critical_path_time
+    assert dag_overhead < 0.1, f"DAG 오버헤드 과다: {dag_overhead:.1%}"
+
+    # 동시 실행 수 제한: max_concurrency=1이면 순차 실행과 같아야 함
+    start = time.time()
+    DAGChain(dag.stages, max_concurrency=1).execute("성능 테스트")
+    serial_elapsed = time.time() - start
+    assert serial_elapsed >= len(agents) * 0.05
+
+    # 순환 의존성은 생성 시점에 거부
+    try:
+        DAGChain([
+            AgentStage(agents[0], inputs=["Agent1_output"]),
+            AgentStage(agents[1], inputs=["Agent0_output"]),
+        ])
+        return False
+    except ValueError:
+        pass
+
+    # 단계 실패 시 나머지 단계 task가 정리된 뒤에 예외 전달
+    class FailingAgent(MockAgent):
+        async def execute_async(self, context):
+            await asyncio.sleep(0.01)
+            raise ValueError("단계 실패")
+
+    failing_dag = DAGChain([
+        AgentStage(MockAgent("Root", delay=0)),
+        AgentStage(FailingAgent("Broken"), inputs=["Root_output"]),
+        AgentStage(MockAgent("Slow", delay=0.5), inputs=["Root_output"]),
+        AgentStage(MockAgent("Join", delay=0), inputs=["Broken_output", "Slow_output"])
+    ])
+
+    async def run_failing():
+        try:
+            await failing_dag.execute_async("실패 DAG")
+            raise AssertionError("예외가 전달되어야 함")
+        except ValueError:
+            pass
+        return len(asyncio.all_tasks()) - 1
+
+    assert asyncio.run(run_failing()) == 0
+
+    return True
+
+
+def test_context_preservation():
+    """✅ 컨텍스트 보존 테스트"""
+    print("\n=== 테스트 6: Context Preservation ===")
+
+    agents = [
+        MockAgent("Agent1"),
+        MockAgent("Agent2"),
+        MockAgent("Agent3")
+    ]
+
+    chain = PromptChain(agents)
+    result = chain.execute("컨텍스트 테스트")
+
+    # 모든 중간 결과가 보존되어야 함
+    print(f"✅ 컨텍스트 보존 확인")
+    print(f"   보존된 출력 수: {len([k for k in result.keys() if '_output' in k])}")
+
+    for agent in agents:
+        key = f"{agent.name}_output"
+        assert key in result, f"{key} 누락"
+        print(f"   ✓ {key} 보존됨")
+
+    return True
+
+
+def test_async_multiplexing():
+    """⚡ 비동기 체인 다중화 테스트"""
+    print("\n=== 테스트 7: Async Multiplexing ===")
+
+    num_chains = 200
+    agents = [MockAgent(f"Agent{i}", delay=0.05) for i in range(3)]
+
+    def always_high(output: Dict) -> Dict:
+        return {"score": 0.9, "issues": []}
+
+    chains = [
+        PromptChain(agents),
+        ConditionalChain(agents[0], always_high, agents[1], agents[2]),
+        RobustAgentChain(agents),
+        MetaPromptingChain(agents[0], agents[1]),
+    ]
+
+    async def run_all():
+        tasks = [
+            chains[i % len(chains)].execute_async(f"요청 {i}")
+            for i in range(num_chains)
+        ]
+        return await asyncio.gather(*tasks)
+
+    start = time.perf_counter()
+    results = asyncio.run(run_all())
+    elapsed = time.perf_counter() - start
+
+    print(f"✅ {num_chains}개 체인 동시 실행 완료")
+    print(f"   전체 실행 시간: {elapsed:.3f}초")
+
+    assert len(results) == num_chains
+    assert all("Agent2_output" in r for r in results[0::4])
+    # 한 이벤트 루프에서 다중화되므로 가장 긴 체인(3단계) 시간에 근접해야 함
+    assert elapsed < 0.15 * 3, f"다중화 실패: {elapsed:.3f}초"
+
+    # 동기 전용 Agent도 스레드 위임으로 동작해야 함
+    class SyncOnlyAgent:
+        name = "SyncOnly"
+
+        def execute(self, context: Dict[str, Any]) -> AgentResult:
+            return MockAgent(self.name, delay=0.01).execute(context)
+
+    result = PromptChain([SyncOnlyAgent()]).execute("동기 Agent")
+    assert "SyncOnly_output" in result
+
+    return True
+
+
+def test_parallel_ensemble():
+    """✅ 병렬 앙상블 테스트"""
+    print("\n=== 테스트 8: Parallel Agent Ensemble ===")
+
+    agents = [
+        MockAgent("FastDraft", delay=0.02),
+        MockAgent("Standard", delay=0.2),
+        MockAgent("Experimental", delay=0.3)
+    ]
+    scores = {"FastDraft": 0.75, "Standard": 0.6, "Experimental": 0.95}
+
+    def scorer(output: Dict) -> float:
+        return scores[output["agent"]]
+
+    # best_of_all: 모든 결과 대기 후 최고 점수
+    start = time.perf_counter()
+    best = ParallelAgentEnsemble(agents, scorer).execute("앙상블 테스트")
+    best_elapsed = time.perf_counter() - start
+
+    # first_over_threshold: 첫 통과 결과 채택 후 나머지 취소
+    start = time.perf_counter()
+    first = ParallelAgentEnsemble(
+        agents, scorer, mode="first_over_threshold", threshold=0.7
+    ).execute("앙상블 테스트")
+    first_elapsed = time.perf_counter() - start
+
+    print(f"✅ 앙상블 실행 성공")
+    print(f"   best_of_all: {best['selected'].agent_name} ({best_elapsed:.3f}초)")
+    print(f"   first_over_threshold: {first['selected'].agent_name} ({first_elapsed:.3f}초)")
+    print(f"   취소된 Agent: {first['cancelled']}")
+
+    assert best["selected"].agent_name == "Experimental"
+    assert len(best["alternatives"]) == 3
+    assert first["selected"].agent_name == "FastDraft"
+    assert sorted(first["cancelled"]) == ["Experimental", "Standard"]
+    # 최장 Agent(0.3초)를 기다리지 않아야 함
+    assert first_elapsed < 0.1, f"조기 취소 실패: {first_elapsed:.3f}초"
+
+    # 임계값을 넘는 결과가 없으면 최고 점수로 대체
+    fallback = ParallelAgentEnsemble(
+        agents, scorer, mode="first_over_threshold", threshold=0.99
+    ).execute("앙상블 테스트")
+    assert fallback["selected"].agent_name == "Experimental"
+    assert fallback["selection_reason"] == "highest quality score"
+
+    # 채점 중에 끝난 Agent는 취소 목록에 넣지 않음
+    async def slow_scorer(output: Dict) -> float:
+        await asyncio.sleep(0.1)  # Standard(0.03초)가 이 사이에 완료
+        return scores[output["agent"]]
+
+    together = ParallelAgentEnsemble(
+        [MockAgent("FastDraft", delay=0.02), MockAgent("Standard", delay=0.03), agents[2]],
+        slow_scorer, mode="first_over_threshold", threshold=0.7
+    ).execute("앙상블 테스트")
+    assert together["cancelled"] == ["Experimental"], together["cancelled"]
+
+    return True
+
+
+def test_result_cache():
+    """✅ Agent 결과 캐시 테스트"""
+    print("\n=== 테스트 9: Result Cache ===")
+
+    agents = [CachedAgent(MockAgent(f"Agent{i}", delay=0.05)) for i in range(3)]
+    chain = PromptChain(agents)
+
+    start = time.perf_counter()
+    chain.execute("캐시 테스트")
+    cold = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = chain.execute("캐시 테스트")
+    warm = time.perf_counter() - start
+
+    print(f"✅ 캐시 체인 실행 성공")
+    print(f"   첫 실행: {cold:.3f}초, 재실행: {warm:.3f}초")
+    print(f"   Agent0 통계: {agents[0].stats()}")
+
+    assert all(a.stats()["hits"] == 1 and a.stats()["misses"] == 1 for a in agents)
+    assert all(r.metadata.get("cache_hit") for r in result["chain_results"])
+    assert warm < cold / 5
+
+    # 키 순서가 달라도 같은 컨텍스트로 취급
+    assert context_fingerprint("A", "1", {"x": 1, "y": 2}) == context_fingerprint("A", "1", {"y": 2, "x": 1})
+    # Agent 버전이 바뀌면 다른 키
+    assert context_fingerprint("A", "1", {"x": 1}) != context_fingerprint("A", "2", {"x": 1})
+
+    # TTL 만료 (가짜 시계)
+    now = [1000.0]
+    ttl_agent = CachedAgent(MockAgent("TTL", delay=0), ttl=10, clock=lambda: now[0])
+    ttl_agent.execute({"user_input": "a"})
+    now[0] += 5
+    ttl_agent.execute({"user_input": "a"})
+    now[0] += 20
+    ttl_agent.execute({"user_input": "a"})
+    assert ttl_agent.stats()["hits"] == 1
+    assert ttl_agent.stats()["expirations"] == 1 and ttl_agent.stats()["evictions"] == 0
+
+    # LRU 용량 초과 시 가장 오래된 항목 제거
+    lru_agent = CachedAgent(MockAgent("LRU", delay=0), max_entries=2)
+    for prompt in ["a", "b", "a", "c", "b"]:
+        lru_agent.execute({"user_input": prompt})
+    assert lru_agent.stats()["hits"] == 1  # 두 번째 "a"만 적중
+    assert lru_agent.stats()["evictions"] == 2 and lru_agent.stats()["expirations"] == 0
+
+    # 주소 기반 repr로 키를 만들지 않음: 정규화할 수 없는 값은 거부, __cache_key__는 사용
+    class Opaque:
+        pass
+
+    class Keyed:
+        def __init__(self, value):
+            self.value = value
+
+        def __cache_key__(self):
+            return {"keyed": self.value}
+
+    try:
+        context_fingerprint("A", "1", {"x": Opaque()})
+        return False
+    except TypeError:
+        pass
+    assert context_fingerprint("A", "1", {"x": Keyed(1)}) == context_fingerprint("A", "1", {"x": Keyed(1)})
+    assert context_fingerprint("A", "1", {"x": Keyed(1)}) != context_fingerprint("A", "1", {"x": Keyed(2)})
+
+    # 디스크 저장소: 새 인스턴스(재시작)에서도 재사용
+    with tempfile.TemporaryDirectory() as cache_dir:
+        CachedAgent(MockAgent("Disk", delay=0), cache_dir=cache_dir).execute({"user_input": "d"})
+        restarted = CachedAgent(MockAgent("Disk", delay=0), cache_dir=cache_dir)
+        restarted.execute({"user_input": "d"})
+        assert restarted.stats()["disk_hits"] == 1
+        assert restarted.stats()["hits"] == 1
+
+        # 디스크의 만료 항목은 LRU를 건드리지 않고 파일째 삭제
+        now = [1000.0]
+        writer = CachedAgent(MockAgent("Expired", delay=0), ttl=10, cache_dir=cache_dir, clock=lambda: now[0])
+        writer.execute({"user_input": "old"})
+        now[0] += 5
+        reader = CachedAgent(
+            MockAgent("Expired", delay=0), ttl=10, max_entries=1, cache_dir=cache_dir, clock=lambda: now[0]
+        )
+        reader.execute({"user_input": "fresh"})
+        now[0] += 8  # old만 만료
+        key = context_fingerprint("Expired", reader.version, {"user_input": "old"})
+        assert reader._lookup(key) is None and reader._lookup(key) is None
+        assert not (Path(cache_dir) / f"{key}.pkl").exists()
+        assert reader.stats()["disk_hits"] == 0 and reader.stats()["expirations"] == 1
+        assert reader.stats()["evictions"] == 0
+        assert reader._lookup(context_fingerprint("Expired", reader.version, {"user_input": "fresh"}))
+
+        # 다시 조회하지 않는 만료 파일도 정리 (생성 시 prune_disk)
+        now[0] += 60
+        fresh_path = Path(cache_dir) / f"{context_fingerprint('Expired', reader.version, {'user_input': 'fresh'})}.pkl"
+        assert fresh_path.exists()
+        CachedAgent(MockAgent("Expired", delay=0), ttl=10, cache_dir=cache_dir, clock=lambda: now[0])
+        assert not fresh_path.exists()
+
+    # 디스크 용량 상한: 오래된 파일부터 삭제, 임시 파일은 남지 않음
+    with tempfile.TemporaryDirectory() as cache_dir:
+        now = [time.time()]
+        capped = CachedAgent(
+            MockAgent("Capped", delay=0), cache_dir=cache_dir, max_disk_entries=3, prune_every=1,
+            clock=lambda: now[0]
+        )
+        for i in range(6):
+            now[0] += 1
+            capped.execute({"user_input": str(i)})
+        names = sorted(os.listdir(cache_dir))
+        assert len(names) == 3 and all(name.endswith(".pkl") for name in names)
+        assert capped.stats()["disk_pruned"] == 3
+        restarted = CachedAgent(MockAgent("Capped", delay=0), cache_dir=cache_dir, clock=lambda: now[0])
+        restarted.execute({"user_input": "5"})
+        restarted.execute({"user_input": "0"})
+        assert restarted.stats()["disk_hits"] == 1
+        print(f"✅ 디스크 상한 3: 파일 {len(names)}개 유지, 정리 {capped.stats()['disk_pruned']}개")
+
+    # 캐시된 출력은 호출자 간에 공유되지 않음
+    shared = CachedAgent(MockAgent("Copy", delay=0))
+    shared.execute({"user_input": "c"}).output["result"] = "수정됨"  # 원본 결과 수정
+    shared.execute({"user_input": "c"}).output["result"] = "수정됨"  # 적중 결과 수정
+    assert shared.execute({"user_input": "c"}).output["result"] == "Copy processed the input"
+
+    return True
+
+
+def test_retry_policies():
+    """✅ 백오프 / 재시도 예산 / 회로 차단기 테스트 (가짜 시계)"""
+    print("\n=== 테스트 10: Retry Policies ===")
+
+    class FakeClock:
+        def __init__(self):
+            self.now = 0.0
+            self.sleeps = []
+
+        def __call__(self) -> float:
+            return self.now
+
+        async def sleep(self, delay: float):
+            self.sleeps.append(delay)
+            self.now += delay
+
+    class FlakyAgent(MockAgent):
+        """처음 failures회는 잘못된 출력을 반환"""
+
+        def __init__(self, name: str, failures: int):
+            super().__init__(name, delay=0)
+            self.failures = failures
+            self.calls = 0
+
+        async def execute_async(self, context: Dict[str, Any]) -> AgentResult:
+            self.calls += 1
+            result = await super().execute_async(context)
+            if self.calls <= self.failures:
+                result.output["result"] = "garbage"
+            return result
+
+    def make_chain(agents, clock, **kwargs):
+        return RobustAgentChain(
+            agents,
+            retry_budget=kwargs.pop("retry_budget", RetryBudget()),
+            circuit_breakers=kwargs.pop("circuit_breakers", CircuitBreakerRegistry(clock=clock)),
+            sleep=clock.sleep,
+            **kwargs
+        )
+
+    # 1. 지수 백오프 (jitter 없음): 0.1 → 0.2
+    clock = FakeClock()
+    chain = make_chain(
+        [FlakyAgent("Flaky", failures=2)], clock,
+        backoff=ExponentialBackoff(base=0.1, jitter=False)
+    )
+    result = chain.execute("백오프")
+    assert clock.sleeps == [0.1, 0.2], clock.sleeps
+    assert len(result["errors_encountered"]) == 2
+    print(f"✅ 지수 백오프 지연: {clock.sleeps}")
+
+    # 2. Decorrelated jitter: 같은 seed면 같은 지연, 범위 [base, max_delay]
+    delays = []
+    for _ in range(2):
+        clock = FakeClock()
+        chain = make_chain(
+            [FlakyAgent("Flaky", failures=4)], clock, max_retries=5,
+            backoff=DecorrelatedJitterBackoff(base=0.1, max_delay=1.0, rng=random.Random(42))
+        )
+        chain.execute("지터")
+        delays.append(clock.sleeps)
+    assert delays[0] == delays[1]
+    assert all(0.1 <= d <= 1.0 for d in delays[0])
+    print(f"✅ Decorrelated jitter 지연: {[round(d, 3) for d in delays[0]]}")
+
+    # 3. 체인 간 공유 재시도 예산: 첫 체인이 유일한 토큰을 소비하면 두 번째는 즉시 실패
+    clock = FakeClock()
+    budget = RetryBudget(capacity=1, ratio=0)
+    make_chain([FlakyAgent("A", failures=1)], clock, retry_budget=budget).execute("예산")
+    second = FlakyAgent("B", failures=1)
+    try:
+        make_chain([second], clock, retry_budget=budget).execute("예산")
+        return False
+    except RetryBudgetExhaustedError as e:
+        assert isinstance(e.__cause__, ValueError)
+    assert second.calls == 1 and budget.exhausted == 1
+    print(f"✅ 재시도 예산 소진 시 즉시 실패 (재시도 없음)")
 
-    print(f"✅ 조건부 체인 실행 성공")
-    print(f"   초안 품질: {result['validation']['score']:.2f}")
-    print(f"   선택된 분기: {result['branch_taken']}")
+    # 4. 회로 차단기: 연속 실패 → open (호출 생략) → timeout 후 half_open 시험 → closed
+    clock = FakeClock()
+    breakers = CircuitBreakerRegistry(failure_threshold=3, reset_timeout=30, clock=clock)
+    broken = FlakyAgent("Broken", failures=3)
+    try:
+        make_chain([broken], clock, circuit_breakers=breakers,
+                   backoff=ExponentialBackoff(jitter=False)).execute("차단")
+        return False
+    except ValueError:
+        pass
+    assert breakers.get("Broken").state == "open"
 
-    assert "branch_taken" in result
-    assert result["branch_taken"] in ["high_quality", "low_quality_retry"]
+    try:
+        make_chain([broken], clock, circuit_breakers=breakers).execute("차단")
+        return False
+    except CircuitOpenError:
+        pass
+    assert broken.calls == 3, "회로 차단 중 Agent가 호출됨"
+
+    # half_open: 시험 호출 1건만 통과, 결과 전까지 나머지는 거부
+    clock.now += 30
+    breaker = breakers.get("Broken")
+    assert breaker.allow_request() and breaker.state == "half_open"
+    assert not breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow_request()
+
+    clock.now += 31
+    make_chain([broken], clock, circuit_breakers=breakers).execute("회복")
+    assert breakers.get("Broken").state == "closed"
+    print(f"✅ 회로 차단기: open → half_open → closed")
 
     return True
 
 
-def test_robust_chain():
-    """✅ 에러 복구 체인 테스트"""
-    print("\n=== 테스트 3: Robust Chain with Error Recovery ===")
+def test_tracing():
+    """✅ Span 트레이싱 / 지연 히스토그램 테스트"""
+    print("\n=== 테스트 11: Tracing ===")
 
-    agents = [
-        MockAgent("Agent1"),
-        MockAgent("Agent2"),
-        MockAgent("Agent3")
-    ]
+    class FlakyOnce(MockAgent):
+        def __init__(self, name: str):
+            super().__init__(name, delay=0.01)
+            self.calls = 0
 
-    chain = RobustAgentChain(agents, max_retries=3)
+        async def execute_async(self, context: Dict[str, Any]) -> AgentResult:
+            self.calls += 1
+            result = await super().execute_async(context)
+            if self.calls == 1:
+                result.output["result"] = "garbage"
+            return result
 
+    tracer = Tracer()
+    previous = set_tracer(tracer)
     try:
-        result = chain.execute("테스트 작업")
-        print(f"✅ 에러 복구 체인 실행 성공")
-        print(f"   발생한 에러 수: {len(result['errors_encountered'])}")
+        PromptChain([MockAgent("Designer", delay=0.02), MockAgent("Reviewer", delay=0.01)]).execute("계측")
+        RobustAgentChain(
+            [FlakyOnce("Flaky")],
+            retry_budget=RetryBudget(),
+            circuit_breakers=CircuitBreakerRegistry(),
+            backoff=ExponentialBackoff(base=0.001, jitter=False)
+        ).execute("계측")
+        for _ in range(20):
+            PromptChain([MockAgent("Designer", delay=0.02)]).execute("계측")
+    finally:
+        set_tracer(previous)
 
-        assert "errors_encountered" in result
-        return True
-    except Exception as e:
-        print(f"❌ 에러 복구 실패: {e}")
-        return False
+    spans = list(tracer.spans)
+    by_id = {span.span_id: span for span in spans}
+    chains = [span for span in spans if span.kind == "chain"]
+    stages = [span for span in spans if span.kind == "stage"]
+    attempts = [span for span in spans if span.kind == "attempt"]
 
+    print(f"✅ span 기록: chain {len(chains)} / stage {len(stages)} / attempt {len(attempts)}")
+    assert len(chains) == 22 and all(span.parent_id is None for span in chains)
+    assert all(by_id[span.parent_id].kind == "chain" for span in stages)
+    assert all(by_id[span.parent_id].kind == "stage" for span in attempts)
+    assert all(span.trace_id == by_id[span.parent_id].trace_id for span in stages + attempts)
 
-def test_meta_prompting():
-    """✅ 메타 프롬프팅 테스트"""
-    print("\n=== 테스트 4: Meta-Prompting Chain ===")
+    # 재시도는 같은 stage 아래 attempt 2개로 기록
+    flaky_stage = next(span for span in stages if span.name == "Flaky")
+    flaky_attempts = [span for span in attempts if span.parent_id == flaky_stage.span_id]
+    assert [span.attributes["attempt"] for span in flaky_attempts] == [0, 1]
 
-    chain = MetaPromptingChain(
-        designer_agent=MockAgent("Designer"),
-        reviewer_agent=MockAgent("Reviewer")
-    )
+    # 측정 wall time 기반 히스토그램
+    summary = tracer.latency_summary()
+    print(f"   Designer 지연: p50 {summary['Designer']['p50'] * 1000:.1f}ms, "
+          f"p99 {summary['Designer']['p99'] * 1000:.1f}ms (n={summary['Designer']['count']})")
+    assert summary["Designer"]["count"] == 21
+    assert 0.02 <= summary["Designer"]["p50"] < 0.05
 
-    try:
-        result = chain.execute("복잡한 이벤트 설계")
-        print(f"✅ 메타 프롬프팅 실행 성공")
-        print(f"   메타 검증 통과: {result['meta_validation_passed']}")
+    with tempfile.TemporaryDirectory() as out_dir:
+        metrics_path = os.path.join(out_dir, "metrics.prom")
+        spans_path = os.path.join(out_dir, "spans.jsonl")
+        tracer.export_prometheus(metrics_path)
+        tracer.export_spans(spans_path)
 
-        assert result["meta_validation_passed"] == True
-        return True
-    except Exception as e:
-        print(f"❌ 메타 프롬프팅 실패: {e}")
-        return False
+        metrics = Path(metrics_path).read_text(encoding="utf-8")
+        assert 'agent_call_duration_seconds_bucket{agent="Designer",le="+Inf"} 21' in metrics
+        assert 'agent_call_latency_seconds{agent="Designer",quantile="0.99"}' in metrics
+        exported = [json.loads(line) for line in Path(spans_path).read_text(encoding="utf-8").splitlines()]
+        assert len(exported) == len(spans)
+        assert all(r["endTimeUnixNano"] >= r["startTimeUnixNano"] for r in exported)
+        assert all(r["kind"] == "SPAN_KIND_INTERNAL" for r in exported)
+        roles = {r["attributes"][0]["value"]["stringValue"] for r in exported}
+        assert {"chain", "stage", "attempt"} <= roles, roles
 
+    # nearest-rank 백분위: 순위 = ceil(q * n)
+    histogram = LatencyHistogram()
+    for value in range(1, 11):
+        histogram.record(value / 1000)
+    assert [histogram.percentile(q) for q in (0.05, 0.1, 0.15, 0.3, 0.5, 0.95, 1.0)] == \
+        [0.001, 0.001, 0.002, 0.003, 0.005, 0.010, 0.010]
 
-def test_chaining_performance():
-    """⏱️ 체인 성능 테스트"""
-    print("\n=== 테스트 5: Chaining Performance ===")
+    # 비활성 상태에서는 span이 기록되지 않음
+    PromptChain([MockAgent("Silent", delay=0)]).execute("계측")
+    assert "Silent" not in tracer.histograms
 
-    agents = [MockAgent(f"Agent{i}", delay=0.05) for i in range(5)]
-    chain = PromptChain(agents)
+    return True
 
-    start = time.time()
-    result = chain.execute("성능 테스트")
-    elapsed = time.time() - start
 
-    total_agent_time = sum(r.execution_time for r in result["chain_results"])
+def test_layered_context():
+    """✅ 불변 계층 컨텍스트 테스트"""
+    print("\n=== 테스트 12: Layered Context ===")
 
-    print(f"✅ 성능 측정 완료")
-    print(f"   전체 실행 시간: {elapsed:.3f}초")
-    print(f"   Agent 실행 시간 합: {total_agent_time:.3f}초")
-    print(f"   오버헤드: {(elapsed - total_agent_time):.3f}초")
+    base = LayeredContext({"user_input": "원본"})
+    branch_a = base.with_frame("a", {"feedback": ["품질 미달"]})
+    branch_b = base.with_frame("b", {"user_input": "덮어쓰기"})
 
-    # 오버헤드가 10% 미만이어야 함
-    overhead_ratio = (elapsed - total_agent_time) / total_agent_time
-    assert overhead_ratio < 0.1, f"오버헤드 과다: {overhead_ratio:.1%}"
+    # 분기는 서로/원본에 영향 없음
+    assert dict(base) == {"user_input": "원본"}
+    assert branch_a["feedback"] == ["품질 미달"] and branch_a["user_input"] == "원본"
+    assert branch_b.get("user_input") == "덮어쓰기" and "feedback" not in branch_b
+    assert list(branch_a) == ["user_input", "feedback"]
+
+    # 스냅샷 비용: 단계마다 스냅샷을 남기는 긴 체인 (dict 복사 vs frame 공유)
+    num_stages = 500
+    payload = {"result": "x" * 100}
+
+    def measure(build) -> int:
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        kept = build()
+        used = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+        del kept
+        return used
+
+    def dict_snapshots():
+        context, snapshots = {"user_input": "체인"}, []
+        for i in range(num_stages):
+            context[f"Agent{i}_output"] = payload
+            snapshots.append(dict(context))
+        return snapshots
+
+    def layered_snapshots():
+        context, snapshots = LayeredContext({"user_input": "체인"}), []
+        for i in range(num_stages):
+            context = context.with_frame(f"Agent{i}", {f"Agent{i}_output": payload})
+            snapshots.append(context)
+        return snapshots
+
+    dict_bytes = measure(dict_snapshots)
+    layered_bytes = measure(layered_snapshots)
+    print(f"✅ {num_stages}단계 스냅샷 메모리: dict 복사 {dict_bytes / 1e6:.1f}MB / "
+          f"LayeredContext {layered_bytes / 1e6:.2f}MB")
+    assert layered_bytes * 10 < dict_bytes
+
+    # drop: 읽히지 않는 키 제거 후 이전 스냅샷이 없으면 메모리 해제
+    tracemalloc.start()
+    context = LayeredContext({"user_input": "대용량"})
+    for i in range(5):
+        context = context.with_frame(f"Agent{i}", {f"Agent{i}_output": bytes(1_000_000)})
+    before_drop = tracemalloc.get_traced_memory()[0]
+    untouched = context.frames()[0][1]
+    context = context.drop([f"Agent{i}_output" for i in range(4)])
+    after_drop = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"   drop 후 해제된 메모리: {(before_drop - after_drop) / 1e6:.1f}MB")
+    assert before_drop - after_drop >= 3_900_000
+    assert list(context) == ["user_input", "Agent4_output"]
+    assert context.frames()[0][1] == untouched  # 변경 없는 frame은 공유
+
+    # 깊은 체인: 병합 결과와 일치하고, 조회는 최대 CHECKPOINT_EVERY개 frame만 거침
+    deep = LayeredContext({"user_input": "깊이"})
+    expected = {"user_input": "깊이"}
+    for i in range(1000):
+        entries = {f"k{i}": i, f"k{i // 2}": -i}  # 이전 키 덮어쓰기 포함
+        deep = deep.with_frame(f"s{i}", entries)
+        expected.update(entries)
+    assert deep.to_dict() == expected and list(deep) == list(expected) and len(deep) == len(expected)
+    assert deep["k10"] == -21 and "k999" in deep and "missing" not in deep
+    start = time.perf_counter()
+    for _ in range(10000):
+        deep["user_input"]
+    lookup = (time.perf_counter() - start) / 10000
+    print(f"   깊이 {deep.depth} 컨텍스트 조회: {lookup * 1e6:.2f}μs")
+    assert lookup < 20e-6
+
+    # drop 이후 frame은 항목 dict를 복사하지 않고 공유
+    trimmed = deep.drop(["k3"])
+    assert "k3" not in trimmed and trimmed.to_dict() == {k: v for k, v in expected.items() if k != "k3"}
+    assert trimmed.frames()[-1][1] == deep.frames()[-1][1]
+    assert trimmed._entries is deep._entries
+
+    # DAG: 소비가 끝난 중간 출력은 결과에서 제거
+    agents = [MockAgent(f"Agent{i}", delay=0.01) for i in range(3)]
+    stages = [
+        AgentStage(agents[0], inputs=["user_input"]),
+        AgentStage(agents[1], inputs=["Agent0_output"]),
+        AgentStage(agents[2], inputs=["Agent1_output"]),
+    ]
+    lean = DAGChain(stages, retain_intermediate=False).execute("DAG")
+    full = DAGChain(stages).execute("DAG")
+    assert "Agent0_output" not in lean and "Agent2_output" in lean
+    assert all(f"Agent{i}_output" in full for i in range(3))
 
     return True
 
 
-def test_context_preservation():
-    """✅ 컨텍스트 보존 테스트"""
-    print("\n=== 테스트 6: Context Preservation ===")
+def test_context_budget():
+    """✅ 토큰 예산 기반 점진적 컨텍스트 로딩 테스트"""
+    print("\n=== 테스트 13: Context Budget ===")
+
+    class RecordingAgent(MockAgent):
+        """전달받은 컨텍스트 키 기록 + 큰 출력 생성"""
+
+        def __init__(self, name: str, context_keys: Optional[List[str]] = None):
+            super().__init__(name, delay=0, context_keys=context_keys)
+            self.seen: List[str] = []
+
+        async def execute_async(self, context: Dict[str, Any]) -> AgentResult:
+            self.seen = list(context)
+            result = await super().execute_async(context)
+            result.output["detail"] = f"{self.name} 상세 설계 " * 50
+            return result
+
+    budget = ContextBudget(
+        max_tokens=700,
+        priorities={"GameDesigner_output": 10, "examples": 5, "style_guide": 1},
+        summarizer=truncate_summary
+    )
+    loads = Counter()
+
+    def loader(name: str, size: int) -> Callable[[], str]:
+        def load() -> str:
+            loads[name] += 1
+            return f"{name} 예제 " * size
+        return load
+
+    budget.register_resource("examples", loader("examples", 60))
+    budget.register_resource("style_guide", loader("style_guide", 400), tokens=1200)
+    budget.register_resource("unused_resource", loader("unused_resource", 400))
 
     agents = [
-        MockAgent("Agent1"),
-        MockAgent("Agent2"),
-        MockAgent("Agent3")
+        RecordingAgent("GameDesigner", context_keys=["user_input", "examples"]),
+        RecordingAgent("Validator", context_keys=["user_input", "GameDesigner_output"]),
+        RecordingAgent("UXDesigner", context_keys=[
+            "user_input", "GameDesigner_output", "Validator_output", "style_guide"
+        ]),
+        RecordingAgent("Finalizer")  # 미선언 → 전체 키 (예산 내)
     ]
+    result = PromptChain(agents, context_budget=budget).execute("중세 왕국 배신 이벤트")
+    report = result["context_budget"]
 
-    chain = PromptChain(agents)
-    result = chain.execute("컨텍스트 테스트")
+    print(f"✅ 토큰: 전체 {report['tokens_full']} → 전달 {report['tokens_sent']} "
+          f"(절감 {report['tokens_saved']})")
+    for stage in report["stages"]:
+        print(f"   {stage['agent']}: {stage['tokens_sent']}/{stage['tokens_full']} "
+              f"loaded={stage['loaded']} summarized={stage['summarized']} evicted={stage['evicted']}")
 
-    # 모든 중간 결과가 보존되어야 함
-    print(f"✅ 컨텍스트 보존 확인")
-    print(f"   보존된 출력 수: {len([k for k in result.keys() if '_output' in k])}")
+    # 선언한 키만 전달
+    assert agents[0].seen == ["user_input", "examples"]
+    assert agents[1].seen == ["user_input", "GameDesigner_output"]
+    # 선언된 리소스만 지연 로드, 예산 초과 힌트가 있는 리소스는 로드조차 안 함
+    assert loads == Counter({"examples": 1})
+    assert "style_guide" in report["stages"][2]["evicted"]
+    # 우선순위 낮은 Validator 출력은 요약 또는 제외
+    ux = report["stages"][2]
+    assert "Validator_output" in ux["summarized"] + ux["evicted"]
+    assert all(stage["tokens_sent"] <= budget.max_tokens for stage in report["stages"])
+    assert report["tokens_saved"] > 0
+    # 체인 최종 결과는 모든 출력 보존
+    assert all(f"{agent.name}_output" in result for agent in agents)
 
-    for agent in agents:
-        key = f"{agent.name}_output"
-        assert key in result, f"{key} 누락"
-        print(f"   ✓ {key} 보존됨")
+    # 선언했지만 어디에도 없는 키는 보고
+    typo = RecordingAgent("Typo", context_keys=["user_input", "GameDesignr_output"])
+    typo_report = PromptChain([typo], context_budget=budget).execute("오타")["context_budget"]
+    assert typo_report["stages"][0]["missing"] == ["GameDesignr_output"]
+
+    # 요약 접미사까지 예산 안에 들어감
+    for limit in (8, 20, 100):
+        summary = truncate_summary("k", "긴 설계 문서 " * 200, limit)
+        assert summary.endswith("(요약)") and estimate_tokens(summary) <= limit, (limit, summary)
+    assert truncate_summary("k", "짧음", 100) == "짧음"
+
+    return True
+
+
+def test_single_flight():
+    """✅ 동일 in-flight 호출 병합 테스트 (asyncio + 스레드)"""
+    print("\n=== 테스트 14: Single-flight ===")
+
+    class CountingAgent(MockAgent):
+        def __init__(self, name: str, delay: float, fail: bool = False):
+            super().__init__(name, delay)
+            self.runs = 0
+            self.fail = fail
+
+        def execute(self, context: Dict[str, Any]) -> AgentResult:
+            self.runs += 1
+            if self.fail:
+                time.sleep(self.delay)
+                raise ValueError("upstream error")
+            return super().execute(context)
+
+        async def execute_async(self, context: Dict[str, Any]) -> AgentResult:
+            self.runs += 1
+            if self.fail:
+                await asyncio.sleep(self.delay)
+                raise ValueError("upstream error")
+            return await super().execute_async(context)
+
+    # asyncio: 동일 컨텍스트 20개 + 다른 컨텍스트 1개
+    inner = CountingAgent("EventWriter", delay=0.05)
+    agent = SingleFlightAgent(inner)
+
+    async def burst():
+        calls = [agent.execute_async({"user_input": "축제 이벤트"}) for _ in range(20)]
+        calls.append(agent.execute_async({"user_input": "전쟁 이벤트"}))
+        return await asyncio.gather(*calls)
+
+    start = time.perf_counter()
+    results = asyncio.run(burst())
+    elapsed = time.perf_counter() - start
+    stats = agent.stats()
+    print(f"✅ asyncio 21회 호출 → 실행 {inner.runs}회 ({elapsed:.3f}초), {stats}")
+    assert inner.runs == 2
+    assert stats["coalesced"] == 19 and stats["in_flight"] == 0
+    assert sum(1 for r in results if r.metadata.get("coalesced")) == 19
+    assert len({id(r) for r in results}) == 21  # 호출자별 별도 객체
+
+    # 완료 후에는 새로 실행 (결과 보관 안 함)
+    asyncio.run(agent.execute_async({"user_input": "축제 이벤트"}))
+    assert inner.runs == 3
+
+    # 스레드 + asyncio 혼합: 스레드가 대표 실행, 코루틴은 그 결과를 공유
+    mixed_inner = CountingAgent("Mixed", delay=0.1)
+    mixed = SingleFlightAgent(mixed_inner)
+    thread_results: List[AgentResult] = []
+    threads = [
+        threading.Thread(target=lambda: thread_results.append(mixed.execute({"user_input": "x"})))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.02)
+
+    async def join_from_loop():
+        return await asyncio.gather(*[mixed.execute_async({"user_input": "x"}) for _ in range(4)])
+
+    loop_results = asyncio.run(join_from_loop())
+    for thread in threads:
+        thread.join()
+    print(f"✅ 스레드 8 + 코루틴 4 → 실행 {mixed_inner.runs}회, {mixed.stats()}")
+    assert mixed_inner.runs == 1
+    assert mixed.stats()["coalesced"] == 11
+    assert len(thread_results) == 8 and len(loop_results) == 4
+
+    # 예외도 공유
+    failing_inner = CountingAgent("Failing", delay=0.05, fail=True)
+    failing = SingleFlightAgent(failing_inner)
+
+    async def failing_burst():
+        return await asyncio.gather(
+            *[failing.execute_async({"user_input": "y"}) for _ in range(5)],
+            return_exceptions=True
+        )
+
+    errors = asyncio.run(failing_burst())
+    assert failing_inner.runs == 1
+    assert all(isinstance(e, ValueError) for e in errors)
+    print(f"✅ 예외 공유: 실행 1회, 호출 5회 모두 ValueError")
+
+    # 취소는 해당 호출자에게만 적용 (대표 / 대기 호출 모두)
+    isolated_inner = CountingAgent("Isolated", delay=0.05)
+    isolated = SingleFlightAgent(isolated_inner)
+
+    async def cancel_some():
+        calls = [asyncio.ensure_future(isolated.execute_async({"user_input": "z"})) for _ in range(4)]
+        await asyncio.sleep(0.01)
+        calls[0].cancel()  # 대표
+        calls[2].cancel()  # 대기 호출
+        return await asyncio.gather(*calls, return_exceptions=True)
+
+    outcomes = asyncio.run(cancel_some())
+    assert isinstance(outcomes[0], asyncio.CancelledError) and isinstance(outcomes[2], asyncio.CancelledError)
+    assert all(isinstance(outcomes[i], AgentResult) for i in (1, 3)), outcomes
+    assert isolated_inner.runs == 1 and isolated.stats()["in_flight"] == 0
+    print(f"✅ 취소 격리: 대표/대기 호출 취소 후에도 나머지 2개 정상 완료")
+
+    return True
+
+
+def test_micro_batching():
+    """✅ Micro-batching 스케줄러 처리량 테스트"""
+    print("\n=== 테스트 15: Micro-batching ===")
+
+    n_chains = 64
+
+    async def run_chains(agents: List[Any]) -> List[Dict[str, Any]]:
+        chains = [PromptChain(agents) for _ in range(n_chains)]
+        return await asyncio.gather(
+            *[chain.execute_async(f"이벤트 {i}") for i, chain in enumerate(chains)]
+        )
+
+    # 호출마다 개별 요청 (동시 요청 4개 제한)
+    per_call_agents = [MockBatchAgent("Designer"), MockBatchAgent("Validator")]
+    start = time.perf_counter()
+    asyncio.run(run_chains(per_call_agents))
+    per_call = time.perf_counter() - start
+
+    # 동시 체인의 호출을 배치로 묶음
+    batch_agents = [MockBatchAgent("Designer"), MockBatchAgent("Validator")]
+    batchers = [MicroBatcher(agent, max_batch_size=16, max_wait=0.005) for agent in batch_agents]
+    start = time.perf_counter()
+    results = asyncio.run(run_chains(batchers))
+    batched = time.perf_counter() - start
+
+    stats = batchers[0].stats()
+    print(f"✅ {n_chains}개 체인 × 2 Agent")
+    print(f"   개별 호출: {per_call:.3f}초 (요청 {sum(a.requests for a in per_call_agents)}회)")
+    print(f"   배치 호출: {batched:.3f}초 (요청 {sum(a.requests for a in batch_agents)}회)")
+    print(f"   처리량 향상: {per_call / batched:.1f}x, Designer 통계: {stats}")
+
+    # 결과가 각 호출자에게 올바르게 돌아감
+    for i, result in enumerate(results):
+        assert result["Designer_output"]["processed_input"] == f"이벤트 {i}"
+        assert result["Validator_output"]["processed_input"] == f"이벤트 {i}"
+    assert stats["items"] == n_chains
+    assert stats["batches"] == n_chains // 16
+    assert per_call / batched > 3
+
+    # max_wait 트리거: 배치 크기에 못 미쳐도 대기 시간 후 전송
+    lone = MicroBatcher(MockBatchAgent("Lone", request_latency=0.01), max_batch_size=16, max_wait=0.01)
+
+    async def three_calls():
+        return await asyncio.gather(*[lone.execute_async({"user_input": str(i)}) for i in range(3)])
+
+    lone_results = asyncio.run(three_calls())
+    assert lone.stats()["flush_reasons"] == {"wait": 1}
+    assert [r.output["processed_input"] for r in lone_results] == ["0", "1", "2"]
+    assert all(r.metadata["batch_size"] == 3 for r in lone_results)
+
+    # 배치 실패는 모든 호출자에게 전달
+    class BrokenBatchAgent(MockBatchAgent):
+        async def execute_batch_async(self, contexts):
+            return []
+
+    broken = MicroBatcher(BrokenBatchAgent("Broken"), max_batch_size=4, max_wait=0.01)
+
+    async def broken_calls():
+        return await asyncio.gather(
+            *[broken.execute_async({"user_input": str(i)}) for i in range(4)],
+            return_exceptions=True
+        )
+
+    assert all(isinstance(e, ValueError) for e in asyncio.run(broken_calls()))
+
+    # 대기 중 취소된 호출자는 배치에서 제외
+    dropping_agent = MockBatchAgent("Dropping", request_latency=0.01)
+    dropping = MicroBatcher(dropping_agent, max_batch_size=16, max_wait=0.02)
+
+    async def cancel_one():
+        calls = [asyncio.ensure_future(dropping.execute_async({"user_input": str(i)})) for i in range(3)]
+        await asyncio.sleep(0)
+        calls[1].cancel()
+        return await asyncio.gather(*calls, return_exceptions=True)
+
+    dropped = asyncio.run(cancel_one())
+    assert isinstance(dropped[1], asyncio.CancelledError)
+    assert all(r.metadata["batch_size"] == 2 for r in (dropped[0], dropped[2]))
+    assert dropping.stats()["dropped"] == 1 and dropping.stats()["items"] == 2
+
+    # 배치 전송이 취소되어도 호출자가 영원히 기다리지 않음
+    stuck = MicroBatcher(MockBatchAgent("Stuck", request_latency=5.0), max_batch_size=2, max_wait=0.01)
+
+    async def cancel_batch():
+        calls = [asyncio.ensure_future(stuck.execute_async({"user_input": str(i)})) for i in range(2)]
+        await asyncio.sleep(0.01)
+        for task in list(stuck._queue(asyncio.get_running_loop()).in_flight):
+            task.cancel()
+        return await asyncio.wait_for(asyncio.gather(*calls, return_exceptions=True), timeout=1.0)
+
+    assert all(isinstance(e, asyncio.CancelledError) for e in asyncio.run(cancel_batch()))
+
+    # 루프가 바뀌어도 (asyncio.run 반복) 이전 루프의 timer에 묶이지 않음
+    reused = MicroBatcher(MockBatchAgent("Reused", request_latency=0.01), max_batch_size=16, max_wait=0.05)
+
+    async def abandon_wait():
+        call = asyncio.ensure_future(reused.execute_async({"user_input": "a"}))
+        await asyncio.sleep(0)
+        call.cancel()
+
+    asyncio.run(abandon_wait())
+    reused_result = asyncio.run(asyncio.wait_for(reused.execute_async({"user_input": "b"}), timeout=1.0))
+    assert reused_result.output["processed_input"] == "b"
+    assert reused.stats()["pending"] == 0
+    print(f"✅ 취소된 호출 제외, 배치 취소 시 호출자 해제, 루프별 대기열: {reused.stats()}")
+
+    return True
+
+
+def test_rate_limiting():
+    """✅ Agent/Provider별 한도, 우선순위 대기열, 대기 시간 분리 테스트"""
+    print("\n=== 테스트 16: Rate Limiting ===")
+
+    # 토큰 버킷 (가짜 시계)
+    now = [0.0]
+    bucket = TokenBucket(rate=10, capacity=2, clock=lambda: now[0])
+    assert bucket.wait_time(1) == 0
+    bucket.take(1)
+    bucket.take(1)
+    assert abs(bucket.wait_time(1) - 0.1) < 1e-9
+    now[0] += 0.1
+    assert bucket.wait_time(1) == 0
+    bucket.take(5)  # 용량 초과 요청은 빚으로 남음
+    assert abs(bucket.wait_time(1) - 0.5) < 1e-9
+
+    # 요청 수 한도: 초당 50회, burst 1
+    registry = RateLimitRegistry()
+    registry.configure("Writer", requests_per_second=50, burst=1)
+    previous = set_rate_limits(registry)
+    try:
+        writer = MockAgent("Writer", delay=0.01)
+
+        async def burst():
+            chains = [PromptChain([writer]) for _ in range(10)]
+            await asyncio.gather(*[chain.execute_async(f"이벤트 {i}") for i, chain in enumerate(chains)])
+
+        start = time.perf_counter()
+        asyncio.run(burst())
+        elapsed = time.perf_counter() - start
+        writer_stats = registry.stats()["Writer"]
+        print(f"✅ 10회 호출 @ 50rps: {elapsed:.3f}초")
+        print(f"   대기 p99 {writer_stats['queue_wait']['p99']:.3f}초, "
+              f"실행 p50 {writer_stats['execution']['p50']:.3f}초")
+        assert elapsed >= 9 / 50 * 0.9
+        assert writer_stats["queue_wait"]["p99"] > writer_stats["execution"]["p50"]
+        assert writer_stats["execution"]["p99"] < 0.1  # 실행 시간에 대기 시간이 섞이지 않음
+        assert writer_stats["throttled"] == 9
+
+        # provider 동시성 한도 + 우선순위 (높을수록 먼저, 같은 우선순위는 FIFO)
+        registry.configure("llm", max_concurrency=1)
+        order: List[str] = []
+        peak = [0]
+
+        class ProviderAgent(MockAgent):
+            provider = "llm"
+            running = 0
+
+            async def execute_async(self, context):
+                ProviderAgent.running += 1
+                peak[0] = max(peak[0], ProviderAgent.running)
+                order.append(context["user_input"])
+                try:
+                    return await super().execute_async(context)
+                finally:
+                    ProviderAgent.running -= 1
+
+        async def prioritized():
+            agent = ProviderAgent("Planner", delay=0.02)
+            tasks = [asyncio.create_task(execute_agent_async(agent, {"user_input": "first"}))]
+            await asyncio.sleep(0)
+            for name in ["low1", "low2", "low3"]:
+                tasks.append(asyncio.create_task(execute_agent_async(agent, {"user_input": name})))
+            with request_priority(5):
+                for name in ["high1", "high2"]:
+                    tasks.append(asyncio.create_task(execute_agent_async(agent, {"user_input": name})))
+            await asyncio.gather(*tasks)
+
+        asyncio.run(prioritized())
+        print(f"✅ 처리 순서: {order}")
+        assert order == ["first", "high1", "high2", "low1", "low2", "low3"]
+        assert peak[0] == 1
+        assert registry.stats()["llm"]["active"] == 0
+
+        # 토큰 한도: 컨텍스트 크기만큼 토큰 버킷 소비
+        registry.configure("Summarizer", tokens_per_second=2000, token_burst=200)
+        summarizer = MockAgent("Summarizer", delay=0)
+        big_context = {"user_input": "x" * 800}  # 약 200 토큰
+
+        async def token_limited():
+            await asyncio.gather(*[execute_agent_async(summarizer, big_context) for _ in range(4)])
+
+        start = time.perf_counter()
+        asyncio.run(token_limited())
+        elapsed = time.perf_counter() - start
+        print(f"✅ 토큰 한도: 4회 × ~200토큰 @ 2000tps → {elapsed:.3f}초")
+        assert elapsed >= 3 * 200 / 2000 * 0.9
+
+        # 루프 A에서 시간 초과로 남은 timer가 루프 B의 대기자를 막지 않음
+        registry.configure("Slow", requests_per_second=5, burst=1)
+        slow = MockAgent("Slow", delay=0)
+
+        async def give_up():
+            await execute_agent_async(slow, {"user_input": "a"})
+            try:
+                await asyncio.wait_for(execute_agent_async(slow, {"user_input": "b"}), timeout=0.01)
+            except asyncio.TimeoutError:
+                pass
+
+        asyncio.run(give_up())
+        start = time.perf_counter()
+        asyncio.run(asyncio.wait_for(execute_agent_async(slow, {"user_input": "c"}), timeout=1.0))
+        print(f"✅ 루프 교체 후 대기: {time.perf_counter() - start:.3f}초 (이전 루프 timer 무시)")
+
+        # 스레드마다 다른 루프에서 같은 동시성 한도 공유
+        registry.configure("Shared", max_concurrency=1)
+        shared_running = [0]
+        shared_peak = [0]
+
+        class SharedAgent(MockAgent):
+            async def execute_async(self, context):
+                shared_running[0] += 1
+                shared_peak[0] = max(shared_peak[0], shared_running[0])
+                try:
+                    return await super().execute_async(context)
+                finally:
+                    shared_running[0] -= 1
+
+        shared = SharedAgent("Shared", delay=0.01)
+
+        def worker():
+            async def calls():
+                for _ in range(5):
+                    await asyncio.wait_for(execute_agent_async(shared, {"user_input": "t"}), timeout=2.0)
+
+            asyncio.run(calls())
+
+        workers = [threading.Thread(target=worker) for _ in range(3)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        shared_stats = registry.stats()["Shared"]
+        print(f"✅ 스레드 3개 루프 × 5회: 최대 동시 {shared_peak[0]}, 통과 {shared_stats['queue_wait']['count']}")
+        assert shared_peak[0] == 1
+        assert shared_stats["queue_wait"]["count"] == 15 and shared_stats["active"] == 0
+
+        # 닫힌 것으로 확인되기 전에 루프가 닫히면 슬롯을 되돌리고 다음 대기자로 넘어감
+        closing_loop = asyncio.new_event_loop()
+        orphan = closing_loop.create_future()
+
+        def closed_loop_call(*_):
+            raise RuntimeError("Event loop is closed")
+
+        closing_loop.call_soon_threadsafe = closed_loop_call
+        closing = RateLimiter("Closing", max_concurrency=1)
+
+        async def acquire_after_orphan():
+            closing._waiters.append((0, -1, 0, orphan))
+            await asyncio.wait_for(closing.acquire(), timeout=1.0)
+            held = closing.stats()["active"]
+            closing.release()
+            return held
+
+        try:
+            held = asyncio.run(acquire_after_orphan())
+        finally:
+            del closing_loop.call_soon_threadsafe
+            closing_loop.close()
+        print(f"✅ 전달 중 닫힌 루프: 다음 대기자 통과, 보유 슬롯 {held} → {closing.stats()['active']}")
+        assert held == 1 and closing.stats()["active"] == 0 and not closing._waiters
+    finally:
+        set_rate_limits(previous)
+
+    return True
+
+
+def test_checkpoint_resume():
+    """✅ 체크포인트 저장 / 재시작 후 재개 테스트"""
+    print("\n=== 테스트 17: Checkpoint / Resume ===")
+
+    class CountingAgent(MockAgent):
+        def __init__(self, name: str, crash: bool = False):
+            super().__init__(name, delay=0.01)
+            self.calls = 0
+            self.crash = crash
+
+        async def execute_async(self, context: Dict[str, Any]) -> AgentResult:
+            self.calls += 1
+            if self.crash:
+                raise RuntimeError("프로세스 중단 시뮬레이션")
+            return await super().execute_async(context)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "checkpoints.db")
+        agents = [CountingAgent("Planner"), CountingAgent("Writer"), CountingAgent("Reviewer", crash=True)]
+
+        # 1차 실행: 세 번째 단계에서 실패
+        with ChainCheckpointStore(db_path, flush_every=100) as store:
+            try:
+                PromptChain(agents, checkpoint=store).execute("왕국 이벤트", run_id="run-1")
+                raise AssertionError("실패해야 함")
+            except RuntimeError:
+                pass
+
+        # 재시작: 새 저장소 인스턴스로 같은 run_id 재개
+        agents[2].crash = False
+        with ChainCheckpointStore(db_path) as store:
+            result = PromptChain(agents, checkpoint=store).execute("왕국 이벤트", run_id="run-1")
+            print(f"✅ 재개: {result['resumed_stages']}개 단계 건너뜀, "
+                  f"호출 수 {[a.calls for a in agents]}")
+            assert result["resumed_stages"] == 2
+            assert [a.calls for a in agents] == [1, 1, 2]
+            assert result["chain_results"][0].metadata["resumed"]
+            assert result["Planner_output"]["processed_input"] == "왕국 이벤트"
+
+            # 입력이 다르면 같은 run_id를 재사용할 수 없음
+            try:
+                PromptChain(agents, checkpoint=store).execute("다른 입력", run_id="run-1")
+                raise AssertionError("불일치 감지 실패")
+            except ValueError as e:
+                assert "mismatch" in str(e)
+
+            # RobustAgentChain도 동일하게 재개
+            robust_agents = [CountingAgent("Designer"), CountingAgent("Balancer", crash=True)]
+            chain = RobustAgentChain(
+                robust_agents,
+                retry_budget=RetryBudget(),
+                circuit_breakers=CircuitBreakerRegistry(),
+                checkpoint=store
+            )
+            try:
+                chain.execute("축제 이벤트", run_id="robust-1")
+            except RuntimeError:
+                pass
+            robust_agents[1].crash = False
+            robust = chain.execute("축제 이벤트", run_id="robust-1")
+            assert robust["resumed_stages"] == 1
+            assert [a.calls for a in robust_agents] == [1, 2]
+
+        # 실제 프로세스 강제 종료 (SIGKILL): 기본 정책은 완료된 단계를 모두 보존
+        def killed_run(db: str, fsync: str) -> int:
+            script = (
+                "import os, signal, sys\n"
+                f"sys.path.insert(0, {os.path.dirname(os.path.abspath(__file__))!r})\n"
+                "from validate_agent_chains import ChainCheckpointStore, MockAgent, PromptChain\n"
+                "class Killer(MockAgent):\n"
+                "    async def execute_async(self, context):\n"
+                "        if hasattr(signal, 'SIGKILL'):\n"
+                "            os.kill(os.getpid(), signal.SIGKILL)\n"
+                "        os._exit(137)\n"
+                f"store = ChainCheckpointStore({db!r}, fsync={fsync!r})\n"
+                "agents = [MockAgent('Planner', delay=0), MockAgent('Writer', delay=0), Killer('Reviewer')]\n"
+                "PromptChain(agents, checkpoint=store).execute('왕국 이벤트', run_id='kill-1')\n"
+            )
+            return subprocess.run([sys.executable, "-c", script], capture_output=True).returncode
+
+        kill_path = os.path.join(tmp, "killed.db")
+        assert killed_run(kill_path, "always") != 0
+        with ChainCheckpointStore(kill_path) as store:
+            survived = sorted(store.load("kill-1"))
+            killed_agents = [CountingAgent("Planner"), CountingAgent("Writer"), CountingAgent("Reviewer")]
+            resumed = PromptChain(killed_agents, checkpoint=store).execute("왕국 이벤트", run_id="kill-1")
+        batch_path = os.path.join(tmp, "killed-batch.db")
+        assert killed_run(batch_path, "batch") != 0
+        with ChainCheckpointStore(batch_path) as store:
+            lost = sorted(store.load("kill-1"))
+        print(f"✅ SIGKILL 후 보존 단계: always {survived}, batch {lost}")
+        assert survived == [0, 1] and lost == []
+        assert resumed["resumed_stages"] == 2 and [a.calls for a in killed_agents] == [0, 0, 1]
+
+        # JSON으로 되돌릴 수 없는 출력은 기록 전에 거부
+        with ChainCheckpointStore(os.path.join(tmp, "strict.db")) as store:
+            for output in [{"at": object()}, {"pair": (1, 2)}, {1: "int key"}, {"score": float("nan")}]:
+                try:
+                    store.record("strict", 0, "Agent", "h", output)
+                    raise AssertionError(f"거부되어야 함: {output!r}")
+                except TypeError:
+                    pass
+            assert store.load("strict") == {}
+
+        # fsync 정책별 기록 비용 (단계 200개)
+        for policy in FSYNC_POLICIES:
+            with ChainCheckpointStore(os.path.join(tmp, f"{policy}.db"), fsync=policy) as store:
+                start = time.perf_counter()
+                for stage in range(200):
+                    store.record("bench", stage, "Agent", "h", {"result": "x" * 200})
+                store.flush()
+                elapsed = time.perf_counter() - start
+                print(f"   fsync={policy:6s}: 200단계 {elapsed * 1000:.1f}ms (flush {store.flushes}회)")
+                if policy == "batch":
+                    assert store.flushes < 200
+
+    return True
+
+
+def test_speculative_branch():
+    """✅ ConditionalChain 추측 실행 테스트 (적응형 on/off + 절감/낭비 집계)"""
+    print("\n=== 테스트 18: Speculative Branch ===")
+
+    scores = []
+
+    async def slow_validator(output: Dict) -> Dict:
+        await asyncio.sleep(0.05)
+        score = scores.pop(0)
+        return {"score": score, "issues": [] if score >= 0.8 else ["품질 미달"]}
+
+    def make_chain(mode: str) -> ConditionalChain:
+        return ConditionalChain(
+            initial_agent=MockAgent("Draft", delay=0.02),
+            validator=slow_validator,
+            high_quality_agent=MockAgent("Polish", delay=0.05),
+            low_quality_agent=MockAgent("Redesign", delay=0.02),
+            speculative=mode
+        )
+
+    def timed_runs(chain: ConditionalChain, pattern: List[float]) -> float:
+        scores.extend(pattern)
+        start = time.perf_counter()
+        for _ in pattern:
+            chain.execute("축제 이벤트")
+        return time.perf_counter() - start
+
+    high_runs = [0.9] * 8
+    baseline = timed_runs(make_chain("off"), high_runs)
+    adaptive = make_chain("auto")
+    speculative = timed_runs(adaptive, high_runs)
+    stats = adaptive.speculation_stats()
+    print(f"✅ 고품질 8회: 순차 {baseline:.3f}초 → 추측 {speculative:.3f}초")
+    print(f"   {stats}")
+    # 첫 실행은 사전 확률 0.5 < 0.6이라 추측하지 않음, 이후 학습하여 추측
+    assert stats["speculated"] == 7 and stats["hits"] == 7
+    assert stats["latency_saved"] > 7 * 0.04
+    assert speculative < baseline - 0.2
+
+    # 분기 패턴이 저품질로 바뀌면 낭비 호출 후 추측 중단
+    timed_runs(adaptive, [0.5] * 6)
+    stats = adaptive.speculation_stats()
+    print(f"✅ 저품질 전환 후: 낭비 호출 {stats['wasted_calls']}회, 고품질 확률 {stats['high_probability']:.2f}")
+    assert stats["wasted_calls"] == 2
+    assert stats["speculated"] == 9
+
+    # 빗나간 추측은 결과에 영향 없음 (저품질 분기 결과 반환)
+    always = make_chain("always")
+    scores.append(0.3)
+    result = always.execute("축제 이벤트")
+    assert result["branch_taken"] == "low_quality_retry"
+    assert result["final"].agent_name == "Redesign"
+    assert result["speculation"] == {"speculated": True, "hit": False, "latency_saved": 0.0}
+
+    # 빗나간 추측이 실패해도 저품질 분기 결과 반환 (낭비 호출로만 집계)
+    class FailingPolish(MockAgent):
+        async def execute_async(self, context):
+            raise RuntimeError("추측 호출 실패")
+
+    failing = make_chain("always")
+    failing.high_quality_agent = FailingPolish("Polish")
+    scores.append(0.3)
+    result = failing.execute("축제 이벤트")
+    assert result["final"].agent_name == "Redesign"
+    assert failing.speculation_stats()["wasted_calls"] == 1
+
+    # 검증기가 실패하면 추측 호출을 취소 (고아 task 없음)
+    polish_state = []
+
+    class TrackedPolish(MockAgent):
+        async def execute_async(self, context):
+            try:
+                return await super().execute_async(context)
+            except asyncio.CancelledError:
+                polish_state.append("cancelled")
+                raise
+
+    async def broken_validator(output: Dict) -> Dict:
+        await asyncio.sleep(0.01)
+        raise ValueError("검증기 오류")
+
+    orphan = make_chain("always")
+    orphan.validator = broken_validator
+    orphan.high_quality_agent = TrackedPolish("Polish", delay=0.5)
+
+    async def run_and_count_tasks():
+        try:
+            await orphan.execute_async("축제 이벤트")
+            raise AssertionError("검증기 예외가 전달되어야 함")
+        except ValueError:
+            pass
+        return len(asyncio.all_tasks()) - 1
+
+    assert asyncio.run(run_and_count_tasks()) == 0
+    assert polish_state == ["cancelled"] and orphan.speculation_stats()["wasted_calls"] == 1
+    print("✅ 추측 호출 실패 무시, 검증기 실패 시 추측 호출 취소")
+
+    return True
+
+
+def test_hedged_requests():
+    """✅ Hedged request로 heavy-tail 지연의 p99 단축 테스트"""
+    print("\n=== 테스트 19: Hedged Requests ===")
+
+    # 대부분 ~10ms, 4% 확률로 100~200ms (heavy tail)
+    heavy_tail = LatencyModel(kind="heavy_tail", mean=0.01, sigma=0.1, tail_prob=0.04, max_factor=20)
+
+    def HeavyTailAgent(name: str, seed: int) -> BenchAgent:
+        return BenchAgent(name, heavy_tail, seed=seed)
+
+    def run(agent: Any, total: int = 400, wave: int = 50) -> List[float]:
+        latencies: List[float] = []
+
+        async def timed(i: int):
+            start = time.perf_counter()
+            await execute_agent_async(agent, {"user_input": f"요청 {i}"})
+            latencies.append(time.perf_counter() - start)
+
+        async def waves():
+            for offset in range(0, total, wave):
+                await asyncio.gather(*[timed(offset + i) for i in range(wave)])
+
+        asyncio.run(waves())
+        return sorted(latencies)
+
+    def p99(values: List[float]) -> float:
+        return values[int(len(values) * 0.99) - 1]
+
+    plain = run(HeavyTailAgent("Writer", seed=22))
+    inner = HeavyTailAgent("Writer", seed=22)
+    hedged_agent = HedgedAgent(inner, max_hedge_rate=0.1)
+    hedged = run(hedged_agent)
+    stats = hedged_agent.stats()
+
+    print(f"✅ p99 지연: 기본 {p99(plain) * 1000:.1f}ms → hedged {p99(hedged) * 1000:.1f}ms")
+    print(f"   hedge {stats['hedges']}회 ({stats['hedge_rate']:.1%}), 복제 승리 {stats['hedge_wins']}회, "
+          f"대기 기준 {stats['hedge_delay'] * 1000:.1f}ms")
+    assert p99(hedged) < p99(plain) / 2
+    assert stats["hedge_rate"] <= 0.1
+    assert inner.calls == stats["calls"] + stats["hedges"]
+
+    # 복제 비율 상한: max_hedge_rate=0이면 절대 복제하지 않음
+    capped = HedgedAgent(HeavyTailAgent("Capped", seed=22), max_hedge_rate=0.0)
+    run(capped, total=100)
+    assert capped.stats()["hedges"] == 0 and capped.stats()["rate_limited"] > 0
+
+    # 대기 기준은 refresh_every개 관측마다만 다시 계산 (호출마다 정렬하지 않음)
+    sorts = [0]
+    percentile = hedged_agent.latency.percentile
+
+    def counting_percentile(q: float) -> float:
+        sorts[0] += 1
+        return percentile(q)
+
+    hedged_agent.latency.percentile = counting_percentile
+    observed = hedged_agent.latency.count
+    run(hedged_agent, total=150)
+    observed = hedged_agent.latency.count - observed
+    print(f"✅ 호출 150회(관측 {observed}개) 동안 백분위 재계산 {sorts[0]}회")
+    assert sorts[0] <= observed // hedged_agent.refresh_every + 1
+
+    # 대기 기준은 호출 각각의 지연으로 계산 (복제로 단축된 종단 지연이 아님)
+    class ScriptedAgent(MockAgent):
+        def __init__(self, name: str, delays: List[float]):
+            super().__init__(name)
+            self.delays = iter(delays)
+
+        async def execute_async(self, context: Dict[str, Any]) -> AgentResult:
+            self.delay = next(self.delays)
+            return await super().execute_async(context)
+
+    # 관측 5회(30ms) → 원 호출 1초/복제 30ms → 원 호출 45ms/복제 1초
+    scripted = HedgedAgent(
+        ScriptedAgent("Scripted", [0.03] * 5 + [1.0, 0.03, 0.045, 1.0]), max_hedge_rate=1.0, min_samples=5
+    )
+
+    async def scripted_calls() -> List[float]:
+        elapsed = []
+        for _ in range(7):
+            start = time.perf_counter()
+            await scripted.execute_async({"user_input": "x"})
+            elapsed.append(time.perf_counter() - start)
+        return elapsed
+
+    elapsed = asyncio.run(scripted_calls())
+    delay = scripted.hedge_delay()
+    hedge_won, primary_lost, primary_won = scripted.latency.samples[5:]
+    print(f"✅ 복제 승리: 종단 {elapsed[5] * 1000:.0f}ms, 기록 = 복제 {hedge_won * 1000:.0f}ms"
+          f" + 원 호출 하한 {primary_lost * 1000:.0f}ms (대기 기준 {delay * 1000:.0f}ms)")
+    assert scripted.stats()["hedges"] == 2 and scripted.hedge_wins == 1
+    assert scripted.latency.count == 8  # 원 호출 승리 시 취소된 복제는 기록 안 함
+    assert hedge_won < elapsed[5] - delay / 2  # 복제 자체의 지연
+    assert primary_lost >= delay and primary_won >= delay
+
+    # 복제는 바깥 lease 안에서 실행: max_concurrency=1이어도 lease 뒤에 줄 서지 않음
+    registry = RateLimitRegistry()
+    registry.configure("Limited", max_concurrency=1)
+    limited = HedgedAgent(HeavyTailAgent("Limited", seed=7), max_hedge_rate=0.1)
+    previous = set_rate_limits(registry)
+    tracer = Tracer()
+    previous_tracer = set_tracer(tracer)
+    try:
+        run(limited, total=200, wave=10)
+    finally:
+        set_rate_limits(previous)
+        set_tracer(previous_tracer)
+    limited_stats = limited.stats()
+    hedge_spans = [span for span in tracer.spans if span.kind == "hedge"]
+    retry_spans = [span for span in tracer.spans if span.kind == "attempt" and span.attributes.get("attempt") != 0]
+    print(f"✅ max_concurrency=1: hedge {limited_stats['hedges']}회 중 복제 승리 {limited_stats['hedge_wins']}회")
+    assert limited_stats["hedges"] > 0 and limited_stats["hedge_wins"] > 0
+    assert registry.stats()["Limited"]["queue_wait"]["count"] == limited_stats["calls"]
+    assert tracer.histograms["Limited"].count == limited_stats["calls"]
+    assert len(hedge_spans) == limited_stats["hedges"] and not retry_spans
+
+    return True
+
+
+def test_streaming_chain():
+    """✅ 단계 간 스트리밍 파이프라인 테스트 (첫 결과 시간 + backpressure)"""
+    print("\n=== 테스트 20: Streaming Chain ===")
+
+    def make_agents() -> List[MockStreamingAgent]:
+        return [MockStreamingAgent(f"Stage{i}", chunks=5, chunk_delay=0.02) for i in range(3)]
+
+    # 순차 실행: 단계마다 전체 출력 완성 후 다음 단계
+    start = time.perf_counter()
+    PromptChain(make_agents()).execute("스트리밍 이벤트")
+    sequential = time.perf_counter() - start
+
+    result = StreamingPromptChain(make_agents()).execute_streaming("스트리밍 이벤트")
+    print(f"✅ 순차 {sequential:.3f}초 → 스트리밍 첫 결과 {result['time_to_first_chunk']:.3f}초, "
+          f"전체 {result['total_time']:.3f}초")
+    print(f"   첫 청크: {result['final_chunks'][0]}")
+    assert result["time_to_first_chunk"] < sequential / 3
+    assert result["total_time"] < sequential * 0.7
+    assert result["final_chunks"][0] == "Stage2(Stage1(Stage0[0]))"
+    assert len(result["final_chunks"]) == 5
+    # 모든 단계 출력이 컨텍스트에 남음
+    assert result["Stage0_output"]["chunks"] == [f"Stage0[{i}]" for i in range(5)]
+    assert result["Stage2_output"]["result"] == "".join(result["final_chunks"])
+
+    # 스트림 입력 미지원 Agent는 barrier: 이전 출력 완성 후 실행
+    mixed = StreamingPromptChain([
+        MockStreamingAgent("Writer", chunks=3, chunk_delay=0.01),
+        MockAgent("Reviewer", delay=0.01),
+        MockStreamingAgent("Polisher", chunks=3, chunk_delay=0.01)
+    ]).execute_streaming("혼합 체인")
+    assert mixed["Writer_output"]["chunks"] == ["Writer[0]", "Writer[1]", "Writer[2]"]
+    assert mixed["Reviewer_output"]["agent"] == "Reviewer"
+    # 비스트리밍 Agent의 출력은 청크 1개로 다음 단계에 전달
+    assert len(mixed["final_chunks"]) == 1
+    assert mixed["final_chunks"][0].startswith("Polisher(")
+
+    # backpressure: 느린 소비자 앞에서 생산자가 buffer_size 이상 앞서지 않음
+    produced = []
+
+    class CountingProducer(MockStreamingAgent):
+        async def stream_async(self, context, upstream=None):
+            for i in range(20):
+                produced.append(i)
+                yield i
+
+    async def slow_consume():
+        lead = 0
+        chain = StreamingPromptChain([CountingProducer("Producer")], buffer_size=2)
+        consumed = 0
+        async for _ in chain.stream_async("느린 소비자"):
+            consumed += 1
+            lead = max(lead, len(produced) - consumed)
+            await asyncio.sleep(0.002)
+        return lead
+
+    lead = asyncio.run(slow_consume())
+    print(f"✅ backpressure: 생산자 최대 선행 {lead}청크 (buffer_size=2)")
+    assert lead <= 3
+
+    # 소비자가 일찍 멈추면 모든 단계 task가 정리된 뒤에 aclose()가 끝남
+    async def stop_early():
+        stream = StreamingPromptChain(make_agents()).stream_async("조기 종료")
+        async for _ in stream:
+            break
+        await stream.aclose()
+        return len(asyncio.all_tasks()) - 1
+
+    assert asyncio.run(stop_early()) == 0
 
     return True
 
@@ -372,6 +4444,20 @@ if __name__ == "__main__":
     results.append(("Meta-Prompting", test_meta_prompting()))
     results.append(("Performance", test_chaining_performance()))
     results.append(("Context Preservation", test_context_preservation()))
+    results.append(("Async Multiplexing", test_async_multiplexing()))
+    results.append(("Parallel Ensemble", test_parallel_ensemble()))
+    results.append(("Result Cache", test_result_cache()))
+    results.append(("Retry Policies", test_retry_policies()))
+    results.append(("Tracing", test_tracing()))
+    results.append(("Layered Context", test_layered_context()))
+    results.append(("Context Budget", test_context_budget()))
+    results.append(("Single-flight", test_single_flight()))
+    results.append(("Micro-batching", test_micro_batching()))
+    results.append(("Rate Limiting", test_rate_limiting()))
+    results.append(("Checkpoint / Resume", test_checkpoint_resume()))
+    results.append(("Speculative Branch", test_speculative_branch()))
+    results.append(("Hedged Requests", test_hedged_requests()))
+    results.append(("Streaming Chain", test_streaming_chain()))
 
     print("\n" + "=" * 60)
     print("테스트 결과 요약")
@@ -0,0 +1,671 @@
+#!/usr/bin/env python3
+"""AI Agent Master Guide - Skill 레지스트리 (인덱스 + 캐시) 검증"""
+
+from typing import Any, Dict, List, Optional, Tuple
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+
+# ============================================================
+# 1. Skill 인덱스 (가이드 Section 2.1 / 3.3)
+# ============================================================
+
+SKILL_FILE = "SKILL.md"
+CONTEXT_LEVELS = ("minimal", "standard", "full")
+
+
+@dataclass(frozen=True)
+class Skill:
+    """파싱된 Skill (SKILL.md 본문 + front matter + 리소스 목록)"""
+    name: str
+    path: Path
+    system_prompt: str
+    metadata: Dict[str, str] = field(default_factory=dict)
+    resources: Tuple[str, ...] = ()
+
+
+def parse_skill_md(text: str) -> Tuple[Dict[str, str], str]:
+    """'---' 로 둘러싼 front matter(key: value)와 본문 분리"""
+    if not text.startswith("---\n"):
+        return {}, text
+    end = text.find("\n---", 4)
+    if end == -1:
+        return {}, text
+    metadata = {}
+    for line in text[4:end].splitlines():
+        key, sep, value = line.partition(":")
+        if sep:
+            metadata[key.strip()] = value.strip()
+    body = text[end + 4:]
+    return metadata, body[1:] if body.startswith("\n") else body
+
+
+class SkillRegistry:
+    """~/.claude/skills 인덱스 + 파싱 결과 캐시
+
+    생성 시 디렉토리를 한 번만 스캔하여 Skill별 파일 시그니처(mtime_ns, 크기)를
+    인덱싱한다. 이후 names()/load()/load_skill()/resource()는 잠금 아래의
+    메모리 조회만 한다. 변경 감지는 refresh()가 담당하며 전체 파일을 stat하므로
+    O(파일 수)이다. 호출 방법은 두 가지:
+      - watch_interval: 백그라운드 스레드가 주기적으로 refresh() (요청 경로는 조회만)
+      - poll_interval: 조회 시 마지막 갱신 후 그 시간이 지났으면 그 호출이 refresh()
+    refresh()는 시그니처가 바뀐 Skill의 캐시만 무효화한다.
+    파일은 한 번 읽어 디코딩한 문자열만 캐시하므로 열린 파일/매핑이 남지 않는다.
+    """
+
+    def __init__(
+        self,
+        root: str = "~/.claude/skills",
+        poll_interval: Optional[float] = None,
+        clock=time.monotonic,
+        watch_interval: Optional[float] = None
+    ):
+        self.root = Path(root).expanduser()
+        self.poll_interval = poll_interval
+        self.clock = clock
+        self._lock = threading.RLock()
+        self._signatures: Dict[str, Dict[str, Tuple[int, int]]] = {}
+        self._names: Tuple[str, ...] = ()
+        self._skills: Dict[str, Skill] = {}
+        self._texts: Dict[Tuple[str, str], Tuple[Tuple[int, int], str]] = {}
+        self._composed: Dict[Tuple[str, str], str] = {}
+        self._last_refresh = 0.0
+        self._scan_seq = 0
+        self._applied_seq = 0
+        self.counters = Counter()
+        self.refresh()
+
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+        if watch_interval is not None:
+            self._watcher = threading.Thread(
+                target=self._watch, args=(watch_interval,), name="skill-registry-watch", daemon=True
+            )
+            self._watcher.start()
+
+    # ---------------- 인덱스 ----------------
+
+    def refresh(self) -> Dict[str, List[str]]:
+        """변경 사항 반영. {"added": [...], "removed": [...], "changed": [...]} 반환
+
+        디렉터리 스캔은 잠금 밖에서 하고 비교/무효화/교체만 잠금 안에서 하므로
+        스캔 중에도 load가 막히지 않는다. 나중에 시작한 스캔이 먼저 반영되었으면
+        이 스캔 결과는 버린다.
+        """
+        with self._lock:
+            self._scan_seq += 1
+            seq = self._scan_seq
+        current = {}
+        if self.root.is_dir():
+            with os.scandir(self.root) as entries:
+                for entry in entries:
+                    if entry.is_dir() and os.path.isfile(os.path.join(entry.path, SKILL_FILE)):
+                        current[entry.name] = self._scan_skill(Path(entry.path))
+
+        with self._lock:
+            self.counters["refreshes"] += 1
+            self.counters["stats"] += sum(len(signature) for signature in current.values())
+            if seq < self._applied_seq:
+                return {"added": [], "removed": [], "changed": []}
+            self._applied_seq = seq
+
+            added = sorted(set(current) - set(self._signatures))
+            removed = sorted(set(self._signatures) - set(current))
+            changed = sorted(
+                name for name in set(current) & set(self._signatures)
+                if current[name] != self._signatures[name]
+            )
+            for name in removed:
+                self._invalidate(name, self._signatures[name])
+            for name in changed:
+                old, new = self._signatures[name], current[name]
+                self._invalidate(name, {rel: sig for rel, sig in old.items() if new.get(rel) != sig})
+
+            self._signatures = current
+            self._names = tuple(sorted(current))
+            self._last_refresh = self.clock()
+            return {"added": added, "removed": removed, "changed": changed}
+
+    def names(self) -> List[str]:
+        """Skill 이름 목록 (INPUT_TYPES용)"""
+        self._maybe_refresh()
+        return list(self._names)
+
+    def _scan_skill(self, skill_dir: Path) -> Dict[str, Tuple[int, int]]:
+        signature = {}
+        for dirpath, dirnames, filenames in os.walk(skill_dir):
+            dirnames.sort()
+            for filename in sorted(filenames):
+                path = os.path.join(dirpath, filename)
+                stat = os.stat(path)
+                rel = os.path.relpath(path, skill_dir).replace(os.sep, "/")
+                signature[rel] = (stat.st_mtime_ns, stat.st_size)
+        return signature
+
+    def _invalidate(self, name: str, files: Dict[str, Tuple[int, int]]):
+        for rel in files:
+            self._texts.pop((name, rel), None)
+        self._skills.pop(name, None)  # 리소스 목록도 바뀔 수 있으므로 항상 재파싱
+        for level in CONTEXT_LEVELS:
+            self._composed.pop((name, level), None)
+
+    def _maybe_refresh(self):
+        if self.poll_interval is not None and self.clock() - self._last_refresh >= self.poll_interval:
+            self.refresh()
+
+    def _watch(self, interval: float):
+        while not self._stop.wait(interval):
+            try:
+                self.refresh()
+            except OSError:
+                with self._lock:  # 스캔 도중 삭제된 파일 등 - 다음 주기에 재시도
+                    self.counters["refresh_errors"] += 1
+
+    # ---------------- 로드 ----------------
+
+    def load(self, name: str) -> Skill:
+        """파싱된 Skill (캐시)"""
+        self._maybe_refresh()
+        with self._lock:
+            skill = self._skills.get(name)
+            if skill is not None:
+                self.counters["hits"] += 1
+                return skill
+            if name not in self._signatures:
+                raise KeyError(f"등록되지 않은 Skill: {name}")
+            self.counters["misses"] += 1
+            metadata, body = parse_skill_md(self._text(name, SKILL_FILE))
+            resources = tuple(rel for rel in self._signatures[name] if rel != SKILL_FILE)
+            skill = Skill(name, self.root / name, body, metadata, resources)
+            self._skills[name] = skill
+            return skill
+
+    def resource(self, name: str, rel: str) -> str:
+        """Skill 디렉토리 기준 상대 경로 리소스 본문 (캐시)"""
+        self._maybe_refresh()
+        with self._lock:
+            if rel not in self._signatures.get(name, {}):
+                raise KeyError(f"{name}: 리소스 없음 {rel}")
+            return self._text(name, rel)
+
+    def load_skill(self, name: str, context_level: str = "minimal") -> str:
+        """가이드 Section 3.2의 progressive disclosure 조합 결과 (캐시)
+
+        - minimal: SKILL.md 본문
+        - standard: + resources/*.json
+        - full: + resources/examples/*.yaml
+        """
+        if context_level not in CONTEXT_LEVELS:
+            raise ValueError(f"지원하지 않는 context_level: {context_level} (가능: {CONTEXT_LEVELS})")
+        self._maybe_refresh()
+        key = (name, context_level)
+        # 조합과 저장을 한 잠금 안에서 - 도중에 refresh()가 끼어 옛 본문을 저장하지 않도록
+        with self._lock:
+            composed = self._composed.get(key)
+            if composed is not None:
+                self.counters["hits"] += 1
+                return composed
+
+            skill = self.load(name)
+            parts = [skill.system_prompt]
+            if context_level in ("standard", "full"):
+                parts += [
+                    self.resource(name, rel) for rel in skill.resources
+                    if rel.startswith("resources/") and rel.count("/") == 1 and rel.endswith(".json")
+                ]
+            if context_level == "full":
+                parts += [
+                    f"\n\n## 예제: {rel.rsplit('/', 1)[-1]}\n{self.resource(name, rel)}"
+                    for rel in skill.resources
+                    if rel.startswith("resources/examples/") and rel.endswith(".yaml")
+                ]
+            composed = self._composed[key] = "".join(parts)
+            return composed
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "skills": len(self._names),
+                "cached_skills": len(self._skills),
+                "cached_files": len(self._texts),
+                **self.counters
+            }
+
+    def close(self):
+        """감시 스레드 종료 + 캐시 비우기"""
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+        with self._lock:
+            self._texts.clear()
+
+    def _text(self, name: str, rel: str) -> str:
+        signature = self._signatures[name][rel]
+        cached = self._texts.get((name, rel))
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        self.counters["file_reads"] += 1
+        text = (self.root / name / rel).read_bytes().decode("utf-8")
+        self._texts[(name, rel)] = (signature, text)
+        return text
+
+
+# ============================================================
+# 2. Executor 노드 (가이드 Section 3.3)
+# ============================================================
+
+@dataclass
+class SkillResponse:
+    """call_claude 응답 (text + tool_use 결과)"""
+    text: str
+    tool_calls: Dict[str, Any] = field(default_factory=dict)
+
+
+class ClaudeSkill_Executor:
+    """범용 Skill 실행 노드 - 공유 SkillRegistry 사용
+
+    INPUT_TYPES는 인덱스의 이름 목록을, execute는 캐시된 Skill을 사용하므로
+    요청 경로에서 디렉토리 스캔이나 SKILL.md 재읽기가 없다 (변경 감지는 기본
+    레지스트리의 백그라운드 감시 스레드가 watch_interval마다 수행).
+    context_files도 (경로, mtime_ns, 크기)가 같으면 캐시를 재사용하며,
+    최근 사용한 CONTEXT_CACHE_SIZE개까지만 보관한다.
+    call_claude는 Mock 응답을 반환하며 실제 노드에서 API 호출로 교체한다.
+    """
+
+    registry: Optional[SkillRegistry] = None
+    CONTEXT_CACHE_SIZE = 64
+    _context_cache: "OrderedDict[str, Tuple[Tuple[int, int], str]]" = OrderedDict()
+    _context_lock = threading.Lock()
+    _registry_lock = threading.Lock()
+
+    RETURN_TYPES = ("STRING", "DICT")
+    FUNCTION = "execute"
+
+    @classmethod
+    def get_registry(cls) -> SkillRegistry:
+        with cls._registry_lock:
+            if cls.registry is None:
+                cls.registry = SkillRegistry(watch_interval=2.0)
+            return cls.registry
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        skills = cls.get_registry().names()
+        return {
+            "required": {
+                "skill_name": (skills, {"default": "gamedesigner"}),
+                "prompt": ("STRING", {"multiline": True}),
+            },
+            "optional": {
+                "context_files": ("STRING", {"default": ""}),  # 쉼표 구분 파일 경로
+            }
+        }
+
+    def prepare(self, skill_name: str, prompt: str, context_files: str = "") -> Tuple[str, str]:
+        """(system_prompt, prompt) 구성"""
+        system_prompt = self.get_registry().load_skill(skill_name)
+        if context_files:
+            extra = [self._read_context(path.strip()) for path in context_files.split(",") if path.strip()]
+            system_prompt = "\n\n".join([system_prompt, *extra])
+        return system_prompt, prompt
+
+    def execute(self, skill_name: str, prompt: str, context_files: str = ""):
+        system_prompt, prompt = self.prepare(skill_name, prompt, context_files)
+        response = self.call_claude(system_prompt, prompt)
+        return (response.text, self.parse_tool_calls(response))
+
+    def call_claude(self, system_prompt: str, prompt: str) -> SkillResponse:
+        """Claude API 호출 (Mock)"""
+        return SkillResponse(
+            text=f"[Mock] system {len(system_prompt)}자 기반 응답: {prompt}",
+            tool_calls={}
+        )
+
+    def parse_tool_calls(self, response) -> Dict[str, Any]:
+        return getattr(response, "tool_calls", {})
+
+    def _read_context(self, path: str) -> str:
+        stat = os.stat(path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        cache = self._context_cache
+        with self._context_lock:
+            cached = cache.get(path)
+            if cached is not None and cached[0] == signature:
+                cache.move_to_end(path)
+                return cached[1]
+        text = Path(path).read_text(encoding="utf-8")
+        with self._context_lock:
+            cache[path] = (signature, text)
+            cache.move_to_end(path)
+            while len(cache) > self.CONTEXT_CACHE_SIZE:
+                cache.popitem(last=False)
+        return text
+
+
+# ============================================================
+# 테스트 케이스
+# ============================================================
+
+def _write_skill(root: Path, name: str, examples: int = 2):
+    skill_dir = root / name
+    (skill_dir / "resources" / "examples").mkdir(parents=True, exist_ok=True)
+    (skill_dir / SKILL_FILE).write_text(
+        f"---\nname: {name}\nversion: 1\n---\n# {name}\n\n핵심 지침: 이벤트를 생성한다.\n",
+        encoding="utf-8"
+    )
+    (skill_dir / "resources" / "event_schema.json").write_text('{"type": "object"}', encoding="utf-8")
+    for i in range(examples):
+        (skill_dir / "resources" / "examples" / f"example_{i}.yaml").write_text(
+            f"title: 예제 {i}\n" * 20, encoding="utf-8"
+        )
+
+
+def _touch(path: Path, text: str):
+    """내용 변경 + mtime을 확실히 증가 (파일 시스템 시각 해상도 대비)"""
+    before = path.stat().st_mtime_ns
+    path.write_text(text, encoding="utf-8")
+    os.utime(path, ns=(before + 1_000_000_000, before + 1_000_000_000))
+
+
+def test_index_and_cache():
+    """✅ 인덱스 1회 구축 + 반복 로드는 파일 접근 없음"""
+    print("\n=== 테스트 1: 인덱스 / 캐시 ===")
+
+    root = Path(tempfile.mkdtemp())
+    try:
+        for i in range(200):
+            _write_skill(root, f"skill{i:03d}")
+
+        # 가이드 방식: 매 호출마다 스캔 + 읽기
+        def naive_execute(name: str) -> str:
+            skills = [d.name for d in root.iterdir() if d.is_dir()]
+            assert name in skills
+            return (root / name / SKILL_FILE).read_text()
+
+        start = time.perf_counter()
+        for i in range(500):
+            naive_execute(f"skill{i % 200:03d}")
+        naive = (time.perf_counter() - start) / 500
+
+        registry = SkillRegistry(str(root))
+        for i in range(200):
+            registry.load_skill(f"skill{i:03d}")  # 워밍업
+        reads_before = registry.stats()["file_reads"]
+        start = time.perf_counter()
+        for i in range(500):
+            registry.names()
+            registry.load_skill(f"skill{i % 200:03d}")
+        cached = (time.perf_counter() - start) / 500
+
+        print(f"✅ Skill 200개: 호출당 스캔+읽기 {naive * 1e6:.0f}μs → 캐시 {cached * 1e6:.1f}μs")
+        assert registry.stats()["file_reads"] == reads_before
+        assert cached < naive / 10
+
+        skill = registry.load("skill007")
+        assert skill.metadata == {"name": "skill007", "version": "1"}
+        assert skill.system_prompt.startswith("# skill007")
+        assert "resources/event_schema.json" in skill.resources
+
+        # progressive disclosure 레벨
+        minimal = registry.load_skill("skill007", "minimal")
+        standard = registry.load_skill("skill007", "standard")
+        full = registry.load_skill("skill007", "full")
+        assert minimal == skill.system_prompt
+        assert standard == minimal + '{"type": "object"}'
+        assert full.startswith(standard) and "## 예제: example_1.yaml" in full
+        registry.close()
+    finally:
+        shutil.rmtree(root)
+
+    return True
+
+
+def test_incremental_refresh():
+    """✅ mtime 기반 증분 갱신 (추가 / 삭제 / 수정)"""
+    print("\n=== 테스트 2: 증분 갱신 ===")
+
+    root = Path(tempfile.mkdtemp())
+    try:
+        for name in ["gamedesigner", "uxdesigner", "validator"]:
+            _write_skill(root, name)
+        now = [0.0]
+        registry = SkillRegistry(str(root), poll_interval=1.0, clock=lambda: now[0])
+        assert registry.names() == ["gamedesigner", "uxdesigner", "validator"]
+        ux_before = registry.load_skill("uxdesigner", "full")
+        registry.load_skill("gamedesigner", "full")
+
+        _touch(root / "gamedesigner" / SKILL_FILE, "# gamedesigner v2\n")
+        _touch(root / "uxdesigner" / "resources" / "examples" / "example_0.yaml", "title: 새 예제\n")
+        _write_skill(root, "narrator")
+        shutil.rmtree(root / "validator")
+
+        # poll_interval 전에는 캐시 유지
+        assert registry.load_skill("gamedesigner").startswith("# gamedesigner\n")
+        now[0] += 1.5
+        assert registry.load_skill("gamedesigner") == "# gamedesigner v2\n"
+        assert registry.names() == ["gamedesigner", "narrator", "uxdesigner"]
+
+        changes = registry.refresh()
+        print(f"✅ 변경 없음 재확인: {changes}")
+        assert changes == {"added": [], "removed": [], "changed": []}
+
+        ux_after = registry.load_skill("uxdesigner", "full")
+        assert ux_after != ux_before and "새 예제" in ux_after
+        try:
+            registry.load("validator")
+            return False
+        except KeyError:
+            pass
+        registry.close()
+    finally:
+        shutil.rmtree(root)
+
+    return True
+
+
+def test_executor_node():
+    """✅ Executor 노드가 공유 레지스트리 사용"""
+    print("\n=== 테스트 3: Executor 노드 ===")
+
+    root = Path(tempfile.mkdtemp())
+    try:
+        _write_skill(root, "gamedesigner")
+        context_file = root / "extra.md"
+        context_file.write_text("추가 컨텍스트", encoding="utf-8")
+
+        class Response:
+            def __init__(self, text: str):
+                self.text = text
+                self.tool_calls = {"events": []}
+
+        class TestExecutor(ClaudeSkill_Executor):
+            registry = SkillRegistry(str(root))
+            _context_cache = OrderedDict()
+
+            def call_claude(self, system_prompt: str, prompt: str):
+                return Response(f"{len(system_prompt)}:{prompt}")
+
+        inputs = TestExecutor.INPUT_TYPES()
+        assert inputs["required"]["skill_name"][0] == ["gamedesigner"]
+
+        node = TestExecutor()
+        text, structured = node.execute("gamedesigner", "이벤트 3개", context_files=str(context_file))
+        system_prompt, _ = node.prepare("gamedesigner", "이벤트 3개", str(context_file))
+        print(f"✅ 실행 결과: {text}")
+        assert system_prompt.endswith("추가 컨텍스트")
+        assert structured == {"events": []}
+        assert TestExecutor.registry.stats()["file_reads"] == 1
+
+        # 기본 call_claude는 Mock 응답 (NotImplementedError 없음)
+        class MockExecutor(ClaudeSkill_Executor):
+            registry = TestExecutor.registry
+            _context_cache = OrderedDict()
+            CONTEXT_CACHE_SIZE = 3
+
+        text, structured = MockExecutor().execute("gamedesigner", "이벤트 1개")
+        assert text.startswith("[Mock]") and text.endswith("이벤트 1개") and structured == {}
+
+        # context_files 캐시는 최근 CONTEXT_CACHE_SIZE개까지만
+        paths = []
+        for i in range(10):
+            path = root / f"context_{i}.md"
+            path.write_text(f"컨텍스트 {i}", encoding="utf-8")
+            paths.append(str(path))
+        for path in paths:
+            MockExecutor().prepare("gamedesigner", "p", path)
+        assert list(MockExecutor._context_cache) == paths[-3:]
+        TestExecutor.registry.close()
+    finally:
+        shutil.rmtree(root)
+
+    return True
+
+
+def test_handles_and_concurrency():
+    """✅ 열린 파일 없음 / 잘린 파일 / 백그라운드 감시 / 동시 로드"""
+    print("\n=== 테스트 4: 파일 핸들 / 감시 / 동시성 ===")
+
+    root = Path(tempfile.mkdtemp())
+    try:
+        for i in range(50):
+            _write_skill(root, f"skill{i:03d}")
+
+        def open_fds() -> Optional[int]:
+            fd_dir = "/proc/self/fd"
+            return len(os.listdir(fd_dir)) if os.path.isdir(fd_dir) else None
+
+        before = open_fds()
+        registry = SkillRegistry(str(root))
+        for i in range(50):
+            registry.load_skill(f"skill{i:03d}", "full")
+        after = open_fds()
+        print(f"✅ Skill 50개 full 로드: 캐시 파일 {registry.stats()['cached_files']}개, 열린 fd {before} → {after}")
+        assert after == before
+        assert registry.stats()["cached_files"] == 50 * 4
+
+        # 캐시된 파일을 잘라도 캐시된 문자열은 안전, refresh 후 새 내용
+        schema = root / "skill000" / "resources" / "event_schema.json"
+        cached_full = registry.load_skill("skill000", "standard")
+        with open(schema, "r+b") as f:
+            f.truncate(0)
+        assert registry.load_skill("skill000", "standard") == cached_full
+        assert registry.refresh()["changed"] == ["skill000"]
+        assert registry.load_skill("skill000", "standard") == registry.load_skill("skill000", "minimal")
+        registry.close()
+
+        # 백그라운드 감시: 요청 경로는 스캔하지 않고 변경은 watch_interval 안에 반영
+        watched = SkillRegistry(str(root), watch_interval=0.02)
+        refreshes = watched.stats()["refreshes"]
+        for _ in range(100):
+            watched.names()
+            watched.load_skill("skill001")
+        _touch(root / "skill001" / SKILL_FILE, "# skill001 v2\n")
+        deadline = time.monotonic() + 2.0
+        while watched.load_skill("skill001") != "# skill001 v2\n" and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert watched.load_skill("skill001") == "# skill001 v2\n"
+        assert watched.stats()["refreshes"] > refreshes
+        watched.close()
+        assert watched._watcher is None
+
+        # 동시 로드 + 갱신: 마지막 refresh 이후에는 옛 조합 결과가 남지 않음
+        shared = SkillRegistry(str(root))
+        errors: List[BaseException] = []
+        stop = threading.Event()
+
+        def reader():
+            try:
+                while not stop.is_set():
+                    for level in CONTEXT_LEVELS:
+                        shared.load_skill("skill002", level)
+            except BaseException as e:
+                errors.append(e)
+
+        readers = [threading.Thread(target=reader) for _ in range(4)]
+        for thread in readers:
+            thread.start()
+        target = root / "skill002" / "resources" / "event_schema.json"
+        for version in range(20):
+            _touch(target, f'{{"version": {version}}}')
+            shared.refresh()
+        stop.set()
+        for thread in readers:
+            thread.join()
+        assert not errors
+        assert shared.load_skill("skill002", "standard").endswith('{"version": 19}')
+        print(f"✅ 동시 로드 4스레드 + 갱신 20회: 최신 본문 유지, {shared.stats()}")
+
+        # 스캔은 잠금 밖: 스캔이 멈춰 있어도 로드는 진행되고, 늦게 끝난 옛 스캔은 버려짐
+        scan_started, resume_scan = threading.Event(), threading.Event()
+        scan_skill = shared._scan_skill
+
+        def slow_scan(skill_dir: Path):
+            if threading.current_thread() is not threading.main_thread():
+                scan_started.set()
+                resume_scan.wait(2.0)
+            return scan_skill(skill_dir)
+
+        shared._scan_skill = slow_scan
+        stale_diff = []
+        slow = threading.Thread(target=lambda: stale_diff.append(shared.refresh()))
+        slow.start()
+        assert scan_started.wait(2.0)
+        start = time.perf_counter()
+        shared.load_skill("skill003", "full")
+        blocked = time.perf_counter() - start
+        _touch(target, '{"version": 20}')
+        assert shared.refresh()["changed"] == ["skill002"]
+        resume_scan.set()
+        slow.join()
+        print(f"✅ 스캔 중 로드 {blocked * 1000:.1f}ms, 늦게 끝난 스캔 결과: {stale_diff[0]}")
+        assert blocked < 1.0
+        assert stale_diff == [{"added": [], "removed": [], "changed": []}]
+        assert shared.load_skill("skill002", "standard").endswith('{"version": 20}')
+        shared.close()
+    finally:
+        shutil.rmtree(root)
+
+    return True
+
+
+# ============================================================
+# 메인 실행
+# ============================================================
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("AI Agent Master Guide - Skill 레지스트리 검증")
+    print("=" * 60)
+
+    results = []
+    results.append(("인덱스 / 캐시", test_index_and_cache()))
+    results.append(("증분 갱신", test_incremental_refresh()))
+    results.append(("Executor 노드", test_executor_node()))
+    results.append(("파일 핸들 / 감시 / 동시성", test_handles_and_concurrency()))
+
+    print("\n" + "=" * 60)
+    print("테스트 결과 요약")
+    print("=" * 60)
+
+    passed = sum(1 for _, result in results if result)
+    total = len(results)
+
+    for name, result in results:
+        status = "✅ PASS" if result else "❌ FAIL"
+        print(f"{status} - {name}")
+
+    print(f"\n총 {passed}/{total} 테스트 통과 ({passed/total*100:.1f}%)")
+
+    if passed == total:
+        print("\n🎉 모든 Skill 레지스트리 검증 성공!")
+        exit(0)
+    else:
+        print("\n⚠️  일부 테스트 실패")
+        exit(1)